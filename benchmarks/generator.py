@@ -0,0 +1,127 @@
+"""
+Deterministic synthetic data shaped like the webapp's tables.
+
+The same (transactions, seed) always produces the same rows, so two
+benchmark runs measure the same workload. Values are stored the way the
+webapp writes them: ids, amounts and dates as text.
+"""
+import datetime
+import random
+
+SCHEMAS = {
+    "merchants": {
+        "columns": ["id", "name", "email", "password_hash", "balance", "created_at"],
+        "primary_key": "id"
+    },
+    "customers": {
+        "columns": ["id", "name", "email", "password_hash", "created_at", "risk_score",
+                    "wallet_balance", "current_package_id", "last_good_repayment"],
+        "primary_key": "id"
+    },
+    "loan_packages": {
+        "columns": ["id", "merchant_id", "name", "max_amount", "interest_rate",
+                    "repayment_days", "min_risk_score", "order_level", "created_at"],
+        "primary_key": "id"
+    },
+    "transactions": {
+        "columns": ["id", "merchant_id", "customer_id", "amount", "interest_rate",
+                    "repayment_days", "status", "timestamp", "fraud_flag", "due_date"],
+        "primary_key": "id"
+    }
+}
+
+STATUSES = ["pending", "accepted", "accepted", "accepted", "complete", "failed"]
+PACKAGES = [("Bronze", 3000.0, 18.0, 14), ("Silver", 9000.0, 14.0, 30), ("Gold", 25000.0, 10.0, 60)]
+PASSWORD_HASH = "ef92b778bafe771e89245b89ecbc08a44a4e166c06659911881f383d4473e94f"
+START = datetime.datetime(2025, 1, 1)
+
+
+def sizes(transactions):
+    """Row counts per table for a given number of transactions."""
+    merchants = max(10, transactions // 1000)
+    return {
+        "merchants": merchants,
+        "customers": max(100, transactions // 10),
+        "loan_packages": merchants * len(PACKAGES),
+        "transactions": transactions
+    }
+
+
+def _moment(rng, days=365):
+    return START + datetime.timedelta(seconds=rng.randrange(days * 86400))
+
+
+def _stamp(moment):
+    return moment.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def generate(transactions, seed=42):
+    """Returns {table: [rows]} for the given number of transactions."""
+    rng = random.Random(seed)
+    counts = sizes(transactions)
+    data = {}
+
+    data["merchants"] = [
+        {
+            "id": str(i),
+            "name": f"Merchant {i}",
+            "email": f"merchant{i}@example.com",
+            "password_hash": PASSWORD_HASH,
+            "balance": str(float(rng.randrange(100_000, 5_000_000))),
+            "created_at": _stamp(_moment(rng))
+        }
+        for i in range(1, counts["merchants"] + 1)
+    ]
+
+    data["customers"] = [
+        {
+            "id": str(i),
+            "name": f"Customer {i}",
+            "email": f"customer{i}@example.com",
+            "password_hash": PASSWORD_HASH,
+            "created_at": _stamp(_moment(rng)),
+            "risk_score": str(rng.randint(0, 2)),
+            "wallet_balance": str(float(rng.randrange(0, 50_000))),
+            "current_package_id": None,
+            "last_good_repayment": None
+        }
+        for i in range(1, counts["customers"] + 1)
+    ]
+
+    data["loan_packages"] = []
+    for m in range(1, counts["merchants"] + 1):
+        for level, (name, max_amount, rate, days) in enumerate(PACKAGES, start=1):
+            data["loan_packages"].append({
+                "id": str(len(data["loan_packages"]) + 1),
+                "merchant_id": str(m),
+                "name": name,
+                "max_amount": max_amount,
+                "interest_rate": rate,
+                "repayment_days": days,
+                "min_risk_score": level - 1,
+                "order_level": level,
+                "created_at": _stamp(_moment(rng))
+            })
+
+    data["transactions"] = [
+        transaction(rng, i, counts) for i in range(1, transactions + 1)
+    ]
+    return data
+
+
+def transaction(rng, number, counts):
+    """One loan request, as webapp/app.py builds it."""
+    name, max_amount, rate, days = rng.choice(PACKAGES)
+    moment = _moment(rng)
+    return {
+        "id": str(number),
+        "merchant_id": str(rng.randint(1, counts["merchants"])),
+        "customer_id": str(rng.randint(1, counts["customers"])),
+        "amount": str(float(rng.randrange(100, int(max_amount)))),
+        "interest_rate": str(rate),
+        "repayment_days": str(days),
+        "status": rng.choice(STATUSES),
+        "timestamp": _stamp(moment),
+        "fraud_flag": f"Risk: {rng.randint(0, 2)}",
+        "due_date": (moment + datetime.timedelta(days=days)).strftime("%Y-%m-%d")
+    }
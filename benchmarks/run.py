@@ -0,0 +1,282 @@
+"""
+KopaDB benchmark suite
+----------------------
+Times the common operations through Database on a synthetic loan
+workload (see benchmarks.generator):
+
+  insert, point_lookup, filtered_select, join, update, delete, save, load
+
+Each benchmark runs --repeat times; the median is reported. Results can
+be written as JSON and compared with an earlier run:
+
+  python -m benchmarks.run --rows 100k --output before.json
+  python -m benchmarks.run --rows 100k --compare before.json
+
+With --compare the exit status is 1 when any operation got slower than
+the baseline by more than --threshold (default 20%).
+"""
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from benchmarks.generator import SCHEMAS, generate, sizes, transaction
+from engine.database import Database
+
+# What the webapp looks rows up by
+INDEXES = {
+    "merchants": ["id", "email"],
+    "customers": ["id", "email"],
+    "loan_packages": ["id", "merchant_id"],
+    "transactions": ["id", "merchant_id", "customer_id", "status"]
+}
+BLOOM_FILTERS = {"transactions": ["id"]}
+
+
+def parse_rows(text):
+    """'5000', '10k' or '10M' -> int."""
+    text = text.strip().lower().replace("_", "")
+    scale = {"k": 1_000, "m": 1_000_000}.get(text[-1:], 1)
+    return int(float(text.rstrip("km")) * scale)
+
+
+@contextlib.contextmanager
+def quiet():
+    """Hide the engine's progress prints during setup."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+# ---------------- SETUP ----------------
+def build(data, indexes=True):
+    """In-memory Database holding a copy of the generated rows."""
+    with quiet():
+        db = Database(data_file=None)
+        for name, schema in SCHEMAS.items():
+            db.create_table(name, schema["columns"], primary_key=schema["primary_key"])
+            db.tables[name].rows = [dict(r) for r in data[name]]
+        if indexes:
+            for name, columns in INDEXES.items():
+                for col in columns:
+                    db.create_index(name, col)
+            for name, columns in BLOOM_FILTERS.items():
+                for col in columns:
+                    db.create_bloom_filter(name, col)
+    return db
+
+
+# ---------------- BENCHMARKS ----------------
+# Each takes (db, ctx) and returns how many operations it ran
+
+def bench_insert(db, ctx):
+    for _ in range(ctx["ops"]):
+        ctx["next_id"] += 1
+        db.insert("transactions", transaction(ctx["rng"], ctx["next_id"], ctx["counts"]))
+    return ctx["ops"]
+
+
+def bench_point_lookup(db, ctx):
+    rng, total = ctx["rng"], ctx["counts"]["transactions"]
+    for _ in range(ctx["ops"]):
+        db.select_all("transactions", [("id", str(rng.randint(1, total)))])
+    return ctx["ops"]
+
+
+def bench_filtered_select(db, ctx):
+    rng, merchants = ctx["rng"], ctx["counts"]["merchants"]
+    for _ in range(ctx["ops"]):
+        db.select_all("transactions", [
+            ("merchant_id", str(rng.randint(1, merchants))),
+            ("status", "accepted")
+        ])
+    return ctx["ops"]
+
+
+def bench_join(db, ctx):
+    db.inner_join("transactions", "customers", "customer_id", "id")
+    return 1
+
+
+def bench_update(db, ctx):
+    rng, total = ctx["rng"], ctx["counts"]["transactions"]
+    for _ in range(ctx["ops"]):
+        db.update("transactions", [("id", str(rng.randint(1, total)))], {"status": "complete"})
+    return ctx["ops"]
+
+
+def bench_delete(db, ctx):
+    for _ in range(ctx["ops"]):
+        if not ctx["deletable"]:
+            break
+        db.delete("transactions", [("id", ctx["deletable"].pop())])
+    return ctx["ops"]
+
+
+def bench_save(db, ctx):
+    db.data_file = ctx["path"]
+    try:
+        with quiet():
+            db._save_data()
+    finally:
+        db.data_file = None
+    return 1
+
+
+def bench_load(db, ctx):
+    with quiet():
+        Database(data_file=ctx["path"])
+    return 1
+
+
+BENCHMARKS = [
+    ("insert", bench_insert),
+    ("point_lookup", bench_point_lookup),
+    ("filtered_select", bench_filtered_select),
+    ("join", bench_join),
+    ("update", bench_update),
+    ("delete", bench_delete),
+    ("save", bench_save),
+    ("load", bench_load)
+]
+
+
+def run(rows, ops=1000, repeat=3, seed=42, storage="json", indexes=True, only=None):
+    """Run the suite and return the results document."""
+    data = generate(rows, seed)
+    db = build(data, indexes)
+    counts = sizes(rows)
+
+    workdir = tempfile.mkdtemp(prefix="kopadb-bench-")
+    deletable = [str(i) for i in range(1, rows + 1)]
+    random.Random(seed).shuffle(deletable)
+    ctx = {
+        "ops": ops,
+        "counts": counts,
+        "next_id": rows,
+        "deletable": deletable,
+        "path": os.path.join(workdir, f"bench.{storage}"),
+        "rng": None
+    }
+
+    results = {}
+    try:
+        for name, bench in BENCHMARKS:
+            if only and name not in only:
+                continue
+            seconds = []
+            done = 0
+            for i in range(repeat):
+                ctx["rng"] = random.Random(f"{seed}-{name}-{i}")
+                start = time.perf_counter()
+                done = bench(db, ctx)
+                seconds.append(time.perf_counter() - start)
+            median = statistics.median(seconds)
+            results[name] = {
+                "ops": done,
+                "seconds": seconds,
+                "best": min(seconds),
+                "median": median,
+                "per_op_us": median / done * 1e6 if done else None
+            }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "meta": {
+            "rows": rows,
+            "sizes": counts,
+            "ops": ops,
+            "repeat": repeat,
+            "seed": seed,
+            "storage": storage,
+            "indexes": indexes,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds")
+        },
+        "results": results
+    }
+
+
+# ---------------- COMPARISON ----------------
+def compare(baseline, current, threshold=0.2):
+    """
+    Returns [(name, baseline median, current median, ratio, regressed)]
+    for every benchmark present in both runs.
+    """
+    rows = []
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if not before or not before["median"]:
+            continue
+        ratio = result["median"] / before["median"]
+        rows.append((name, before["median"], result["median"], ratio, ratio > 1 + threshold))
+    return rows
+
+
+def print_results(document):
+    meta = document["meta"]
+    print(
+        f"KopaDB benchmark: {meta['rows']:,} transactions, {meta['ops']} ops x "
+        f"{meta['repeat']} runs, {meta['storage']}, indexes {'on' if meta['indexes'] else 'off'}"
+    )
+    for name, result in document["results"].items():
+        per_op = f"{result['per_op_us']:>12.1f} us/op" if result["ops"] > 1 else ""
+        print(f"  {name:<16} {result['median'] * 1000:>10.2f} ms {per_op}")
+
+
+def print_comparison(rows, baseline, current):
+    for key in ("rows", "ops", "storage", "indexes"):
+        if baseline["meta"].get(key) != current["meta"][key]:
+            print(f"⚠️ Baseline was run with a different {key}: {baseline['meta'].get(key)}")
+    print(f"  {'benchmark':<16} {'baseline ms':>12} {'current ms':>12} {'change':>8}")
+    for name, before, after, ratio, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"  {name:<16} {before * 1000:>12.2f} {after * 1000:>12.2f} {ratio - 1:>+8.0%}{flag}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="KopaDB benchmark suite")
+    parser.add_argument("--rows", default="10k", help="transactions to generate, e.g. 1k, 100k, 10M")
+    parser.add_argument("--ops", type=int, default=1000, help="operations per timed run")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--storage", choices=["json", "kdb"], default="json")
+    parser.add_argument("--no-indexes", action="store_true")
+    parser.add_argument("--only", nargs="*", choices=[name for name, _ in BENCHMARKS])
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--compare", help="baseline results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown, 0.2 = 20%%")
+    args = parser.parse_args(argv)
+
+    document = run(
+        parse_rows(args.rows), args.ops, args.repeat, args.seed,
+        args.storage, not args.no_indexes, args.only
+    )
+    print_results(document)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(document, f, indent=2)
+        print(f"→ Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+        rows = compare(baseline, document, args.threshold)
+        print_comparison(rows, baseline, document)
+        if any(regressed for *_, regressed in rows):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,222 @@
+"""
+Archive segments
+----------------
+Rows a table no longer changes (loans that completed or failed) can be
+moved out of memory into a directory of immutable segments:
+
+  <directory>/manifest.json      one entry per segment, in order
+  <directory>/seg-00001.z        zlib-compressed JSON {"columns", "rows"}
+
+Each manifest entry holds the segment's zone map (see engine.zonemap)
+and a Bloom filter per key column, so a query or a key check reads only
+the segments that may hold a match. Segments are never rewritten;
+archived rows are read-only.
+"""
+import json
+import os
+import zlib
+from collections import OrderedDict
+from engine.bloom import BloomFilter
+from engine.predicate import compile_predicate
+from engine.zonemap import ZoneMap
+
+SEGMENT_ROWS = 10_000
+CACHE_SEGMENTS = 4  # decompressed segments kept in memory
+
+
+class Segment:
+    def __init__(self, file, rows, size, raw_size, checksum, zones, blooms):
+        self.file = file
+        self.rows = rows
+        self.size = size  # bytes on disk
+        self.raw_size = raw_size  # bytes before compression
+        self.checksum = checksum
+        self.zones = zones  # ZoneMap
+        self.blooms = blooms  # key column -> BloomFilter
+
+    def may_match(self, conditions, columns=None):
+        """False only if the zone map or a Bloom filter rules every row out."""
+        for cond in conditions:
+            if not isinstance(cond, tuple):
+                continue
+            col, op, want = cond
+            bloom = self.blooms.get(col)
+            if bloom is None:
+                continue
+            if op == "=" and want not in bloom:
+                return False
+            if op == "IN" and not any(value in bloom for value in want):
+                return False
+        return self.zones.may_match(conditions, columns)
+
+    def dump(self):
+        return {
+            "file": self.file,
+            "rows": self.rows,
+            "size": self.size,
+            "raw_size": self.raw_size,
+            "checksum": self.checksum,
+            "zones": self.zones.dump(),
+            "blooms": {col: bloom.dump() for col, bloom in self.blooms.items()}
+        }
+
+    @classmethod
+    def load(cls, data):
+        return cls(
+            data["file"], data["rows"], data["size"], data["raw_size"], data["checksum"],
+            ZoneMap.load(data["zones"]),
+            {col: BloomFilter.load(b) for col, b in data.get("blooms", {}).items()}
+        )
+
+
+class ArchiveStore:
+    """
+    The archived rows of one table.
+
+    keep is the number of segments the table's own saved state knows
+    about. Segments past it were written by an archive run whose rows
+    were never removed from the saved table (the process stopped before
+    saving), so they are dropped rather than counted twice.
+    """
+    def __init__(self, directory, keep=None):
+        self.directory = directory
+        self.segments = []
+        self._cache = OrderedDict()  # file -> (columns, value lists)
+        self.segments_read = 0
+        self.segments_skipped = 0
+        os.makedirs(directory, exist_ok=True)
+        self._load_manifest(keep)
+
+    # ---------------- MANIFEST ----------------
+    def _manifest_path(self):
+        return os.path.join(self.directory, "manifest.json")
+
+    def _load_manifest(self, keep):
+        path = self._manifest_path()
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                self.segments = [Segment.load(s) for s in json.load(f)["segments"]]
+
+        if keep is not None and len(self.segments) > keep:
+            for segment in self.segments[keep:]:
+                os.remove(os.path.join(self.directory, segment.file))
+            print(f"[Database] Dropped {len(self.segments) - keep} unsaved archive segment(s)")
+            self.segments = self.segments[:keep]
+            self._save_manifest()
+        elif keep is not None and len(self.segments) < keep:
+            print(f"[Database] ⚠️ Archive {self.directory} is missing {keep - len(self.segments)} segment(s)")
+
+    def _save_manifest(self):
+        path = self._manifest_path()
+        with open(path + ".tmp", "w") as f:
+            json.dump({"segments": [s.dump() for s in self.segments]}, f)
+        os.replace(path + ".tmp", path)
+
+    # ---------------- WRITE ----------------
+    def append(self, rows, columns, keys=()):
+        """
+        Write rows as new segments of at most SEGMENT_ROWS rows, with
+        Bloom filters on the key columns. Returns the segments written.
+        """
+        written = []
+        for start in range(0, len(rows), SEGMENT_ROWS):
+            chunk = rows[start:start + SEGMENT_ROWS]
+            file = f"seg-{len(self.segments) + 1:05d}.z"
+            raw = json.dumps({
+                "columns": columns,
+                "rows": [[row.get(col) for col in columns] for row in chunk]
+            }).encode("utf-8")
+            payload = zlib.compress(raw)
+
+            path = os.path.join(self.directory, file)
+            with open(path + ".tmp", "wb") as f:
+                f.write(payload)
+            os.replace(path + ".tmp", path)
+
+            segment = Segment(
+                file, len(chunk), len(payload), len(raw), zlib.crc32(payload),
+                ZoneMap.build(chunk, columns),
+                {col: BloomFilter.build(row.get(col) for row in chunk) for col in keys}
+            )
+            self.segments.append(segment)
+            written.append(segment)
+
+        if written:
+            self._save_manifest()
+        return written
+
+    # ---------------- READ ----------------
+    def read(self, segment):
+        """Rows of one segment, as new dicts the caller may change."""
+        cached = self._cache.get(segment.file)
+        if cached is None:
+            with open(os.path.join(self.directory, segment.file), "rb") as f:
+                payload = f.read()
+            if zlib.crc32(payload) != segment.checksum:
+                raise ValueError(f"Archive segment {segment.file} is corrupt")
+            data = json.loads(zlib.decompress(payload))
+            cached = self._cache[segment.file] = (data["columns"], data["rows"])
+            if len(self._cache) > CACHE_SEGMENTS:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(segment.file)
+
+        self.segments_read += 1
+        columns, values = cached
+        return [dict(zip(columns, row)) for row in values]
+
+    def scan(self, conditions, upgrade=None, columns=None):
+        """
+        Archived rows matching conditions (normalized and bound), skipping
+        segments that cannot hold one. upgrade(rows) brings rows up to the
+        table's current schema before they are matched.
+        """
+        match = compile_predicate(conditions) if conditions else None
+        for segment in self.segments:
+            if not segment.may_match(conditions, columns):
+                self.segments_skipped += 1
+                continue
+            rows = self.read(segment)
+            if upgrade is not None:
+                rows = upgrade(rows)
+            if match is None:
+                yield from rows
+            else:
+                yield from (row for row in rows if match(row))
+
+    def existing(self, column, values):
+        """Those of values that an archived row holds in column."""
+        found = set()
+        for segment in self.segments:
+            bloom = segment.blooms.get(column)
+            candidates = [
+                value for value in values
+                if (bloom is None or value in bloom)
+                and segment.zones.may_match([(column, "=", value)])
+            ]
+            if candidates:
+                stored = {row.get(column) for row in self.read(segment)}
+                found.update(value for value in candidates if value in stored)
+        return found
+
+    @property
+    def row_count(self):
+        return sum(s.rows for s in self.segments)
+
+    def describe(self):
+        return {
+            "segments": len(self.segments),
+            "rows": self.row_count,
+            "bytes": sum(s.size for s in self.segments),
+            "raw_bytes": sum(s.raw_size for s in self.segments),
+            "segments_read": self.segments_read,
+            "segments_skipped": self.segments_skipped
+        }
+
+
+def all_rows(table):
+    """A table's rows followed by its archived ones, for full scans."""
+    archive = getattr(table, "archive", None)
+    if archive is None or not archive.segments:
+        return table.rows
+    return table.rows + list(archive.scan([], table._apply_schema))
@@ -0,0 +1,75 @@
+import base64
+import math
+import zlib
+
+
+class BloomFilter:
+    """
+    Probabilistic set of column values.
+
+    `value in bloom` is False only when the value was never added, so a
+    miss lets an equality probe or a uniqueness check skip the rows
+    entirely. Deleted values are not removed; they just cost a scan.
+    """
+    def __init__(self, capacity=1024, error_rate=0.01):
+        self.capacity = max(int(capacity), 1)
+        self.error_rate = error_rate
+        self.size = max(64, math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, value):
+        # Double hashing: h1 + i * h2 stands in for k independent hashes
+        data = repr(value).encode("utf-8")
+        h1 = zlib.crc32(data)
+        h2 = zlib.crc32(data, 0x9E3779B9) | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, value):
+        for pos in self._positions(value):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, value):
+        return all(
+            self.bits[pos >> 3] & (1 << (pos & 7))
+            for pos in self._positions(value)
+        )
+
+    @property
+    def full(self):
+        return self.count > self.capacity
+
+    def dump(self):
+        return {
+            "capacity": self.capacity,
+            "error_rate": self.error_rate,
+            "count": self.count,
+            "bits": base64.b64encode(bytes(self.bits)).decode("ascii")
+        }
+
+    @classmethod
+    def load(cls, data):
+        bloom = cls(data["capacity"], data["error_rate"])
+        bloom.bits = bytearray(base64.b64decode(data["bits"]))
+        bloom.count = data["count"]
+        return bloom
+
+    @classmethod
+    def build(cls, values, error_rate=0.01):
+        """Size a filter for values with room to grow, then fill it."""
+        values = list(values)
+        bloom = cls(max(1024, 2 * len(values)), error_rate)
+        for value in values:
+            bloom.add(value)
+        return bloom
+
+    def stats(self):
+        return {
+            "capacity": self.capacity,
+            "count": self.count,
+            "bits": self.size,
+            "hashes": self.hashes,
+            "error_rate": self.error_rate
+        }
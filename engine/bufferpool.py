@@ -0,0 +1,109 @@
+from collections import OrderedDict
+from engine.memory import rows_size
+
+
+class Frame:
+    __slots__ = ("rows", "pins", "dirty")
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.pins = 0
+        self.dirty = False
+
+
+class BufferPool:
+    """
+    Fixed number of in-memory page frames shared by every paged table.
+
+    A page is pinned while it is being read or changed and cannot be
+    evicted until it is unpinned. When a new page needs a frame, the
+    least recently used unpinned page is evicted, written back first if
+    it was changed. If every frame is pinned the pool grows past its
+    capacity and shrinks again on later loads.
+    """
+    def __init__(self, capacity=256):
+        self.capacity = max(int(capacity), 1)
+        self.frames = OrderedDict()  # (owner, page) -> Frame
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.writes = 0
+
+    def pin(self, owner, page):
+        """
+        Rows of one page, loaded with owner.read_page(page) if needed.
+        Every pin must be matched by an unpin.
+        """
+        key = (owner, page)
+        frame = self.frames.get(key)
+        if frame is None:
+            self.misses += 1
+            self._make_room()
+            frame = self.frames[key] = Frame(owner.read_page(page))
+        else:
+            self.hits += 1
+            self.frames.move_to_end(key)
+        frame.pins += 1
+        return frame.rows
+
+    def unpin(self, owner, page, dirty=False):
+        frame = self.frames[(owner, page)]
+        frame.pins -= 1
+        frame.dirty = frame.dirty or dirty
+
+    def _make_room(self):
+        if len(self.frames) < self.capacity:
+            return
+        for key, frame in list(self.frames.items()):
+            if frame.pins:
+                continue
+            self._write(key, frame)
+            del self.frames[key]
+            self.evictions += 1
+            if len(self.frames) < self.capacity:
+                return
+
+    def _write(self, key, frame):
+        if frame.dirty:
+            owner, page = key
+            owner.write_page(page, frame.rows)
+            frame.dirty = False
+            self.writes += 1
+
+    def flush(self, owner=None):
+        """Write back changed pages (of one owner, or all)."""
+        for key, frame in self.frames.items():
+            if owner is None or key[0] is owner:
+                self._write(key, frame)
+
+    def discard(self, owner):
+        """Drop an owner's pages without writing them."""
+        for key in [k for k in self.frames if k[0] is owner]:
+            del self.frames[key]
+
+    def memory(self, owner=None):
+        """Estimated bytes of resident pages (of one owner, or all)."""
+        return sum(
+            rows_size(frame.rows) for key, frame in self.frames.items()
+            if owner is None or key[0] is owner
+        )
+
+    def frames_of(self, owner):
+        return [frame for key, frame in self.frames.items() if key[0] is owner]
+
+    def resident(self, owner):
+        return sum(1 for key in self.frames if key[0] is owner)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "capacity": self.capacity,
+            "resident": len(self.frames),
+            "pinned": sum(1 for f in self.frames.values() if f.pins),
+            "dirty": sum(1 for f in self.frames.values() if f.dirty),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "writes": self.writes
+        }
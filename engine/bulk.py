@@ -0,0 +1,108 @@
+"""
+Bulk import and export
+----------------------
+COPY moves rows between a table and a CSV or JSON-lines file as a chain
+of generators:
+
+  read_rows(path) -> batches(rows, n) -> table.insert_many(batch)
+  export_rows(table) -> write_rows(path)
+
+Only one batch of input is held at a time, so a file never has to fit
+in memory. CSV files start with a header row naming the columns; an
+empty field is NULL. TIMESTAMP and DATE values are written as ISO text
+and cast back on import.
+"""
+import csv
+import json
+import os
+
+BATCH_ROWS = 10_000
+FORMATS = {"csv": "csv", "jsonl": "jsonl", "ndjson": "jsonl"}
+
+
+def file_format(path, fmt=None):
+    """'csv' or 'jsonl', from fmt or else the file extension."""
+    name = (fmt or os.path.splitext(path)[1].lstrip(".")).lower()
+    if name not in FORMATS:
+        raise ValueError(f"Unsupported COPY format: {name!r} (use CSV or JSONL)")
+    return FORMATS[name]
+
+
+# ---------------- READ ----------------
+def _read_csv(f, columns):
+    reader = csv.DictReader(f)
+    unknown = [c for c in reader.fieldnames or [] if c not in columns]
+    if unknown:
+        raise ValueError(f"Unknown column(s) in CSV header: {', '.join(unknown)}")
+    for record in reader:
+        yield {col: (None if value == "" else value) for col, value in record.items()}
+
+
+def _read_jsonl(f):
+    for number, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Line {number}: invalid JSON ({e.msg})")
+        if not isinstance(record, dict):
+            raise ValueError(f"Line {number}: expected a JSON object")
+        yield record
+
+
+def read_rows(path, columns, fmt=None):
+    """Rows of a CSV or JSON-lines file, one at a time."""
+    fmt = file_format(path, fmt)
+    with open(path, "r", newline="") as f:
+        if fmt == "csv":
+            yield from _read_csv(f, columns)
+        else:
+            yield from _read_jsonl(f)
+
+
+def batches(rows, size=BATCH_ROWS):
+    """Group an iterable of rows into lists of at most size rows."""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# ---------------- WRITE ----------------
+def export_rows(table, filters=None):
+    """Rows of a table as they would be shown; paged tables are read page by page."""
+    if filters:
+        rows = table.select_all(filters)
+    elif hasattr(table, "iter_rows"):
+        rows = table.iter_rows()
+    else:
+        rows = table.rows
+    for row in rows:
+        yield table.format_row(row)
+
+
+def write_rows(path, columns, rows, fmt=None):
+    """
+    Stream rows to a CSV or JSON-lines file, replacing it only once
+    every row is written. Returns the number of rows.
+    """
+    fmt = file_format(path, fmt)
+    count = 0
+    with open(path + ".tmp", "w", newline="") as f:
+        if fmt == "csv":
+            writer = csv.DictWriter(f, columns, extrasaction="ignore")
+            writer.writeheader()
+            for row in rows:
+                writer.writerow(row)
+                count += 1
+        else:
+            for row in rows:
+                f.write(json.dumps(row, default=str) + "\n")
+                count += 1
+    os.replace(path + ".tmp", path)
+    return count
@@ -0,0 +1,96 @@
+import sys
+from collections import OrderedDict
+
+MISS = object()
+
+
+class ResultCache:
+    """
+    LRU cache of query results.
+
+    Each entry remembers the tables it read and their versions. Every
+    mutation bumps a table's version, so a lookup after a write to any of
+    those tables is a miss and drops the entry; writes never have to find
+    the entries they invalidate. Bounded by entry count and by the total
+    number of cached rows.
+
+    Rows changed in place (table.rows[i][col] = ...) do not bump the
+    version; call clear() after doing that.
+    """
+    def __init__(self, max_entries=256, max_rows=100_000):
+        self.max_entries = max(int(max_entries), 1)
+        self.max_rows = max_rows
+        self.entries = OrderedDict()  # key -> (table versions, result, size)
+        self.rows = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _size(result):
+        return len(result) if isinstance(result, list) else 1
+
+    def get(self, key, tables):
+        """Cached result for key, or MISS when absent or stale."""
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return MISS
+
+        versions, result, size = entry
+        # A table replaced by a new object (reload, replica snapshot) is stale too
+        if len(versions) != len(tables) or any(
+            table is not current or version != current.version
+            for (table, version), current in zip(versions, tables)
+        ):
+            del self.entries[key]
+            self.rows -= size
+            self.invalidations += 1
+            self.misses += 1
+            return MISS
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return result
+
+    def put(self, key, tables, result):
+        size = self._size(result)
+        if size > self.max_rows:
+            return
+
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.rows -= old[2]
+
+        self.entries[key] = (tuple((t, t.version) for t in tables), result, size)
+        self.rows += size
+
+        while len(self.entries) > self.max_entries or self.rows > self.max_rows:
+            _, (_, _, evicted) = self.entries.popitem(last=False)
+            self.rows -= evicted
+            self.evictions += 1
+
+    def memory(self):
+        """Bytes held by the cache itself; cached rows belong to their tables."""
+        return sys.getsizeof(self.entries) + sum(
+            sys.getsizeof(result) for _, result, _ in self.entries.values()
+        )
+
+    def clear(self):
+        self.entries.clear()
+        self.rows = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "rows": self.rows,
+            "max_entries": self.max_entries,
+            "max_rows": self.max_rows,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "evictions": self.evictions
+        }
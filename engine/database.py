@@ -1,67 +1,469 @@
+import contextlib
+import datetime
 import json
 import os
+import tempfile
+import time
+import zlib
+from .archive import ArchiveStore, all_rows
+from .bufferpool import BufferPool
+from .bulk import BATCH_ROWS, batches, export_rows, read_rows, write_rows
+from .cache import MISS, ResultCache
+from .dictionary import decode_rows, encode_rows
+from .memory import format_bytes
 from .table import Table
-from .index import Index
+from .paged import PAGE_ROWS, PagedTable
+from .partition import PartitionedTable
+from .predicate import from_json, normalize
+from .view import MaterializedView
+from .parallel import ParallelExecutor, build_buckets
+from .replication import MutationLog
+from .scheduler import Scheduler, Timer
+from .stats import QueryStats
+from .snapshot import EXTENSION as SNAPSHOT_EXTENSION, SnapshotReader, write_snapshot
+
+# 2: TIMESTAMP / DATE values are stored as integers (see engine.temporal)
+STORAGE_FORMAT = 2
+TEMPORAL_TYPES = {"TIMESTAMP", "DATE"}
+MEMORY_CHECK_SECONDS = 5  # how often writes re-check the memory budget
 
 class Database:
-    def __init__(self, data_file="kopadb_data.json"):
+    def __init__(self, data_file="kopadb_data.json", parallel_workers=0, cache_entries=0,
+                 buffer_pages=256, slow_query_ms=100, memory_budget_mb=None):
         self.tables = {}
+        self.views = {}  # name -> MaterializedView
         self.data_file = data_file
+        self._saved_versions = {}  # partition name -> version on disk
+        self._saved_indexes = {}  # table/partition name -> (version, columns) on disk
+        self.executor = None
+        self.mutation_log = None
+        self.result_cache = None
+        self.buffer_pool = BufferPool(buffer_pages)  # pages of paged tables
+        self.query_stats = QueryStats(slow_query_ms)
+        self.memory_budget = {"total_mb": memory_budget_mb, "tables": {}}
+        self._memory_warnings = {}
+        self._memory_checked = 0.0
+        self._deferred = 0  # depth of deferred_saves() blocks
+        self._unsaved = False
+        self._snapshot = None  # SnapshotReader backing lazily loaded tables
+        self.scheduler = Scheduler()
         self._load_data()
 
+        if parallel_workers:
+            self.enable_parallel(parallel_workers)
+        if cache_entries:
+            self.enable_result_cache(cache_entries)
+
     # =========================
     # Persistence
     # =========================
     def _load_data(self):
-        if not os.path.exists(self.data_file):
+        if not self.data_file or not os.path.exists(self.data_file):
             return
 
         try:
-            with open(self.data_file, "r") as f:
-                data = json.load(f)
+            if self._binary():
+                data = self._read_snapshot()
+            else:
+                with open(self.data_file, "r") as f:
+                    data = json.load(f)
 
+            view_definitions = {}
             for table_name, t in data.items():
-                table = Table(
-                    name=table_name,
-                    columns=list(t["schema"].items()),  # schema → [(col, type)]
-                    primary_key=t.get("primary_key"),
-                    unique_keys=t.get("unique_keys", [])
+                if "view" in t:
+                    view_definitions[table_name] = t["view"]
+                    continue
+
+                # Older files hold TIMESTAMP values as text: convert them
+                # now and bump versions so indexes and files are rewritten
+                upgrade = (
+                    t.get("format", 1) < STORAGE_FORMAT
+                    and bool(TEMPORAL_TYPES & set(t["schema"].values()))
                 )
-                table.rows = t.get("rows", [])
 
-                # rebuild indexes
-                for col in t.get("indexes", []):
-                    idx = Index(col)
-                    table.create_index(col, idx)
+                if t.get("partition_by"):
+                    table = PartitionedTable(
+                        name=table_name,
+                        columns=list(t["schema"].items()),
+                        primary_key=t.get("primary_key"),
+                        unique_keys=t.get("unique_keys", []),
+                        partition_by=t["partition_by"]
+                    )
+                    table.restore_schema_changes(t.get("schema_changes", {}))
+                    self._load_partitions(table, t.get("partition_versions"), upgrade)
+                elif t.get("paged"):
+                    table = self._new_paged_table(
+                        table_name, list(t["schema"].items()), t.get("primary_key"),
+                        t.get("unique_keys", []), t["paged"]
+                    )
+                    table.restore_schema_changes(t.get("schema_changes", {}))
+                    table.load()
+                else:
+                    table = Table(
+                        name=table_name,
+                        columns=list(t["schema"].items()),  # schema → [(col, type)]
+                        primary_key=t.get("primary_key"),
+                        unique_keys=t.get("unique_keys", [])
+                    )
+                    table.restore_schema_changes(t.get("schema_changes", {}))
+                    if "loader" in t and not upgrade:
+                        table.defer_rows(t["loader"])
+                    else:
+                        rows = t["loader"]() if "loader" in t else decode_rows(
+                            t.get("rows", []), t.get("dictionaries")
+                        )
+                        table.rows = table.coerce_rows(rows) if upgrade else rows
+                    table.version = t.get("version", 0)
+                    if upgrade:
+                        table.version += 1
+                    if t.get("archive"):
+                        spec = t["archive"]
+                        table.attach_archive(
+                            ArchiveStore(self._archive_directory(table_name), spec["segments"]),
+                            from_json(spec["policy"]) if spec.get("policy") else None
+                        )
 
+                # restore persisted indexes, rebuilding any that are stale
+                kinds = t.get("index_kinds", {})
+                for storage in self._storage_tables(table):
+                    self._load_indexes(
+                        storage, t.get("indexes", []), kinds,
+                        t.get("partial_indexes", [])
+                    )
+                for col, bloom in t.get("bloom_filters", {}).items():
+                    table.restore_bloom(col, bloom)
+
+                table.executor = self.executor
+                table.stats = self.query_stats
                 self.tables[table_name] = table
 
+            # Views are recomputed from their source tables
+            for name, definition in view_definitions.items():
+                self._build_view(name, definition)
+
             print(f"[Database] Loaded {len(self.tables)} tables")
 
         except Exception as e:
             print("[Database] Load failed:", e)
             self.tables = {}
+            self.views = {}
 
     def _save_data(self):
+        if time.monotonic() - self._memory_checked >= MEMORY_CHECK_SECONDS:
+            self.check_memory()
+
+        if not self.data_file:
+            return  # in-memory database
+        if self._deferred:
+            self._unsaved = True
+            return
+
+        started = time.perf_counter()
+        self._write_data()
+        self._unsaved = False
+        self.query_stats.record("persist", None, time.perf_counter() - started, self.data_file)
+
+    @contextlib.contextmanager
+    def deferred_saves(self):
+        """
+        Keep changes made inside the block in memory and save once when it
+        ends, instead of after every statement. If the block raises, the
+        file keeps its state from the last save; flush() writes it sooner.
+        Paged tables may still write evicted pages, and the mutation log
+        ships every change as it happens.
+        """
+        self._deferred += 1
+        try:
+            yield self
+        finally:
+            self._deferred -= 1
+        if not self._deferred:
+            self.flush()
+
+    def flush(self):
+        """Write changes held back by deferred_saves(). True if anything was written."""
+        if not self._unsaved:
+            return False
+        deferred, self._deferred = self._deferred, 0
+        try:
+            self._save_data()
+        finally:
+            self._deferred = deferred
+        return True
+
+    def _write_data(self):
+        if self._binary():
+            self._write_snapshot()
+            self._save_indexes()
+            return
+
         data = {}
         for name, table in self.tables.items():
+            partitioned = isinstance(table, PartitionedTable)
+            paged = isinstance(table, PagedTable)
+            dictionaries, rows = encode_rows(
+                [] if partitioned or paged else table.rows,
+                {} if partitioned or paged else table.dictionaries
+            )
             data[name] = {
                 "schema": table.schema,
-                "rows": table.rows,
+                "rows": rows,
+                "dictionaries": dictionaries,
                 "primary_key": table.primary_key,
                 "unique_keys": table.unique_keys,
-                "indexes": list(table.indexes.keys())
+                "indexes": list(table.indexes.keys()),
+                "index_kinds": table.index_kinds(),
+                "partial_indexes": table.partial_index_specs(),
+                "bloom_filters": table.bloom_specs(),
+                "schema_changes": table.schema_changes(),
+                "format": STORAGE_FORMAT
             }
 
+            if partitioned:
+                # Partition rows live in their own files
+                data[name]["partition_by"] = table.partition_spec()
+                data[name]["partition_versions"] = [p.version for p in table.partitions]
+                self._save_partitions(table)
+            elif paged:
+                # Pages live in their own directory
+                data[name]["paged"] = table.page_spec()
+                table.save()
+            else:
+                data[name]["version"] = table.version
+                if table.archive is not None:
+                    data[name]["archive"] = table.archive_spec()
+
+        for name, view in self.views.items():
+            data[name] = {"view": view.definition()}
+
         with open(self.data_file, "w") as f:
             json.dump(data, f, indent=2)
 
+        self._save_indexes()
+
+    def _binary(self):
+        return self.data_file.endswith(SNAPSHOT_EXTENSION)
+
+    def _read_snapshot(self):
+        """Open the binary snapshot; rows are decoded on first access."""
+        self._snapshot = SnapshotReader(self.data_file)
+        data = {}
+        for name, meta in self._snapshot.tables.items():
+            data[name] = {
+                **meta,
+                "loader": lambda name=name: self._snapshot.load_rows(name)
+            }
+        return data
+
+    def _write_snapshot(self):
+        entries = {}
+        for name, table in self.tables.items():
+            meta = {
+                "schema": table.schema,
+                "primary_key": table.primary_key,
+                "unique_keys": table.unique_keys,
+                "indexes": list(table.indexes.keys()),
+                "index_kinds": table.index_kinds(),
+                "partial_indexes": table.partial_index_specs(),
+                "bloom_filters": table.bloom_specs(),
+                "schema_changes": table.schema_changes(),
+                "format": STORAGE_FORMAT
+            }
+
+            if isinstance(table, PartitionedTable):
+                meta["partition_by"] = table.partition_spec()
+                meta["partition_versions"] = [p.version for p in table.partitions]
+                entries[name] = {"meta": meta, "rows": []}
+                self._save_partitions(table)
+            elif isinstance(table, PagedTable):
+                meta["paged"] = table.page_spec()
+                entries[name] = {"meta": meta, "rows": []}
+                table.save()
+            else:
+                meta["version"] = table.version
+                if table.archive is not None:
+                    meta["archive"] = table.archive_spec()
+                if not table.loaded:
+                    # Never touched: copy its column segments as they are
+                    entries[name] = {"meta": meta, "source": (self._snapshot, name)}
+                else:
+                    entries[name] = {"meta": meta, "rows": table.rows}
+
+        for name, view in self.views.items():
+            entries[name] = {"meta": {"view": view.definition()}, "rows": []}
+
+        write_snapshot(self.data_file, entries)
+
+    def _partition_file(self, table_name, number):
+        base = os.path.splitext(self.data_file)[0]
+        ext = SNAPSHOT_EXTENSION if self._binary() else ".json"
+        return f"{base}.{table_name}.p{number}{ext}"
+
+    def _new_paged_table(self, name, columns, primary_key, unique_keys, spec):
+        if self.data_file:
+            base = os.path.splitext(self.data_file)[0]
+            directory = f"{base}.{name}.pages"
+        else:
+            directory = tempfile.mkdtemp(prefix=f"kopadb-{name}-")  # in-memory database
+        return PagedTable(
+            name=name,
+            columns=columns,
+            primary_key=primary_key,
+            unique_keys=unique_keys,
+            directory=directory,
+            pool=self.buffer_pool,
+            page_rows=spec.get("page_rows", PAGE_ROWS)
+        )
+
+    def _archive_directory(self, name):
+        if self.data_file:
+            base = os.path.splitext(self.data_file)[0]
+            return f"{base}.{name}.archive"
+        return tempfile.mkdtemp(prefix=f"kopadb-{name}-archive-")  # in-memory database
+
+    def _load_partitions(self, table, versions=None, upgrade=False):
+        for i, part in enumerate(table.partitions):
+            path = self._partition_file(table.name, i)
+            if not os.path.exists(path):
+                pass
+            elif self._binary():
+                reader = SnapshotReader(path)
+                if upgrade:
+                    part.rows = part.coerce_rows(reader.load_rows(part.name))
+                else:
+                    part.defer_rows(lambda reader=reader, name=part.name: reader.load_rows(name))
+            else:
+                with open(path, "r") as f:
+                    stored = json.load(f)
+                if isinstance(stored, dict):
+                    rows = decode_rows(stored["rows"], stored["dictionaries"])
+                else:
+                    rows = stored  # written before dictionary encoding
+                part.rows = part.coerce_rows(rows) if upgrade else rows
+            if versions:
+                part.version = versions[i]
+            self._saved_versions[part.name] = part.version
+            if upgrade:
+                part.version += 1  # dirty, so the converted rows are saved
+
+    def _save_partitions(self, table):
+        """Rewrite only the partitions that changed since the last save."""
+        for i, part in enumerate(table.partitions):
+            path = self._partition_file(table.name, i)
+            if self._saved_versions.get(part.name) == part.version and os.path.exists(path):
+                continue
+            if self._binary():
+                write_snapshot(path, {part.name: {"meta": {"schema": part.schema}, "rows": part.rows}})
+            else:
+                dictionaries, rows = encode_rows(part.rows, part.dictionaries)
+                with open(path, "w") as f:
+                    json.dump({"dictionaries": dictionaries, "rows": rows}, f, indent=2)
+            self._saved_versions[part.name] = part.version
+
+    # =========================
+    # Index persistence
+    # =========================
+    def _storage_tables(self, table=None):
+        """
+        Tables that own rows: plain tables and individual partitions.
+        Paged tables keep their page indexes with their pages.
+        """
+        tables = [table] if table else list(self.tables.values())
+        result = []
+        for t in tables:
+            if isinstance(t, PartitionedTable):
+                result.extend(t.partitions)
+            elif isinstance(t, PagedTable):
+                continue
+            else:
+                result.append(t)
+        return result
+
+    def _index_file(self, name):
+        base = os.path.splitext(self.data_file)[0]
+        return f"{base}.{name}.idx"
+
+    def _read_index_file(self, name):
+        """
+        Returns (header, indexes) or (None, {}) when the file is missing or
+        fails its checksum. Line 1 is a JSON header, the rest the payload.
+        """
+        path = self._index_file(name)
+        if not os.path.exists(path):
+            return None, {}
+
+        try:
+            with open(path, "rb") as f:
+                header = json.loads(f.readline())
+                payload = f.read()
+            if zlib.crc32(payload) != header["checksum"]:
+                print(f"[Database] Index file for '{name}' is corrupt, rebuilding")
+                return None, {}
+            return header, json.loads(payload)
+        except (ValueError, KeyError):
+            return None, {}
+
+    def _load_indexes(self, table, columns, kinds, partial_specs):
+        header, indexes = self._read_index_file(table.name)
+        fresh = header is not None and header["version"] == table.version
+
+        specs = [(col, kinds.get(col, "hash"), None) for col in columns]
+        specs += [
+            (spec["column"], spec["kind"], [tuple(c) for c in spec["where"]])
+            for spec in partial_specs
+        ]
+
+        for col, kind, where in specs:
+            name = table.index_name(col, where)
+            if fresh and name in indexes:
+                table.restore_index(col, indexes[name], header["row_count"], kind, where)
+            else:
+                fresh = False
+                table.create_index(col, kind, where)
+
+        if fresh:
+            self._saved_indexes[table.name] = (table.version, list(table._named_indexes()))
+
+    def _save_indexes(self):
+        """Write index files for tables whose rows or indexes changed."""
+        for table in self._storage_tables():
+            if not table._named_indexes() or not table.loaded:
+                continue
+
+            stamp = (table.version, list(table._named_indexes()))
+            if self._saved_indexes.get(table.name) == stamp:
+                continue
+
+            payload = json.dumps(table.dump_indexes()).encode("utf-8")
+            header = {
+                "version": table.version,
+                "row_count": len(table.rows),
+                "checksum": zlib.crc32(payload)
+            }
+
+            path = self._index_file(table.name)
+            with open(path + ".tmp", "wb") as f:
+                f.write(json.dumps(header).encode("utf-8") + b"\n")
+                f.write(payload)
+            os.replace(path + ".tmp", path)
+            self._saved_indexes[table.name] = stamp
+
     # =========================
     # Schema
     # =========================
-    def create_table(self, name, columns, primary_key=None, unique_keys=None):
-        if name in self.tables:
+    def create_table(self, name, columns, primary_key=None, unique_keys=None,
+                     partition_by=None, paged=None):
+        """
+        partition_by: {"kind": "HASH"|"RANGE", ...}, see PartitionedTable.
+        paged: True or {"page_rows": n} keeps rows on disk in pages read
+        through the buffer pool, see PagedTable.
+        """
+        if name in self.tables or name in self.views:
             raise ValueError("Table already exists")
+        if partition_by and paged:
+            raise ValueError("A table cannot be both partitioned and paged")
+        if paged is True:
+            paged = {"page_rows": PAGE_ROWS}
 
         # normalize columns
         if isinstance(columns, dict):
@@ -71,77 +473,595 @@ class Database:
         else:
             raise ValueError("Invalid columns format")
 
-        self.tables[name] = Table(
-            name=name,
-            columns=normalized,
-            primary_key=primary_key,
-            unique_keys=unique_keys or []
-        )
+        if partition_by:
+            self.tables[name] = PartitionedTable(
+                name=name,
+                columns=normalized,
+                primary_key=primary_key,
+                unique_keys=unique_keys or [],
+                partition_by=partition_by
+            )
+        elif paged:
+            self.tables[name] = self._new_paged_table(
+                name, normalized, primary_key, unique_keys or [], paged
+            )
+            self.tables[name].drop_pages()
+        else:
+            self.tables[name] = Table(
+                name=name,
+                columns=normalized,
+                primary_key=primary_key,
+                unique_keys=unique_keys or []
+            )
 
+        self.tables[name].executor = self.executor
+        self.tables[name].stats = self.query_stats
+        self._ship(
+            "create_table", table=name, columns=normalized,
+            primary_key=primary_key, unique_keys=unique_keys or [],
+            partition_by=partition_by, paged=paged or None
+        )
         self._save_data()
 
     def show_tables(self):
-        return list(self.tables.keys())
+        return list(self.tables.keys()) + list(self.views.keys())
 
     def describe_table(self, table_name):
         table = self._get_table(table_name)
-        return {
+        info = {
             "schema": table.schema,
             "primary_key": table.primary_key,
             "unique_keys": table.unique_keys,
-            "indexes": list(table.indexes.keys())
+            "indexes": list(table.indexes.keys()),
+            "index_kinds": table.index_kinds(),
+            "partial_indexes": list(table.partial_indexes.keys()),
+            "bloom_filters": list(table.blooms),
+            "dictionaries": {col: len(d) for col, d in table.dictionaries.items()}
         }
+        if isinstance(table, PartitionedTable):
+            info["partition_by"] = table.partition_spec()
+            info["partition_rows"] = [len(p.rows) for p in table.partitions]
+        if isinstance(table, PagedTable):
+            info["paged"] = {
+                **table.page_spec(),
+                "pages": len(table.pages),
+                "rows": sum(table.pages),
+                "resident_pages": self.buffer_pool.resident(table)
+            }
+        if isinstance(table, Table):
+            info["zone_maps"] = table.zone_specs()
+        if getattr(table, "archive", None) is not None:
+            info["archive"] = {**table.archive.describe(), "policy": table.archive_policy}
+        if table_name in self.views:
+            info["view"] = self.views[table_name].definition()
+        info["schema_version"] = table.schema_version
+        info["defaults"] = dict(table.defaults)
+        info["memory"] = table.memory()
+        return info
+
+    def add_column(self, table_name, column, dtype="TEXT", default=None):
+        """
+        ALTER TABLE ... ADD COLUMN. Only the schema changes: existing rows
+        get default as they are read and keep it once written back.
+        """
+        table = self._get_writable(table_name)
+        table.add_column(column, dtype, default)
+        self._schema_changed()
+        self._ship("add_column", table=table_name, column=column, dtype=dtype, default=default)
+        self._save_data()
+        print(f"[DB] Column '{column}' added to {table_name}")
+
+    def drop_column(self, table_name, column):
+        """ALTER TABLE ... DROP COLUMN; stored values are discarded as rows are read."""
+        table = self._get_writable(table_name)
+        for name, view in self.views.items():
+            if view.definition()["source"] == table_name and view.uses(column):
+                raise ValueError(f"Column '{column}' is used by materialized view '{name}'")
+        table.drop_column(column)
+        self._schema_changed()
+        self._ship("drop_column", table=table_name, column=column)
+        self._save_data()
+        print(f"[DB] Column '{column}' dropped from {table_name}")
+
+    def compact_table(self, table_name):
+        """Rewrite every stored row of a table in its current schema."""
+        table = self._get_writable(table_name)
+        count = table.compact()
+        if isinstance(table, PartitionedTable):
+            for part in table.partitions:
+                self._saved_versions.pop(part.name, None)  # rewrite unchanged partitions too
+        self._save_data()
+        print(f"[DB] Compacted {table_name} ({count} rows)")
+        return count
+
+    def _schema_changed(self):
+        # Cached results hold rows in the old shape
+        if self.result_cache:
+            self.result_cache.clear()
 
     # =========================
     # CRUD
     # =========================
     def insert(self, table_name, row):
-        table = self._get_table(table_name)
-        table.insert(row)
+        table = self._get_writable(table_name)
+        with self._measure("insert", table_name):
+            stored = table.insert(row)
+        self._ship("insert", table=table_name, row=stored)
         self._save_data()
 
+    def insert_many(self, table_name, rows):
+        """Insert a batch of rows; all of them or none (see Table.insert_many)."""
+        table = self._get_writable(table_name)
+        with self._measure("insert", table_name, f"{len(rows)} rows"):
+            stored = table.insert_many(rows)
+        self._ship("insert_many", table=table_name, rows=stored)
+        self._save_data()
+        return len(stored)
+
     def select_all(self, table_name, filters=None):
         table = self._get_table(table_name)
-        return table.select_all(filters)
+        with self._measure("select", table_name, filters):
+            return self._cached(
+                ("select", table_name, normalize(filters)),
+                [table],
+                lambda: table.select_all(filters)
+            )
 
     def update(self, table_name, where, updates):
-        table = self._get_table(table_name)
-        table.update(where, updates)
+        table = self._get_writable(table_name)
+        if "updated_at" in table.schema and "updated_at" not in updates:
+            # Stamped here and shipped, so replicas store the primary's time
+            stamp = table._cast("updated_at", datetime.datetime.now().isoformat())
+            updates = {**updates, "updated_at": stamp}
+        with self._measure("update", table_name, where):
+            table.update(where, updates)
+        self._ship("update", table=table_name, where=where, updates=updates)
         self._save_data()
         return True
 
     def delete(self, table_name, where):
-        table = self._get_table(table_name)
-        table.delete(where)
+        table = self._get_writable(table_name)
+        with self._measure("delete", table_name, where):
+            table.delete(where)
+        self._ship("delete", table=table_name, where=where)
         self._save_data()
         return True
 
+    # =========================
+    # Bulk import / export
+    # =========================
+    def copy_from(self, table_name, path, fmt=None, batch_rows=BATCH_ROWS):
+        """
+        Load a CSV or JSON-lines file (see engine.bulk) in batches of
+        batch_rows. Each batch is inserted whole or not at all; when one
+        fails, the batches before it stay loaded. Saved once at the end.
+        Returns the number of rows loaded.
+        """
+        table = self._get_writable(table_name)
+        count = 0
+        try:
+            with self._measure("copy", table_name, path):
+                keys = table.key_values()
+                for batch in batches(read_rows(path, table.columns, fmt), batch_rows):
+                    stored = table.insert_many(batch, keys)
+                    self._ship("insert_many", table=table_name, rows=stored)
+                    count += len(stored)
+        except ValueError as e:
+            raise ValueError(f"COPY into '{table_name}' stopped after {count} rows: {e}")
+        finally:
+            if count:
+                self._save_data()
+
+        print(f"[DB] Copied {count} rows into {table_name}")
+        return count
+
+    def copy_to(self, table_name, path, fmt=None, filters=None):
+        """Write a table's rows (or those matching filters) to a CSV or JSON-lines file."""
+        table = self._get_table(table_name)
+        with self._measure("copy", table_name, path):
+            count = write_rows(path, table.columns, export_rows(table, filters), fmt)
+        print(f"[DB] Copied {count} rows from {table_name} to {path}")
+        return count
+
+    # =========================
+    # Archive
+    # =========================
+    def set_archive_policy(self, table_name, where):
+        """
+        Conditions archive() uses when called without its own, e.g.
+        [("status", "IN", ["complete", "failed"])]. None clears it.
+        """
+        table = self._archived_table(table_name)
+        table.archive_policy = normalize(where) if where else None
+        self._ship("archive_policy", table=table_name, where=table.archive_policy)
+        self._save_data()
+
+    def archive(self, table_name, where=None):
+        """
+        Move rows matching where (or the table's archive policy) out of
+        memory into compressed read-only segments, see engine.archive.
+        Queries still return them; update and delete no longer do.
+        Returns the number of rows moved.
+        """
+        table = self._archived_table(table_name)
+        where = where or table.archive_policy
+        if not where:
+            raise ValueError(f"No archive policy for '{table_name}': give a WHERE clause")
+
+        with self._measure("archive", table_name, where):
+            count = table.archive_rows(where)
+        if count:
+            self._ship("archive", table=table_name, where=where)
+            self._save_data()
+        print(f"[DB] Archived {count} rows of {table_name}")
+        return count
+
+    def _archived_table(self, table_name):
+        table = self._get_writable(table_name)
+        if not isinstance(table, Table):
+            raise ValueError(f"Only plain tables can be archived, not '{table_name}'")
+        if table.archive is None:
+            table.attach_archive(ArchiveStore(self._archive_directory(table_name)))
+        return table
+
     # =========================
     # Indexing
     # =========================
-    def create_index(self, table_name, column):
+    def create_index(self, table_name, column, kind="hash", where=None):
         table = self._get_table(table_name)
-        table.create_index(column, Index(column))
+        table.create_index(column, kind, where)
+        self._ship("create_index", table=table_name, column=column, kind=kind, where=where)
         self._save_data()
         print(f"[DB] Index created on {table_name}.{column}")
 
+    def create_bloom_filter(self, table_name, column, error_rate=0.01):
+        table = self._get_writable(table_name)
+        table.create_bloom_filter(column, error_rate)
+        self._ship("create_bloom_filter", table=table_name, column=column, error_rate=error_rate)
+        self._save_data()
+        print(f"[DB] Bloom filter created on {table_name}.{column}")
+
+    # =========================
+    # Materialized views
+    # =========================
+    def create_materialized_view(self, name, source, columns, where=None, group_by=None):
+        """
+        Store SELECT columns FROM source WHERE ... GROUP BY ... as a view
+        that is updated with every change to source. columns are column
+        names or (func, column[, alias]) with COUNT, SUM or AVG.
+        The view is queried like a table and cannot be written to.
+        """
+        if name in self.tables or name in self.views:
+            raise ValueError("Table already exists")
+
+        view = self._build_view(name, {
+            "source": source,
+            "columns": columns,
+            "where": where,
+            "group_by": group_by
+        })
+        self._ship("create_view", name=name, definition=view.definition())
+        self._save_data()
+        print(f"[DB] Materialized view '{name}' created ({len(view.table.rows)} rows)")
+
+    def _build_view(self, name, definition):
+        view = MaterializedView(
+            name,
+            self._get_writable(definition["source"]),
+            definition["columns"],
+            from_json(definition.get("where")),
+            definition.get("group_by")
+        )
+        view.table.stats = self.query_stats
+        kinds = definition.get("index_kinds", {})
+        for col in definition.get("indexes", []):
+            if col not in view.table.indexes:
+                view.table.create_index(col, kinds.get(col, "hash"))
+        self.views[name] = view
+        return view
+
+    # =========================
+    # Replication
+    # =========================
+    def enable_log_shipping(self, log_path):
+        """
+        Append every mutation to `log_path` so Replica processes can follow.
+        A new log starts with a snapshot of the current state.
+        """
+        self.mutation_log = MutationLog(log_path)
+        if not self.mutation_log.lsn:
+            self.mutation_log.checkpoint(self.tables, self.views)
+
+    def checkpoint_log(self):
+        """Truncate the mutation log to a snapshot of the current state."""
+        if self.mutation_log:
+            self.mutation_log.checkpoint(self.tables, self.views)
+
+    def _ship(self, op, **payload):
+        if self.mutation_log:
+            self.mutation_log.append(op, **payload)
+
+    # =========================
+    # Parallel execution
+    # =========================
+    def enable_parallel(self, workers=None, threshold=100_000, morsel_size=50_000):
+        """
+        Run large scans and aggregates on a process pool.
+        Inputs smaller than `threshold` rows still run in-process.
+        """
+        self.disable_parallel()
+        self.executor = ParallelExecutor(workers, threshold, morsel_size)
+        for table in self.tables.values():
+            table.executor = self.executor
+
+    def disable_parallel(self):
+        if self.executor:
+            self.executor.close()
+        self.executor = None
+        for table in self.tables.values():
+            table.executor = None
+
+    # =========================
+    # Result cache
+    # =========================
+    def enable_result_cache(self, max_entries=256, max_rows=100_000):
+        """
+        Cache select_all, aggregate and inner_join results. An entry is
+        reused until one of the tables it read is mutated.
+        """
+        self.result_cache = ResultCache(max_entries, max_rows)
+
+    def disable_result_cache(self):
+        self.result_cache = None
+
+    def cache_stats(self):
+        return self.result_cache.stats() if self.result_cache else None
+
+    def _cached(self, query, tables, compute):
+        if self.result_cache is None:
+            return compute()
+
+        key = repr(query)
+        result = self.result_cache.get(key, tables)
+        if result is MISS:
+            result = compute()
+            self.result_cache.put(key, tables, result)
+        # Callers may modify the returned list; the cached one stays intact
+        return list(result) if isinstance(result, list) else result
+
+    # =========================
+    # Instrumentation
+    # =========================
+    def stats(self):
+        """Latency histograms, per-table scans, slow queries, cache and buffer pool."""
+        report = self.query_stats.snapshot()
+        report["result_cache"] = self.cache_stats()
+        report["buffer_pool"] = self.buffer_pool.stats()
+        report["memory"] = self.memory_usage()
+        report["timers"] = {name: t.stats() for name, t in self.scheduler.timers.items()}
+        return report
+
+    def reset_stats(self):
+        self.query_stats.reset()
+
+    def enable_slow_query_log(self, path, threshold_ms=None):
+        """Also append slow queries to `path` as JSON lines."""
+        self.query_stats.slow_log = path
+        if threshold_ms is not None:
+            self.query_stats.slow_ms = threshold_ms
+
+    @contextlib.contextmanager
+    def _measure(self, op, table_name, detail=None):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.query_stats.record(op, table_name, time.perf_counter() - started, detail)
+
+    # =========================
+    # Memory
+    # =========================
+    def memory_usage(self):
+        """
+        Estimated bytes per table, view and cache (see engine.memory).
+        Buffer pool pages are counted under their paged tables.
+        """
+        tables = {name: table.memory() for name, table in self.tables.items()}
+        views = {name: view.table.memory() for name, view in self.views.items()}
+        caches = {
+            "result_cache": self.result_cache.memory() if self.result_cache else 0,
+            "buffer_pool": self.buffer_pool.memory()
+        }
+        return {
+            "tables": tables,
+            "views": views,
+            "caches": caches,
+            "total": (
+                sum(u["total"] for u in tables.values())
+                + sum(u["total"] for u in views.values())
+                + caches["result_cache"]
+            ),
+            "budget": self.memory_budget,
+            "warnings": list(self._memory_warnings.values())
+        }
+
+    def set_memory_budget(self, total_mb=None, tables=None):
+        """
+        Warn when the estimated total passes total_mb, or a table passes
+        its entry in tables ({name: mb}). Checked on writes, at most every
+        MEMORY_CHECK_SECONDS, and by check_memory().
+        """
+        self.memory_budget = {"total_mb": total_mb, "tables": dict(tables or {})}
+        self._memory_warnings = {}
+        return self.check_memory()
+
+    def check_memory(self):
+        """Compare usage with the budget; newly exceeded budgets are printed."""
+        self._memory_checked = time.monotonic()
+        budget = self.memory_budget
+        if not budget["total_mb"] and not budget["tables"]:
+            return []
+
+        usage = self.memory_usage()
+        warnings = {}  # table name (None for the total) -> message
+        limit = budget["total_mb"]
+        if limit and usage["total"] > limit * 1024 * 1024:
+            warnings[None] = (
+                f"Estimated memory {format_bytes(usage['total'])} exceeds the budget of {limit} MB"
+            )
+        for name, limit in budget["tables"].items():
+            table_usage = usage["tables"].get(name) or usage["views"].get(name)
+            if table_usage and table_usage["total"] > limit * 1024 * 1024:
+                warnings[name] = (
+                    f"Table '{name}' uses {format_bytes(table_usage['total'])}, "
+                    f"over its budget of {limit} MB"
+                )
+
+        # Warn once per budget until it is back under
+        for scope, message in warnings.items():
+            if scope not in self._memory_warnings:
+                print(f"[Database] ⚠️ {message}")
+        self._memory_warnings = warnings
+        return list(warnings.values())
+
+    # =========================
+    # Timers
+    # =========================
+    def create_timer(self, name, table_name, column, where, action):
+        """
+        Call action(rows) with the rows of table_name matching where once
+        the due time in `column` has passed (see engine.scheduler). Each
+        row fires once per due time; action should change it through
+        update() so it stops matching. Timers live in memory only:
+        create them at startup, then call run_timers() or start_timers().
+        """
+        if name in self.scheduler.timers:
+            raise ValueError(f"Timer '{name}' already exists")
+        table = self._get_writable(table_name)
+        timer = self.scheduler.timers[name] = Timer(name, table, column, where, action)
+        print(f"[DB] Timer '{name}' on {table_name}.{column} ({len(timer.due)} rows pending)")
+        return timer
+
+    def run_timers(self, moment=None):
+        """Fire the rows that are due now (or at epoch seconds moment)."""
+        with self.scheduler.lock, self._measure("timers", None), self.deferred_saves():
+            return self.scheduler.run(moment)
+
+    def start_timers(self, interval=60):
+        """Run timers from a background thread; see Scheduler.start()."""
+        self.scheduler.start(interval, self.run_timers)
+
+    def stop_timers(self):
+        self.scheduler.stop()
+
+    # =========================
+    # Aggregates
+    # =========================
+    def aggregate(self, table_name, func, column=None, filters=None):
+        """
+        COUNT / SUM / MIN / MAX / AVG over a column (COUNT(*) when column is None).
+        """
+        func = func.upper()
+        if func not in ("COUNT", "SUM", "MIN", "MAX", "AVG"):
+            raise ValueError(f"Unsupported aggregate: {func}")
+        if column is None and func != "COUNT":
+            raise ValueError(f"{func} requires a column")
+
+        table = self._get_table(table_name)
+        if column is not None and column not in table.schema:
+            raise ValueError(f"Column '{column}' does not exist in table '{table_name}'")
+        if func in ("SUM", "AVG") and table.schema[column] not in ("INT", "FLOAT"):
+            raise ValueError(f"{func}({column}) needs an INT or FLOAT column, not {table.schema[column]}")
+        with self._measure("aggregate", table_name, [func, column, filters]):
+            return self._cached(
+                ("aggregate", table_name, func, column, normalize(filters)),
+                [table],
+                lambda: self._aggregate(table, func, column, filters)
+            )
+
+    def _aggregate(self, table, func, column, filters):
+        summed = func in ("SUM", "AVG")  # MIN / MAX may order TEXT, which cannot be summed
+
+        merged = None
+        scan = table.scan_ranges(filters) if self.executor and isinstance(table, Table) else None
+        if scan is not None:
+            conditions, ranges = scan
+            scanned = sum(end - start for start, end in ranges)
+            if scanned >= self.executor.threshold:
+                merged = self.executor.aggregate(table, column, summed, conditions, ranges)
+            if merged is not None and table.stats:
+                table.stats.scan(table.name, False, scanned, merged[0])
+
+        if merged is not None:
+            count, total, low, high = merged
+        else:
+            rows = table.select_all(filters)
+            values = rows if column is None else [
+                r[column] for r in rows if r.get(column) is not None
+            ]
+            count = len(values)
+            if column is None:
+                total, low, high = 0, None, None
+            else:
+                total = sum(values) if summed else 0
+                low = min(values, default=None)
+                high = max(values, default=None)
+
+        if func == "COUNT":
+            return count
+        if func == "SUM":
+            return total
+        if func == "MIN":
+            return low
+        if func == "MAX":
+            return high
+        return total / count if count else None
+
     # =========================
     # Joins
     # =========================
     def inner_join(self, left_table, right_table, left_key, right_key):
         left = self._get_table(left_table)
         right = self._get_table(right_table)
+
+        # Accept qualified keys such as "table.col"
+        left_key = left_key.split(".")[-1]
+        right_key = right_key.split(".")[-1]
+
+        with self._measure("join", f"{left_table},{right_table}", [left_key, right_key]):
+            return self._cached(
+                ("join", left_table, right_table, left_key, right_key),
+                [left, right],
+                lambda: self._inner_join(left, right, left_key, right_key)
+            )
+
+    def _inner_join(self, left, right, left_key, right_key):
+        left_rows = all_rows(left)
+        right_rows = all_rows(right)
+
+        # Hash join: build on the right table, probe with the left
+        buckets = build_buckets(right_rows, right_key)
         result = []
-        for l in left.rows:
-            for r in right.rows:
-                if l[left_key] == r[right_key]:
-                    result.append({**l, **r})
+        for l in left_rows:
+            for j in buckets.get(l.get(left_key), ()):
+                result.append({**l, **right_rows[j]})
         return result
 
     # =========================
     # Helpers
     # =========================
+    def get_table(self, table_name):
+        """Table or materialized view by name."""
+        return self._get_table(table_name)
+
     def _get_table(self, table_name):
+        if table_name in self.views:
+            return self.views[table_name].table
         if table_name not in self.tables:
             raise ValueError(f"Table '{table_name}' not found")
         return self.tables[table_name]
+
+    def _get_writable(self, table_name):
+        if table_name in self.views:
+            raise ValueError(f"'{table_name}' is a materialized view and is read-only")
+        return self._get_table(table_name)
@@ -0,0 +1,67 @@
+"""
+Dictionary encoding for repetitive TEXT columns.
+
+In memory a column dictionary maps each distinct value to one canonical
+string object that every row shares, so equality checks and hash
+probes usually succeed on identity. On disk the column is written as
+integer codes into a list of its distinct values.
+"""
+
+
+def qualifies(distinct, rows):
+    """Worth encoding when a value repeats at least twice on average."""
+    return rows > 0 and distinct * 2 <= rows
+
+
+def canonicalize(rows, column):
+    """
+    Point every row at one shared object per distinct value.
+    Returns the {value: value} dictionary, or None for unhashable values.
+    """
+    canonical = {}
+    try:
+        for row in rows:
+            value = row.get(column)
+            if value is not None:
+                row[column] = canonical.setdefault(value, value)
+    except TypeError:
+        return None
+    return canonical
+
+
+def encode_rows(rows, dictionaries):
+    """
+    Copy rows with dictionary columns replaced by codes.
+    Returns ({column: [values]}, encoded rows).
+    """
+    if not dictionaries:
+        return {}, rows
+
+    values = {col: list(d) for col, d in dictionaries.items()}
+    codes = {col: {v: i for i, v in enumerate(vals)} for col, vals in values.items()}
+
+    encoded = []
+    for row in rows:
+        row = dict(row)
+        for col, col_codes in codes.items():
+            value = row.get(col)
+            if value is None:
+                continue
+            code = col_codes.get(value)
+            if code is None:
+                # Set on the row directly, bypassing the table
+                code = col_codes[value] = len(values[col])
+                values[col].append(value)
+            row[col] = code
+        encoded.append(row)
+    return values, encoded
+
+
+def decode_rows(rows, dictionaries):
+    """Replace codes with their values in place; returns rows."""
+    for col, values in (dictionaries or {}).items():
+        for row in rows:
+            code = row.get(col)
+            if code is not None:
+                row[col] = values[code]
+    return rows
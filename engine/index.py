@@ -1,10 +1,17 @@
+import bisect
+import sys
+
+
 class Index:
     """
     Hash-based index for equality lookups.
     """
+    kind = "hash"
+
     def __init__(self, column):
         self.column = column
         self.map = {}  # value → [row, row, ...]
+        self.predicate = None  # [(column, value)] for partial indexes
 
     def add(self, value, row):
         if value not in self.map:
@@ -24,6 +31,16 @@ class Index:
     def lookup(self, value):
         return self.map.get(value, []).copy()
 
+    def peek(self, value):
+        """Matching rows without copying; callers must not modify the list."""
+        return self.map.get(value, [])
+
+    def all_rows(self):
+        result = []
+        for rows in self.map.values():
+            result.extend(rows)
+        return result
+
     def rebuild(self, rows):
         """Rebuild index from scratch"""
         self.map.clear()
@@ -31,6 +48,20 @@ class Index:
             val = row.get(self.column)
             self.add(val, row)
 
+    def dump(self, positions):
+        """
+        Serialize as [value, [row positions]] pairs.
+        positions maps id(row) -> position of the row in the table.
+        """
+        return [
+            [value, [positions[id(row)] for row in rows]]
+            for value, rows in self.map.items()
+        ]
+
+    def load(self, entries, rows):
+        """Restore from dump() output without re-reading column values."""
+        self.map = {value: [rows[p] for p in pos] for value, pos in entries}
+
     def clear(self):
         self.map.clear()
 
@@ -39,4 +70,408 @@ class Index:
             "column": self.column,
             "distinct_values": len(self.map),
             "total_rows_indexed": sum(len(rows) for rows in self.map.values())
-        }
\ No newline at end of file
+        }
+
+
+CHUNK_BITS = 4096
+
+
+class Bitmap:
+    """
+    Compressed bitset over row ids.
+
+    Ids are grouped into fixed-size chunks, each stored as a Python int;
+    empty chunks are not stored at all. AND / OR / difference work chunk by
+    chunk on machine words.
+    """
+    __slots__ = ("chunks",)
+
+    def __init__(self, chunks=None):
+        self.chunks = chunks or {}  # chunk number -> int bitset
+
+    def add(self, rid):
+        key, bit = divmod(rid, CHUNK_BITS)
+        self.chunks[key] = self.chunks.get(key, 0) | (1 << bit)
+
+    def discard(self, rid):
+        key, bit = divmod(rid, CHUNK_BITS)
+        word = self.chunks.get(key, 0) & ~(1 << bit)
+        if word:
+            self.chunks[key] = word
+        else:
+            self.chunks.pop(key, None)
+
+    def __and__(self, other):
+        small, large = sorted((self.chunks, other.chunks), key=len)
+        result = {}
+        for key, word in small.items():
+            word &= large.get(key, 0)
+            if word:
+                result[key] = word
+        return Bitmap(result)
+
+    def __or__(self, other):
+        result = dict(self.chunks)
+        for key, word in other.chunks.items():
+            result[key] = result.get(key, 0) | word
+        return Bitmap(result)
+
+    def __sub__(self, other):
+        result = {}
+        for key, word in self.chunks.items():
+            word &= ~other.chunks.get(key, 0)
+            if word:
+                result[key] = word
+        return Bitmap(result)
+
+    def __iter__(self):
+        for key in sorted(self.chunks):
+            word = self.chunks[key]
+            base = key * CHUNK_BITS
+            while word:
+                low = word & -word
+                yield base + low.bit_length() - 1
+                word ^= low
+
+    def __len__(self):
+        return sum(bin(word).count("1") for word in self.chunks.values())
+
+    def __bool__(self):
+        return bool(self.chunks)
+
+
+class RowIds:
+    """
+    Stable integer ids for the rows of one table.
+
+    Shared by every bitmap index of the table so their bitsets can be
+    combined. Ids of deleted rows are not reused until the next reset().
+    """
+    def __init__(self):
+        self.slots = []  # row id -> row (None once deleted)
+        self.ids = {}  # id(row) -> row id
+        self.live = Bitmap()
+
+    def reset(self, rows):
+        self.slots = list(rows)
+        self.ids = {id(row): rid for rid, row in enumerate(self.slots)}
+        full, rest = divmod(len(self.slots), CHUNK_BITS)
+        chunks = {key: (1 << CHUNK_BITS) - 1 for key in range(full)}
+        if rest:
+            chunks[full] = (1 << rest) - 1
+        self.live = Bitmap(chunks)
+
+    def assign(self, row):
+        rid = len(self.slots)
+        self.slots.append(row)
+        self.ids[id(row)] = rid
+        self.live.add(rid)
+        return rid
+
+    def release(self, row):
+        rid = self.ids.pop(id(row), None)
+        if rid is not None:
+            self.slots[rid] = None
+            self.live.discard(rid)
+
+    def get(self, row):
+        return self.ids.get(id(row))
+
+    def rows(self, bitmap):
+        slots = self.slots
+        return [slots[rid] for rid in bitmap]
+
+
+class BitmapIndex:
+    """
+    Bitmap index for low-cardinality columns: one compressed bitset of
+    row ids per distinct value.
+    """
+    kind = "bitmap"
+
+    def __init__(self, column, row_ids):
+        self.column = column
+        self.row_ids = row_ids
+        self.map = {}  # value → Bitmap
+        self.predicate = None  # [(column, value)] for partial indexes
+
+    def add(self, value, row):
+        if value not in self.map:
+            self.map[value] = Bitmap()
+        self.map[value].add(self.row_ids.get(row))
+
+    def remove(self, value, row):
+        bitmap = self.map.get(value)
+        rid = self.row_ids.get(row)
+        if bitmap is None or rid is None:
+            return
+        bitmap.discard(rid)
+        if not bitmap:
+            del self.map[value]
+
+    def bitmap(self, value):
+        return self.map.get(value, Bitmap())
+
+    def bitmap_in(self, values):
+        bits = Bitmap()
+        for value in values:
+            bits = bits | self.bitmap(value)
+        return bits
+
+    def bitmap_not(self, value):
+        return self.row_ids.live - self.bitmap(value)
+
+    def lookup(self, value):
+        return self.row_ids.rows(self.bitmap(value))
+
+    peek = lookup
+
+    def all_rows(self):
+        bits = Bitmap()
+        for bitmap in self.map.values():
+            bits = bits | bitmap
+        return self.row_ids.rows(bits)
+
+    def rebuild(self, rows):
+        self.map.clear()
+        for row in rows:
+            self.add(row.get(self.column), row)
+
+    def dump(self, positions):
+        return [
+            [value, [positions[id(row)] for row in self.row_ids.rows(bitmap)]]
+            for value, bitmap in self.map.items()
+        ]
+
+    def load(self, entries, rows):
+        self.map = {}
+        for value, pos in entries:
+            bitmap = Bitmap()
+            for p in pos:
+                bitmap.add(self.row_ids.get(rows[p]))
+            self.map[value] = bitmap
+
+    def clear(self):
+        self.map.clear()
+
+    def stats(self):
+        return {
+            "column": self.column,
+            "kind": self.kind,
+            "distinct_values": len(self.map),
+            "total_rows_indexed": sum(len(b) for b in self.map.values()),
+            "chunks": sum(len(b.chunks) for b in self.map.values())
+        }
+
+
+class SortedIndex:
+    """
+    Ordered index over (value, row id) pairs.
+
+    Besides equality it answers prefix queries (LIKE 'abc%') with two
+    binary searches, in O(log n + matches). Strings sort after numbers;
+    other values (None included) are not indexed.
+    """
+    kind = "sorted"
+
+    def __init__(self, column, row_ids):
+        self.column = column
+        self.row_ids = row_ids
+        self.entries = []  # sorted (rank, value, row id)
+        self.predicate = None  # [(column, value)] for partial indexes
+
+    @staticmethod
+    def _key(value):
+        if isinstance(value, str):
+            return (1, value)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return (0, value)
+        return None
+
+    def add(self, value, row):
+        key = self._key(value)
+        if key is not None:
+            bisect.insort(self.entries, key + (self.row_ids.get(row),))
+
+    def remove(self, value, row):
+        key = self._key(value)
+        rid = self.row_ids.get(row)
+        if key is None or rid is None:
+            return
+        entry = key + (rid,)
+        i = bisect.bisect_left(self.entries, entry)
+        if i < len(self.entries) and self.entries[i] == entry:
+            del self.entries[i]
+
+    def _between(self, low, high):
+        i = bisect.bisect_left(self.entries, low)
+        j = bisect.bisect_left(self.entries, high, i)
+        slots = self.row_ids.slots
+        return [slots[entry[2]] for entry in self.entries[i:j]]
+
+    def lookup(self, value):
+        key = self._key(value)
+        if key is None:
+            return []
+        return self._between(key + (-1,), key + (float("inf"),))
+
+    peek = lookup
+
+    def lookup_prefix(self, prefix):
+        if not prefix:
+            return self._between((1,), (2,))
+        last = ord(prefix[-1])
+        if last == sys.maxunicode:
+            return [r for r in self._between((1, prefix), (2,)) if r[self.column].startswith(prefix)]
+        return self._between((1, prefix), (1, prefix[:-1] + chr(last + 1)))
+
+    def lookup_range(self, low=None, high=None):
+        """
+        Rows between two (value, inclusive) bounds; None means unbounded.
+        Returns None if the bounds are not values the index orders.
+        """
+        keys = [None if b is None else self._key(b[0]) for b in (low, high)]
+        if any(b is not None and k is None for b, k in zip((low, high), keys)):
+            return None
+        ranks = {k[0] for k in keys if k is not None}
+        if len(ranks) != 1:
+            return None
+        rank = ranks.pop()
+
+        if low is None:
+            start = (rank,)
+        else:
+            start = keys[0] + ((-1,) if low[1] else (float("inf"),))
+        if high is None:
+            stop = (rank + 1,)
+        else:
+            stop = keys[1] + ((float("inf"),) if high[1] else (-1,))
+        return self._between(start, stop)
+
+    def all_rows(self):
+        slots = self.row_ids.slots
+        return [slots[entry[2]] for entry in self.entries]
+
+    def rebuild(self, rows):
+        entries = []
+        for row in rows:
+            key = self._key(row.get(self.column))
+            if key is not None:
+                entries.append(key + (self.row_ids.get(row),))
+        entries.sort()
+        self.entries = entries
+
+    def dump(self, positions):
+        grouped = {}
+        slots = self.row_ids.slots
+        for _, value, rid in self.entries:
+            grouped.setdefault(value, []).append(positions[id(slots[rid])])
+        return [[value, pos] for value, pos in grouped.items()]
+
+    def load(self, entries, rows):
+        self.rebuild([rows[p] for _, pos in entries for p in pos])
+
+    def clear(self):
+        self.entries = []
+
+    def stats(self):
+        return {
+            "column": self.column,
+            "kind": self.kind,
+            "distinct_values": len({entry[1] for entry in self.entries}),
+            "total_rows_indexed": len(self.entries)
+        }
+
+
+class NgramIndex:
+    """
+    Trigram index for substring search (LIKE '%abc%').
+
+    Each trigram maps to a bitmap of the rows containing it; a query ANDs
+    the bitmaps of its trigrams. Results are candidates that still need
+    the LIKE check, since trigrams can match out of order.
+    """
+    kind = "ngram"
+    N = 3
+
+    def __init__(self, column, row_ids):
+        self.column = column
+        self.row_ids = row_ids
+        self.grams = {}  # trigram -> Bitmap
+        self.values = {}  # row id -> indexed text
+        self.predicate = None  # [(column, value)] for partial indexes
+
+    def _grams(self, text):
+        return {text[i:i + self.N] for i in range(len(text) - self.N + 1)}
+
+    def add(self, value, row):
+        if not isinstance(value, str):
+            return
+        rid = self.row_ids.get(row)
+        self.values[rid] = value
+        for gram in self._grams(value):
+            if gram not in self.grams:
+                self.grams[gram] = Bitmap()
+            self.grams[gram].add(rid)
+
+    def remove(self, value, row):
+        rid = self.row_ids.get(row)
+        text = self.values.pop(rid, None)
+        if text is None:
+            return
+        for gram in self._grams(text):
+            bitmap = self.grams.get(gram)
+            if bitmap is not None:
+                bitmap.discard(rid)
+                if not bitmap:
+                    del self.grams[gram]
+
+    def lookup_substring(self, fragment):
+        """Rows that may contain fragment (all indexed rows if it is short)."""
+        if len(fragment) < self.N:
+            return self.all_rows()
+        bits = None
+        for gram in self._grams(fragment):
+            bitmap = self.grams.get(gram)
+            if bitmap is None:
+                return []
+            bits = bitmap if bits is None else bits & bitmap
+        return self.row_ids.rows(bits)
+
+    def lookup(self, value):
+        if not isinstance(value, str):
+            return []
+        return [r for r in self.lookup_substring(value) if r[self.column] == value]
+
+    peek = lookup
+
+    def all_rows(self):
+        slots = self.row_ids.slots
+        return [slots[rid] for rid in sorted(self.values)]
+
+    def rebuild(self, rows):
+        self.clear()
+        for row in rows:
+            self.add(row.get(self.column), row)
+
+    def dump(self, positions):
+        grouped = {}
+        slots = self.row_ids.slots
+        for rid, value in self.values.items():
+            grouped.setdefault(value, []).append(positions[id(slots[rid])])
+        return [[value, pos] for value, pos in grouped.items()]
+
+    def load(self, entries, rows):
+        self.rebuild([rows[p] for _, pos in entries for p in pos])
+
+    def clear(self):
+        self.grams = {}
+        self.values = {}
+
+    def stats(self):
+        return {
+            "column": self.column,
+            "kind": self.kind,
+            "trigrams": len(self.grams),
+            "total_rows_indexed": len(self.values)
+        }
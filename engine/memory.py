@@ -0,0 +1,122 @@
+"""
+Memory estimates
+----------------
+Sizes come from sys.getsizeof on an evenly spaced sample of at most
+SAMPLE items per structure, scaled to its length, so accounting a
+table costs the same at a thousand rows as at ten million. Objects
+shared with the rows (index keys, dictionary-encoded strings) are
+counted once, where they are stored. Tables cache their estimate
+until their version changes.
+"""
+import sys
+
+SAMPLE = 256
+POINTER = 8
+
+
+def _sample(items):
+    step = max(1, len(items) // SAMPLE)
+    return items[::step][:SAMPLE]
+
+
+def _scaled(items, size):
+    """Estimated total of size(item) over a list."""
+    if not items:
+        return 0
+    sample = _sample(items)
+    return int(sum(size(item) for item in sample) / len(sample) * len(items))
+
+
+# ---------------- ROWS ----------------
+def row_size(row, shared=()):
+    """A row dict, its slot in the row list and values it owns."""
+    size = sys.getsizeof(row) + POINTER
+    for col, value in row.items():
+        if value is not None and col not in shared:
+            size += sys.getsizeof(value)
+    return size
+
+
+def rows_size(rows, shared=()):
+    return sys.getsizeof(rows) + _scaled(rows, lambda r: row_size(r, shared) - POINTER)
+
+
+def dictionary_size(dictionary):
+    return sys.getsizeof(dictionary) + sum(sys.getsizeof(v) for v in dictionary)
+
+
+# ---------------- INDEXES ----------------
+def bitmap_size(bitmap):
+    return sys.getsizeof(bitmap.chunks) + sum(sys.getsizeof(w) for w in bitmap.chunks.values())
+
+
+def index_size(idx):
+    """Any index kind, including PageIndex; keys are shared with the rows."""
+    kind = getattr(idx, "kind", "hash")
+
+    if kind == "sorted":
+        # one (rank, value, row id) tuple per entry
+        return sys.getsizeof(idx.entries) + len(idx.entries) * sys.getsizeof((0, 0, 0))
+
+    if kind == "ngram":
+        grams = list(idx.grams.values())
+        return (
+            sys.getsizeof(idx.grams) + _scaled(grams, bitmap_size)
+            + sys.getsizeof(idx.values)
+        )
+
+    buckets = getattr(idx, "map", None)
+    if buckets is None:
+        buckets = idx.pages  # PageIndex: value -> {page: rows}
+    values = list(buckets.values())
+    if kind == "bitmap":
+        return sys.getsizeof(buckets) + _scaled(values, bitmap_size)
+    return sys.getsizeof(buckets) + _scaled(values, sys.getsizeof)
+
+
+def row_ids_size(row_ids):
+    if row_ids is None:
+        return 0
+    return sys.getsizeof(row_ids.slots) + sys.getsizeof(row_ids.ids) + bitmap_size(row_ids.live)
+
+
+# ---------------- TABLES ----------------
+def table_usage(table):
+    """Estimated bytes per structure of one Table."""
+    usage = {
+        "rows": rows_size(table._rows, set(table.dictionaries)),
+        "indexes": {name: index_size(idx) for name, idx in table._named_indexes().items()},
+        "row_ids": row_ids_size(table.row_ids),
+        "dictionaries": sum(dictionary_size(d) for d in table.dictionaries.values()),
+        "bloom_filters": sum(sys.getsizeof(b.bits) for b in table.blooms.values())
+    }
+    return total(usage)
+
+
+def merge(usages):
+    """Sum the usage of several tables (e.g. partitions) by structure."""
+    merged = {"rows": 0, "indexes": {}, "row_ids": 0, "dictionaries": 0, "bloom_filters": 0}
+    for usage in usages:
+        for key, value in usage.items():
+            if key == "indexes":
+                for name, size in value.items():
+                    merged["indexes"][name] = merged["indexes"].get(name, 0) + size
+            elif key in merged:
+                merged[key] += value
+    return total(merged)
+
+
+def total(usage):
+    usage["total"] = sum(
+        sum(v.values()) if isinstance(v, dict) else v
+        for k, v in usage.items() if k != "total"
+    )
+    return usage
+
+
+def format_bytes(size):
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
@@ -0,0 +1,478 @@
+import datetime
+import json
+import os
+import time
+import sys
+from engine.bufferpool import BufferPool
+from engine.memory import index_size, total
+from engine.predicate import bind, compile_predicate, normalize
+from engine.table import Table
+
+PAGE_ROWS = 1024
+
+
+def _write_json(path, data):
+    with open(path + ".tmp", "w") as f:
+        json.dump(data, f)
+    os.replace(path + ".tmp", path)
+
+
+class PageIndex:
+    """
+    Hash index from a column value to the pages holding it. Each page
+    counts its rows with the value, so a page is dropped from the value
+    once its last such row is updated or deleted.
+    """
+    kind = "hash"
+
+    def __init__(self, column):
+        self.column = column
+        self.pages = {}  # value -> {page number: rows holding the value}
+
+    def add(self, value, page):
+        counts = self.pages.setdefault(value, {})
+        counts[page] = counts.get(page, 0) + 1
+
+    def remove(self, value, page):
+        counts = self.pages.get(value)
+        if not counts or page not in counts:
+            return
+        counts[page] -= 1
+        if not counts[page]:
+            del counts[page]
+            if not counts:
+                del self.pages[value]
+
+    def lookup(self, value):
+        return set(self.pages.get(value, ()))
+
+
+class PagedTable:
+    """
+    A table whose rows live on disk in pages of `page_rows` rows.
+
+    Pages are read through a shared BufferPool, so only recently used
+    pages stay in memory; a query reads just the pages it needs. Primary
+    and unique keys map each value to its page and hash indexes map
+    values to pages, so lookups on them pin one or a few pages instead of
+    scanning. New rows are appended to the last page.
+
+    Rows returned by select_all belong to the buffer pool; change them
+    with update(), not in place.
+
+    The key maps and page indexes are kept in memory and rebuilt on load
+    from a small summary file per page (the page's key and indexed
+    column values), written whenever the page itself is. A save writes
+    only the changed pages and a directory of constant size.
+    """
+    def __init__(self, name, columns, primary_key=None, unique_keys=None,
+                 directory=None, pool=None, page_rows=PAGE_ROWS):
+        # Only used for casting and formatting values, never holds rows
+        self._shape = Table(name, columns, primary_key, unique_keys)
+
+        self.name = name
+        self.schema = self._shape.schema
+        self.columns = self._shape.columns
+        self.primary_key = primary_key
+        self.unique_keys = unique_keys or []
+        self.directory = directory
+        self.pool = pool or BufferPool()
+        self.page_rows = max(int(page_rows), 1)
+
+        self.pages = []  # row count per page
+        self.keys = {col: {} for col in [primary_key] + self.unique_keys if col}
+        self.indexes = {}  # column -> PageIndex
+        self.partial_indexes = {}
+        self.blooms = {}
+        self.dictionaries = {}
+        self.executor = None
+        self.stats = None  # optional QueryStats
+        self.observers = []
+        self.version = 0
+        self._saved_version = None
+
+        os.makedirs(directory, exist_ok=True)
+
+    # ---------------- PAGES ----------------
+    def _page_file(self, page):
+        return os.path.join(self.directory, f"page-{page}.json")
+
+    def _summary_file(self, page):
+        return os.path.join(self.directory, f"page-{page}.keys.json")
+
+    def read_page(self, page):
+        path = self._page_file(page)
+        if not os.path.exists(path):
+            return []
+        with open(path, "r") as f:
+            return self._shape._apply_schema(json.load(f))
+
+    def write_page(self, page, rows):
+        _write_json(self._page_file(page), rows)
+        self._write_summary(page, rows)
+
+    def _summary_columns(self):
+        return list(self.keys) + [col for col in self.indexes if col not in self.keys]
+
+    def _write_summary(self, page, rows):
+        """Row count and key / indexed column values of one page."""
+        columns = self._summary_columns()
+        _write_json(self._summary_file(page), {
+            "rows": len(rows),
+            "columns": {col: [row.get(col) for row in rows] for col in columns}
+        })
+
+    def _read_summary(self, page):
+        path = self._summary_file(page)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r") as f:
+            return json.load(f)
+
+    def drop_pages(self):
+        """Delete every page file, including ones left by an earlier table."""
+        self.pool.discard(self)
+        for name in os.listdir(self.directory):
+            if name.startswith("page-"):
+                os.remove(os.path.join(self.directory, name))
+
+    def page_spec(self):
+        return {"page_rows": self.page_rows}
+
+    @property
+    def loaded(self):
+        return True
+
+    # ---------------- INTERNAL ----------------
+    def _cast(self, column, value):
+        return self._shape._cast(column, value)
+
+    def coerce_rows(self, rows):
+        return self._shape.coerce_rows(rows)
+
+    def format_row(self, row):
+        return self._shape.format_row(row)
+
+    def add_observer(self, observer):
+        self.observers.append(observer)
+
+    def _index_add(self, row, page):
+        for col, values in self.keys.items():
+            values[row.get(col)] = page
+        for col, idx in self.indexes.items():
+            idx.add(row.get(col), page)
+
+    def _index_remove(self, row, page):
+        for col, values in self.keys.items():
+            if values.get(row.get(col)) == page:
+                del values[row.get(col)]
+        for col, idx in self.indexes.items():
+            idx.remove(row.get(col), page)
+
+    def _candidate_pages(self, conditions):
+        """Pages that can hold rows matching the top-level conditions."""
+        for cond in conditions:
+            if not isinstance(cond, tuple):
+                continue
+            col, op, want = cond
+            if op not in ("=", "IN") or (col not in self.keys and col not in self.indexes):
+                continue
+            pages = set()
+            for value in (want if op == "IN" else [want]):
+                if col in self.keys:
+                    if value in self.keys[col]:
+                        pages.add(self.keys[col][value])
+                else:
+                    pages |= self.indexes[col].lookup(value)
+            return sorted(pages)
+        return range(len(self.pages))
+
+    def _pages_matching(self, filters):
+        conditions = bind(normalize(filters), self._cast)
+        return self._candidate_pages(conditions), compile_predicate(conditions)
+
+    # ---------------- STORAGE ----------------
+    @property
+    def rows(self):
+        """Every row; reads the whole table through the pool."""
+        result = []
+        for page in range(len(self.pages)):
+            result.extend(self.pool.pin(self, page))
+            self.pool.unpin(self, page)
+        return result
+
+    @rows.setter
+    def rows(self, rows):
+        self.drop_pages()
+        self.pages = []
+        for col in self.keys:
+            self.keys[col] = {}
+        for idx in self.indexes.values():
+            idx.pages = {}
+
+        for start in range(0, len(rows), self.page_rows):
+            chunk = rows[start:start + self.page_rows]
+            page = len(self.pages)
+            self.write_page(page, chunk)
+            self.pages.append(len(chunk))
+            for row in chunk:
+                self._index_add(row, page)
+
+        self.version += 1
+        for observer in self.observers:
+            observer.rows_replaced()
+
+    def iter_rows(self):
+        """Every row, one page in memory at a time."""
+        for page in range(len(self.pages)):
+            rows = list(self.pool.pin(self, page))
+            self.pool.unpin(self, page)
+            yield from rows
+
+    def save(self):
+        """Write changed pages (with their summaries) and the page directory."""
+        self.pool.flush(self)
+        if self._saved_version == self.version:
+            return
+
+        _write_json(os.path.join(self.directory, "directory.json"), {
+            "page_rows": self.page_rows,
+            "page_count": len(self.pages),
+            "indexes": list(self.indexes),
+            "version": self.version
+        })
+        self._saved_version = self.version
+
+    def load(self):
+        """
+        Read the page directory and every page summary; pages themselves
+        are read on demand. A page without a summary (or a directory
+        written before summaries existed) is read once to write one.
+        """
+        path = os.path.join(self.directory, "directory.json")
+        if not os.path.exists(path):
+            return
+
+        with open(path, "r") as f:
+            directory = json.load(f)
+        legacy = "page_count" not in directory
+        count = len(directory["pages"]) if legacy else directory["page_count"]
+        for col in directory["indexes"]:
+            self.indexes[col] = PageIndex(col)
+
+        self.pages = []
+        for page in range(count):
+            summary = None if legacy else self._read_summary(page)
+            if summary is None or any(col not in summary["columns"] for col in self._summary_columns()):
+                rows = self.read_page(page)
+                self._write_summary(page, rows)
+                summary = self._read_summary(page)
+            self.pages.append(summary["rows"])
+            for col, values in summary["columns"].items():
+                if col in self.keys:
+                    for value in values:
+                        self.keys[col][value] = page
+                if col in self.indexes:
+                    for value in values:
+                        self.indexes[col].add(value, page)
+
+        self.version = directory["version"]
+        self._saved_version = None if legacy else self.version
+
+    # ---------------- INSERT ----------------
+    def insert(self, row):
+        return self.insert_many([row])[0]
+
+    def key_values(self):
+        return self.keys
+
+    def insert_many(self, rows, keys=None):
+        """
+        Insert a batch, checked as a whole against the in-memory key maps
+        (keys is ignored), filling the last page and appending new ones.
+        """
+        prepared = [self._shape._prepare(row) for row in rows]
+        self._shape._check_keys(prepared, self.keys)
+
+        start = 0
+        while start < len(prepared):
+            if not self.pages or self.pages[-1] >= self.page_rows:
+                self.pages.append(0)
+            page = len(self.pages) - 1
+            chunk = prepared[start:start + self.page_rows - self.pages[page]]
+
+            self.pool.pin(self, page).extend(chunk)
+            self.pool.unpin(self, page, dirty=True)
+            self.pages[page] += len(chunk)
+            for row in chunk:
+                self._index_add(row, page)
+            start += len(chunk)
+
+        if prepared:
+            self.version += 1
+        for observer in self.observers:
+            for row in prepared:
+                observer.row_inserted(row)
+        return prepared
+
+    # ---------------- SELECT ----------------
+    def select_all(self, filters=None):
+        started = time.perf_counter()
+        pages, match = self._pages_matching(filters)
+        planned = time.perf_counter()
+
+        result = []
+        for page in pages:
+            rows = self.pool.pin(self, page)
+            try:
+                result.extend(r for r in rows if match(r))
+            finally:
+                self.pool.unpin(self, page)
+
+        if self.stats:
+            self.stats.scan(
+                self.name, not isinstance(pages, range), sum(self.pages[p] for p in pages),
+                len(result), planned - started, time.perf_counter() - planned
+            )
+        return result
+
+    # ---------------- UPDATE ----------------
+    def update(self, filters, updates):
+        values = {col: self._cast(col, val) for col, val in updates.items() if col in self.schema}
+        if "updated_at" in self.schema and "updated_at" not in updates:
+            values["updated_at"] = self._cast("updated_at", datetime.datetime.now().isoformat())
+
+        pages, match = self._pages_matching(filters)
+        count = 0
+        for page in pages:
+            rows = self.pool.pin(self, page)
+            changed = 0
+            try:
+                for row in rows:
+                    if not match(row):
+                        continue
+                    old = dict(row) if self.observers else None
+                    self._index_remove(row, page)
+                    row.update(values)
+                    self._index_add(row, page)
+                    changed += 1
+                    for observer in self.observers:
+                        observer.row_updated(old, row)
+            finally:
+                self.pool.unpin(self, page, dirty=bool(changed))
+            count += changed
+
+        if count:
+            self.version += 1
+        return count
+
+    # ---------------- DELETE ----------------
+    def delete(self, filters):
+        pages, match = self._pages_matching(filters)
+        count = 0
+        for page in pages:
+            rows = self.pool.pin(self, page)
+            removed = []
+            try:
+                removed = [r for r in rows if match(r)]
+                if removed:
+                    rows[:] = [r for r in rows if not match(r)]
+                    self.pages[page] = len(rows)
+            finally:
+                self.pool.unpin(self, page, dirty=bool(removed))
+
+            for row in removed:
+                self._index_remove(row, page)
+                for observer in self.observers:
+                    observer.row_deleted(row)
+            count += len(removed)
+
+        if count:
+            self.version += 1
+        return count
+
+    # ---------------- ALTER ----------------
+    @property
+    def schema_version(self):
+        return self._shape.schema_version
+
+    @property
+    def defaults(self):
+        return self._shape.defaults
+
+    def _schema_changed(self):
+        """Resident pages follow the new schema now; others as they are read."""
+        for frame in self.pool.frames_of(self):
+            self._shape._apply_schema(frame.rows)
+
+    def add_column(self, column, dtype="TEXT", default=None):
+        self._shape.add_column(column, dtype, default)
+        self._schema_changed()
+
+    def drop_column(self, column):
+        self._shape.drop_column(column)
+        self.indexes.pop(column, None)
+        self._schema_changed()
+
+    def compact(self):
+        """Rewrite every page in the current schema."""
+        for page in range(len(self.pages)):
+            self.pool.pin(self, page)
+            self.pool.unpin(self, page, dirty=True)
+        self.pool.flush(self)
+        self._shape.dropped = set()
+        return sum(self.pages)
+
+    def schema_changes(self):
+        return self._shape.schema_changes()
+
+    def restore_schema_changes(self, spec):
+        self._shape.restore_schema_changes(spec)
+
+    # ---------------- INDEX ----------------
+    def index_kinds(self):
+        return {col: idx.kind for col, idx in self.indexes.items()}
+
+    def partial_index_specs(self):
+        return []
+
+    def create_index(self, column, kind="hash", where=None):
+        if kind != "hash" or where:
+            raise ValueError("Paged tables only support plain hash indexes")
+        if column not in self.schema:
+            raise ValueError(f"Column '{column}' does not exist")
+
+        self.pool.flush(self)  # summaries below must describe the pages on disk
+        idx = PageIndex(column)
+        self.indexes[column] = idx
+        for page in range(len(self.pages)):
+            rows = self.pool.pin(self, page)
+            for row in rows:
+                idx.add(row.get(column), page)
+            self._write_summary(page, rows)  # summaries carry the new column from now on
+            self.pool.unpin(self, page)
+        self.version += 1
+
+    # ---------------- BLOOM FILTERS ----------------
+    def create_bloom_filter(self, column, error_rate=0.01):
+        raise ValueError("Bloom filters are not supported on paged tables")
+
+    def bloom_specs(self):
+        return {}
+
+    def restore_bloom(self, column, data):
+        pass
+
+    # ---------------- MEMORY ----------------
+    def memory(self):
+        """Resident pages count as rows; the page maps are always in memory."""
+        indexes = {col: index_size(idx) for col, idx in self.indexes.items()}
+        for col, values in self.keys.items():
+            indexes[f"key:{col}"] = sys.getsizeof(values)
+        return total({
+            "rows": self.pool.memory(self),
+            "indexes": indexes,
+            "row_ids": 0,
+            "dictionaries": 0,
+            "bloom_filters": 0
+        })
@@ -0,0 +1,322 @@
+import array
+import multiprocessing
+import os
+import pickle
+import threading
+import weakref
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+from engine.predicate import compile_predicate, compile_scan
+
+
+NUMERIC = {"INT": "q", "DATE": "q", "TIMESTAMP": "q", "FLOAT": "d"}
+CODES = "i"  # typecode of dictionary-encoded columns; -1 is NULL
+ATTACHED = 32  # segments a worker keeps mapped
+
+
+# ---------------- COLUMN SEGMENTS ----------------
+# One table column in a shared memory block, as laid out by publish():
+# `length` fixed-width values, then one NULL flag byte per value if
+# `nulls`, then `dictionary` bytes of the pickled dictionary of a
+# dictionary-encoded column. Small enough to send with every morsel.
+Segment = namedtuple("Segment", "name typecode length nulls dictionary")
+
+
+def publish(values, dtype):
+    """
+    Copy one column's values into a new shared memory block.
+    INT / DATE / TIMESTAMP become int64, FLOAT float64 and TEXT int32
+    codes into a dictionary. Returns (Segment, SharedMemory), or None
+    for other columns and values that do not fit (e.g. an INT beyond
+    64 bits).
+    """
+    typecode = NUMERIC.get(dtype)
+    if typecode is None and dtype != "TEXT":
+        return None
+    dictionary = b""
+    nulls = b""
+    try:
+        if typecode:
+            if None in values:
+                nulls = bytes(v is None for v in values)
+                values = [0 if v is None else v for v in values]
+            data = array.array(typecode, values)
+        else:  # TEXT
+            typecode = CODES
+            distinct = {}
+            data = array.array(CODES, [
+                -1 if v is None else distinct.setdefault(v, len(distinct))
+                for v in values
+            ])
+            dictionary = pickle.dumps(list(distinct), pickle.HIGHEST_PROTOCOL)
+    except (TypeError, OverflowError):
+        return None
+
+    data = memoryview(data).cast("B")
+    size = len(data) + len(nulls) + len(dictionary)
+    shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    shm.buf[:len(data)] = data
+    shm.buf[len(data):len(data) + len(nulls)] = nulls
+    shm.buf[size - len(dictionary):size] = dictionary
+    return Segment(shm.name, typecode, len(values), bool(nulls), len(dictionary)), shm
+
+
+# ---------------- WORKERS ----------------
+# Workers get segment descriptors and row ranges, never row values: each
+# attaches to a segment once and keeps it mapped, so a query costs only
+# the positions (an int64 array) or partial results it sends back.
+# Positions are absolute row positions in the published table.
+_attached = OrderedDict()  # segment name -> (SharedMemory, dictionary)
+
+
+def _attach(segment):
+    entry = _attached.get(segment.name)
+    if entry is not None:
+        _attached.move_to_end(segment.name)
+        return entry
+
+    shm = shared_memory.SharedMemory(segment.name)
+    dictionary = None
+    if segment.typecode == CODES:
+        end = segment.length * array.array(CODES).itemsize
+        dictionary = pickle.loads(shm.buf[end:end + segment.dictionary])
+        dictionary.append(None)  # code -1
+    _attached[segment.name] = entry = (shm, dictionary)
+    while len(_attached) > ATTACHED:
+        old, _ = _attached.popitem(last=False)[1]
+        old.close()
+    return entry
+
+
+def _values(segment, start, end, decode=True):
+    """
+    The values at rows start..end of a segment; left as codes into the
+    dictionary (-1 for NULL) if decode is false.
+    """
+    shm, dictionary = _attach(segment)
+    width = array.array(segment.typecode).itemsize
+    offset = segment.length * width
+    values = shm.buf[:offset].cast(segment.typecode)[start:end].tolist()
+    if dictionary is not None:
+        return [dictionary[code] for code in values] if decode else values
+    if segment.nulls:
+        mask = shm.buf[offset + start:offset + end]
+        values = [None if null else v for v, null in zip(values, mask)]
+    return values
+
+
+def _matches(segments, start, end, conditions):
+    """Positions in start..end of the rows meeting conditions."""
+    columns = _columns(conditions)
+    dictionary = _attach(segments[columns[0]])[1] if len(columns) == 1 else None
+    if dictionary is not None and len(dictionary) < end - start:
+        # Test each distinct value once, then only compare codes
+        match = compile_predicate(conditions, columns)
+        wanted = {code for code, value in enumerate(dictionary[:-1]) if match((value,))}
+        if match((None,)):
+            wanted.add(-1)
+        codes = _values(segments[columns[0]], start, end, decode=False)
+        return array.array("q", [i for i, code in enumerate(codes, start) if code in wanted])
+
+    values = [_values(segments[c], start, end) for c in columns]
+    try:
+        positions = compile_scan(conditions, columns)(values, start)
+    except TypeError:  # mixed types; compile_predicate treats those rows as non-matching
+        match = compile_predicate(conditions, columns)
+        positions = [i for i, row in enumerate(zip(*values), start) if match(row)]
+    return array.array("q", positions)
+
+
+def _aggregate_morsel(segments, start, end, conditions, column, summed):
+    positions = _matches(segments, start, end, conditions) if conditions else None
+    if column is None:
+        return (end - start if positions is None else len(positions)), 0, None, None
+    values = _values(segments[column], start, end)
+    if positions is not None:
+        values = [values[i - start] for i in positions]
+    return summarize(values, summed)
+
+
+def summarize(values, summed=True):
+    """(count, sum, min, max) over non-null values; the sum stays 0 unless summed."""
+    values = [v for v in values if v is not None]
+    total = sum(values) if summed else 0
+    return len(values), total, min(values, default=None), max(values, default=None)
+
+
+def _columns(conditions):
+    """Columns read by normalized conditions."""
+    columns = []
+    pending = list(conditions)
+    while pending:
+        cond = pending.pop()
+        if isinstance(cond, tuple):
+            columns.append(cond[0])
+        else:
+            for part in cond.values():
+                pending.extend(part if isinstance(part, list) else [part])
+    return list(dict.fromkeys(columns))
+
+
+def _unlink(shm):
+    shm.close()
+    shm.unlink()
+
+
+def _unlink_all(segments):
+    while segments:
+        _unlink(segments.popitem()[1][3])
+
+
+# ---------------- EXECUTOR ----------------
+class ParallelExecutor:
+    """
+    Splits large scans into row-range morsels and runs them on a
+    process pool. Only used when the input has at least `threshold` rows;
+    smaller inputs are cheaper to handle in-process.
+
+    Columns a query reads are published once per table version into
+    shared memory (see publish()), and workers read their ranges from
+    there, so repeated queries on an unchanged table ship no row data.
+    Every method returns None when it cannot run on the pool, and the
+    caller then runs its own in-process path.
+
+    The pool is started once, when the executor is created, and kept
+    until close(). Where available its workers are forked right away,
+    so create the executor before starting threads (Database does this
+    in its constructor). With a single worker there is no pool at all.
+    """
+    def __init__(self, workers=None, threshold=100_000, morsel_size=50_000):
+        self.workers = workers or os.cpu_count() or 1
+        self.threshold = threshold
+        self.morsel_size = morsel_size
+        self._pool = None
+        self._segments = {}  # (id(table), column) -> (table ref, versions, Segment, SharedMemory)
+        self._lock = threading.Lock()
+        if self.workers > 1:
+            # Started before the fork so workers share it instead of each
+            # starting one that would unlink segments when the worker exits
+            resource_tracker.ensure_running()
+            ctx = None
+            if "fork" in multiprocessing.get_all_start_methods():
+                ctx = multiprocessing.get_context("fork")
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=ctx)
+            # Start every worker now rather than on the first large query
+            for f in [self._pool.submit(os.getpid) for _ in range(self.workers)]:
+                f.result()
+
+        # Segments outlive the process unless unlinked, even if close() is never called
+        weakref.finalize(self, _unlink_all, self._segments)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        with self._lock:
+            _unlink_all(self._segments)
+
+    def _unlink(self, key):
+        _unlink(self._segments.pop(key)[3])
+
+    def _publish(self, table, columns):
+        """Segments for columns of table, or None if one cannot be published."""
+        versions = (table.version, table.schema_version, len(table.rows))
+        with self._lock:
+            for key, entry in list(self._segments.items()):
+                if entry[0]() is None:  # table dropped
+                    self._unlink(key)
+
+            segments = {}
+            for col in columns:
+                key = (id(table), col)
+                entry = self._segments.get(key)
+                if entry is not None and entry[0]() is table and entry[1] == versions:
+                    segments[col] = entry[2]
+                    continue
+                if entry is not None:
+                    self._unlink(key)
+                published = publish([r.get(col) for r in table.rows], table.schema.get(col))
+                if published is None:
+                    return None
+                self._segments[key] = (weakref.ref(table), versions) + published
+                segments[col] = published[0]
+            return segments
+
+    def _split(self, ranges):
+        return [
+            (start, min(start + self.morsel_size, end))
+            for first, end in ranges
+            for start in range(first, end, self.morsel_size)
+        ]
+
+    def _run(self, func, morsels):
+        """
+        Run func(*args) on the pool for every args in morsels, results in
+        order; None if a segment was republished, and so unlinked, by a
+        write before a worker could attach to it.
+        """
+        futures = [self._pool.submit(func, *args) for args in morsels]
+        try:
+            return [f.result() for f in futures]
+        except FileNotFoundError:
+            return None
+
+    def filter(self, table, conditions, ranges):
+        """
+        Rows of table within the (start, end) position ranges matching
+        every condition (see engine.predicate).
+        """
+        columns = _columns(conditions)
+        if self._pool is None or not columns:
+            return None
+        segments = self._publish(table, columns)
+        if segments is None:
+            return None
+
+        morsels = [(segments, start, end, conditions) for start, end in self._split(ranges)]
+        results = self._run(_matches, morsels)
+        if results is None:
+            return None
+        rows = table.rows
+        result = []
+        for positions in results:
+            result.extend(rows[i] for i in positions)
+        return result
+
+    def aggregate(self, table, column, summed, conditions, ranges):
+        """
+        Merged (count, sum, min, max) over the non-null column values of
+        the rows in ranges meeting conditions; counts rows if column is None.
+        """
+        if self._pool is None:
+            return None
+        columns = list(dict.fromkeys(_columns(conditions) + ([column] if column else [])))
+        segments = self._publish(table, columns)
+        if segments is None:
+            return None
+
+        morsels = [
+            (segments, start, end, conditions, column, summed)
+            for start, end in self._split(ranges)
+        ]
+        results = self._run(_aggregate_morsel, morsels)
+        if results is None:
+            return None
+        count, total, low, high = 0, 0, None, None
+        for c, t, lo, hi in results:
+            count += c
+            total += t
+            if lo is not None and (low is None or lo < low):
+                low = lo
+            if hi is not None and (high is None or hi > high):
+                high = hi
+        return count, total, low, high
+
+
+def build_buckets(rows, key):
+    """Map each key value to the positions of the rows holding it."""
+    buckets = {}
+    for j, row in enumerate(rows):
+        buckets.setdefault(row.get(key), []).append(j)
+    return buckets
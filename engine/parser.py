@@ -10,7 +10,8 @@ KEYWORDS = {
     "CREATE", "TABLE", "INSERT", "INTO", "VALUES",
     "SELECT", "FROM", "WHERE",
     "UPDATE", "SET", "DELETE",
-    "INDEX", "ON", "JOIN", "AND"
+    "INDEX", "ON", "JOIN", "AND", "LIKE", "BLOOM", "STATS", "RESET",
+    "SHOW", "MEMORY", "COPY", "ALTER", "ARCHIVE"
 }
 
 
@@ -28,32 +29,181 @@ def parse_value(val):
             return val
 
 
-def parse_conditions(tokens):
+# ---------------- WHERE ----------------
+WHERE_TOKEN = re.compile(r"""\s*(?:
+    (?P<string>'(?:[^']|'')*'|"[^"]*")
+  | (?P<op><=|>=|!=|<>|=|<|>)
+  | (?P<punct>[(),])
+  | (?P<word>[^\s(),=<>!'"]+)
+)""", re.VERBOSE)
+
+def split_keyword(command, keyword):
+    """Split a command at its first keyword outside quotes -> (head, tail or None)."""
+    pattern = re.compile(
+        r"""'(?:[^']|'')*'|"[^"]*"|\b""" + r"\s+".join(keyword.split()) + r"\b",
+        re.IGNORECASE
+    )
+    for match in pattern.finditer(command):
+        if match.group(0)[0] not in "'\"":
+            return command[:match.start()], command[match.end():]
+    return command, None
+
+
+STATEMENT = re.compile(r"""'(?:[^']|'')*'|"[^"]*"|--.*$|;""")
+
+
+def split_statements(line):
+    """Statements on one script line, split at ';' outside quotes; '--' starts a comment."""
+    statements = []
+    start = 0
+    for match in STATEMENT.finditer(line):
+        token = match.group(0)
+        if token == ";":
+            statements.append(line[start:match.start()])
+            start = match.end()
+        elif token.startswith("--"):
+            statements.append(line[start:match.start()])
+            start = None
+            break
+    if start is not None:
+        statements.append(line[start:])
+    return [s.strip() for s in statements if s.strip()]
+
+
+def split_where(command):
+    """Split a command at its first WHERE outside quotes -> (head, where text or None)."""
+    return split_keyword(command, "WHERE")
+
+
+def tokenize_where(text):
+    tokens = []
+    pos = 0
+    text = text.rstrip()
+    while pos < len(text):
+        match = WHERE_TOKEN.match(text, pos)
+        if not match:
+            raise ParseError(f"Unexpected character in WHERE: {text[pos:].strip()[:1]!r}")
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == "string":
+            value = value[1:-1].replace("''", "'") if value[0] == "'" else value[1:-1]
+        tokens.append((kind, value))
+        pos = match.end()
+    return tokens
+
+
+def parse_where(text):
     """
-    Parses WHERE a=1 AND b='x'
-    Returns list of (column, value)
+    Parses a WHERE expression:
+      a=1 AND (b > 2 OR c IN (1, 2)) AND NOT d LIKE 'x%'
+    Returns a list of ANDed conditions: (column, value) for equality,
+    (column, op, value) for !=, <, >, <=, >=, IN, LIKE and
+    {"or": [...]}, {"and": [...]}, {"not": ...} for groups
     """
-    conditions = []
-    i = 0
-    while i < len(tokens):
-        if tokens[i] == "AND":
-            i += 1
-            continue
-        if "=" not in tokens[i]:
-            raise ParseError("Invalid WHERE condition")
-        col, val = tokens[i].split("=", 1)
-        conditions.append((col, parse_value(val)))
-        i += 1
-    return conditions
+    tokens = tokenize_where(text)
+    if not tokens:
+        raise ParseError("WHERE requires a condition")
+    pos = 0
+
+    def peek():
+        return tokens[pos] if pos < len(tokens) else (None, None)
+
+    def take():
+        nonlocal pos
+        token = peek()
+        if token[0] is None:
+            raise ParseError("Unexpected end of WHERE")
+        pos += 1
+        return token
+
+    def keyword(word):
+        kind, text = peek()
+        if kind == "word" and text.upper() == word:
+            take()
+            return True
+        return False
+
+    def expect(punct):
+        if take() != ("punct", punct):
+            raise ParseError(f"Expected '{punct}' in WHERE")
+
+    def value():
+        kind, text = take()
+        if kind == "string":
+            return text
+        if kind == "word":
+            return None if text.upper() == "NULL" else parse_value(text)
+        raise ParseError(f"Expected a value in WHERE, got '{text}'")
+
+    def disjunction():
+        parts = [conjunction()]
+        while keyword("OR"):
+            parts.append(conjunction())
+        return parts[0] if len(parts) == 1 else {"or": parts}
+
+    def conjunction():
+        parts = [negation()]
+        while keyword("AND"):
+            parts.append(negation())
+        return parts[0] if len(parts) == 1 else {"and": parts}
+
+    def negation():
+        if keyword("NOT"):
+            return {"not": negation()}
+        return comparison()
+
+    def comparison():
+        if peek() == ("punct", "("):
+            take()
+            inner = disjunction()
+            expect(")")
+            return inner
+
+        kind, column = take()
+        if kind != "word":
+            raise ParseError(f"Expected a column in WHERE, got '{column}'")
+
+        negate = keyword("NOT")
+        if keyword("IN"):
+            expect("(")
+            values = [value()]
+            while peek() == ("punct", ","):
+                take()
+                values.append(value())
+            expect(")")
+            cond = (column, "IN", values)
+        elif keyword("LIKE"):
+            cond = (column, "LIKE", str(value()))
+        elif negate:
+            raise ParseError("Expected IN or LIKE after NOT")
+        else:
+            kind, op = take()
+            if kind != "op":
+                raise ParseError(f"Expected an operator after '{column}'")
+            want = value()
+            if op == "=":
+                return (column, want)
+            cond = (column, "!=" if op == "<>" else op, want)
+
+        return {"not": cond} if negate else cond
+
+    tree = disjunction()
+    if pos != len(tokens):
+        raise ParseError(f"Unexpected '{tokens[pos][1]}' in WHERE")
+    return tree["and"] if isinstance(tree, dict) and "and" in tree else [tree]
 
 
 # ---------------- MAIN PARSER ----------------
 def parse(command: str):
     if not command.strip():
         return None
+    if VIEW_HEAD.match(command):
+        return parse_view(command)
 
+    command, where_text = split_where(command)
     tokens = shlex.split(command)
     tokens = [t.upper() if t.upper() in KEYWORDS else t for t in tokens]
+    where = parse_where(where_text) if where_text is not None else None
 
     cmd = tokens[0]
 
@@ -62,15 +212,27 @@ def parse(command: str):
     if cmd == "INSERT":
         return parse_insert(tokens)
     if cmd == "SELECT":
-        return parse_select(tokens)
+        return parse_select(tokens, where)
     if cmd == "UPDATE":
-        return parse_update(tokens)
+        return parse_update(tokens, where)
     if cmd == "DELETE":
-        return parse_delete(tokens)
+        return parse_delete(tokens, where)
     if cmd == "INDEX":
-        return parse_index(tokens)
+        return parse_index(tokens, where)
+    if cmd == "BLOOM":
+        return parse_bloom(tokens)
     if cmd == "JOIN":
         return parse_join(tokens)
+    if cmd == "STATS":
+        return parse_stats(tokens)
+    if cmd == "SHOW":
+        return parse_show(tokens)
+    if cmd == "COPY":
+        return parse_copy(tokens, where)
+    if cmd == "ALTER":
+        return parse_alter(tokens)
+    if cmd == "ARCHIVE":
+        return parse_archive(tokens, where)
 
     raise ParseError(f"Unsupported command: {cmd}")
 
@@ -82,6 +244,21 @@ def parse_create(tokens):
 
     table = tokens[2]
     raw = " ".join(tokens[3:])
+
+    # Trailing PAGED [rows per page]
+    paged = None
+    paged_match = re.search(r"\bPAGED(?:\s+(\d+))?\s*$", raw, re.IGNORECASE)
+    if paged_match:
+        raw = raw[:paged_match.start()]
+        rows = paged_match.group(1)
+        paged = {"page_rows": int(rows)} if rows else True
+
+    partition_by = None
+    split = re.split(r"\bPARTITION\s+BY\b", raw, maxsplit=1, flags=re.IGNORECASE)
+    if len(split) == 2:
+        raw = split[0]
+        partition_by = parse_partition(split[1])
+
     match = re.search(r"\((.*)\)", raw)
 
     if not match:
@@ -98,7 +275,42 @@ def parse_create(tokens):
     return {
         "type": "CREATE_TABLE",
         "table": table,
-        "columns": columns
+        "columns": columns,
+        "partition_by": partition_by,
+        "paged": paged
+    }
+
+
+def parse_partition(raw):
+    """
+    Parses the tail of CREATE TABLE after PARTITION BY:
+      HASH(col) PARTITIONS 4
+      RANGE(col) VALUES ('2026-01-01', '2026-07-01')
+    """
+    match = re.match(r"\s*(HASH|RANGE)\s*\(\s*(\w+)\s*\)\s*(.*)$", raw, re.IGNORECASE)
+    if not match:
+        raise ParseError("Usage: PARTITION BY HASH(col) PARTITIONS n | RANGE(col) VALUES (v1, v2)")
+
+    kind, column, rest = match.group(1).upper(), match.group(2), match.group(3).strip()
+
+    if kind == "HASH":
+        count = re.match(r"PARTITIONS\s+(\d+)$", rest, re.IGNORECASE)
+        if rest and not count:
+            raise ParseError("Expected PARTITIONS n after HASH(col)")
+        return {
+            "kind": "HASH",
+            "column": column,
+            "partitions": int(count.group(1)) if count else 4
+        }
+
+    bounds = re.match(r"VALUES\s*\((.*)\)$", rest, re.IGNORECASE)
+    if not bounds:
+        raise ParseError("RANGE partitioning requires VALUES (v1, v2, ...)")
+
+    return {
+        "kind": "RANGE",
+        "column": column,
+        "bounds": [parse_value(v) for v in bounds.group(1).split(",")]
     }
 
 
@@ -129,7 +341,7 @@ def parse_insert(tokens):
 
 
 # ---------------- SELECT ----------------
-def parse_select(tokens):
+def parse_select(tokens, where=None):
     if "FROM" not in tokens:
         raise ParseError("SELECT must include FROM")
 
@@ -141,36 +353,23 @@ def parse_select(tokens):
 
     table = tokens[from_idx + 1]
 
-    where = []
-    if "WHERE" in tokens:
-        where_idx = tokens.index("WHERE")
-        where_tokens = tokens[where_idx + 1:]
-        where = parse_conditions(where_tokens)
-
     return {
         "type": "SELECT",
         "table": table,
         "columns": columns,
-        "where": where
+        "where": where or []
     }
 
 
 # ---------------- UPDATE ----------------
-def parse_update(tokens):
+def parse_update(tokens, where=None):
     table = tokens[1]
 
     if "SET" not in tokens:
         raise ParseError("UPDATE requires SET")
 
     set_idx = tokens.index("SET")
-
-    if "WHERE" in tokens:
-        where_idx = tokens.index("WHERE")
-        set_tokens = tokens[set_idx + 1:where_idx]
-        where_tokens = tokens[where_idx + 1:]
-    else:
-        set_tokens = tokens[set_idx + 1:]
-        where_tokens = []
+    set_tokens = tokens[set_idx + 1:]
 
     updates = {}
     for item in set_tokens:
@@ -179,50 +378,237 @@ def parse_update(tokens):
         col, val = item.split("=", 1)
         updates[col] = parse_value(val)
 
-    where = parse_conditions(where_tokens) if where_tokens else []
-
     return {
         "type": "UPDATE",
         "table": table,
         "updates": updates,
-        "where": where
+        "where": where or []
     }
 
 
 # ---------------- DELETE ----------------
-def parse_delete(tokens):
+def parse_delete(tokens, where=None):
     if tokens[1] != "FROM":
         raise ParseError("DELETE must be followed by FROM")
 
     table = tokens[2]
 
-    where = []
-    if "WHERE" in tokens:
-        idx = tokens.index("WHERE")
-        where = parse_conditions(tokens[idx + 1:])
-
     return {
         "type": "DELETE",
         "table": table,
-        "where": where
+        "where": where or []
     }
 
 
 # ---------------- INDEX ----------------
-def parse_index(tokens):
-    if tokens[1] != "ON":
-        raise ParseError("Usage: INDEX ON table column")
+def parse_index(tokens, where=None):
+    """
+    INDEX ON table column [USING HASH|BITMAP|SORTED|NGRAM] [WHERE col=value AND ...]
+    """
+    usage = "Usage: INDEX ON table column [USING HASH|BITMAP|SORTED|NGRAM] [WHERE col=value]"
+    if len(tokens) < 4 or tokens[1] != "ON":
+        raise ParseError(usage)
 
     table = tokens[2]
     column = tokens[3]
 
+    if where and any(not isinstance(c, tuple) or len(c) != 2 for c in where):
+        raise ParseError("Partial index WHERE only supports col=value AND ...")
+
+    kind = "hash"
+    if len(tokens) > 4:
+        if tokens[4].upper() != "USING" or len(tokens) != 6:
+            raise ParseError(usage)
+        kind = tokens[5].lower()
+        if kind not in ("hash", "bitmap", "sorted", "ngram"):
+            raise ParseError(f"Unsupported index type: {tokens[5]}")
+
     return {
         "type": "CREATE_INDEX",
         "table": table,
-        "column": column
+        "column": column,
+        "kind": kind,
+        "where": where
+    }
+
+
+# ---------------- VIEW ----------------
+VIEW_HEAD = re.compile(r"\s*CREATE\s+MATERIALIZED\s+VIEW\b", re.IGNORECASE)
+VIEW_SYNTAX = re.compile(
+    r"\s*CREATE\s+MATERIALIZED\s+VIEW\s+(\w+)\s+AS\s+SELECT\s+(.+?)\s+FROM\s+(\w+)\s*$",
+    re.IGNORECASE | re.DOTALL
+)
+VIEW_COLUMN = re.compile(
+    r"(?:(\w+)\s*\(\s*(\*|\w+)\s*\)|(\*|\w+))(?:\s+AS\s+(\w+))?",
+    re.IGNORECASE
+)
+
+
+def parse_view(command):
+    """
+    CREATE MATERIALIZED VIEW name AS SELECT cols FROM table
+        [WHERE ...] [GROUP BY col, ...]
+    cols: col, COUNT(*), COUNT(col), SUM(col) or AVG(col), each with
+    an optional AS alias
+    """
+    usage = "Usage: CREATE MATERIALIZED VIEW name AS SELECT cols FROM table [WHERE ...] [GROUP BY cols]"
+
+    command, group_text = split_keyword(command, "GROUP BY")
+    command, where_text = split_where(command)
+    match = VIEW_SYNTAX.match(command)
+    if not match:
+        raise ParseError(usage)
+    name, select_list, table = match.groups()
+
+    columns = []
+    for item in select_list.split(","):
+        col_match = VIEW_COLUMN.fullmatch(item.strip())
+        if not col_match:
+            raise ParseError(f"Invalid view column: {item.strip()}")
+        func, arg, col, alias = col_match.groups()
+        if func:
+            columns.append((func.upper(), arg, alias))
+        elif alias:
+            columns.append((None, col, alias))
+        else:
+            columns.append(col)
+
+    group_by = []
+    if group_text is not None:
+        group_by = [col.strip() for col in group_text.split(",")]
+        if not all(re.fullmatch(r"\w+", col) for col in group_by):
+            raise ParseError(usage)
+
+    return {
+        "type": "CREATE_VIEW",
+        "view": name,
+        "table": table,
+        "columns": columns,
+        "where": parse_where(where_text) if where_text is not None else None,
+        "group_by": group_by
     }
 
 
+# ---------------- BLOOM ----------------
+def parse_bloom(tokens):
+    """
+    BLOOM ON table column
+    """
+    if len(tokens) != 4 or tokens[1] != "ON":
+        raise ParseError("Usage: BLOOM ON table column")
+
+    return {
+        "type": "CREATE_BLOOM",
+        "table": tokens[2],
+        "column": tokens[3]
+    }
+
+
+# ---------------- ALTER ----------------
+def parse_alter(tokens):
+    """
+    ALTER TABLE table ADD [COLUMN] col TYPE [DEFAULT value]
+    ALTER TABLE table DROP [COLUMN] col
+    ALTER TABLE table COMPACT
+    """
+    usage = "Usage: ALTER TABLE table ADD COLUMN col TYPE [DEFAULT v] | DROP COLUMN col | COMPACT"
+    if len(tokens) < 4 or tokens[1] != "TABLE":
+        raise ParseError(usage)
+
+    table = tokens[2]
+    action = tokens[3].upper()
+    rest = tokens[4:]
+    if rest and rest[0].upper() == "COLUMN":
+        rest = rest[1:]
+
+    if action == "ADD":
+        default = None
+        if len(rest) == 4 and rest[2].upper() == "DEFAULT":
+            default = None if rest[3].upper() == "NULL" else parse_value(rest[3])
+            rest = rest[:2]
+        if len(rest) != 2:
+            raise ParseError(usage)
+        return {
+            "type": "ADD_COLUMN",
+            "table": table,
+            "column": rest[0],
+            "dtype": rest[1].upper(),
+            "default": default
+        }
+
+    if action == "DROP" and len(rest) == 1:
+        return {"type": "DROP_COLUMN", "table": table, "column": rest[0]}
+
+    if action == "COMPACT" and not rest:
+        return {"type": "COMPACT", "table": table}
+
+    raise ParseError(usage)
+
+
+# ---------------- COPY ----------------
+def parse_copy(tokens, where=None):
+    """
+    COPY table FROM 'file.csv'
+    COPY table TO 'file.jsonl' [WHERE ...]
+    Either may end with FORMAT CSV | JSONL when the extension does not tell.
+    """
+    usage = "Usage: COPY table FROM|TO 'file' [FORMAT CSV|JSONL]"
+    fmt = None
+    if len(tokens) == 6 and tokens[4].upper() == "FORMAT":
+        fmt = tokens[5].lower()
+        tokens = tokens[:4]
+    if len(tokens) != 4 or tokens[2].upper() not in ("FROM", "TO"):
+        raise ParseError(usage)
+
+    direction = tokens[2].upper()
+    if direction == "FROM" and where is not None:
+        raise ParseError("COPY ... FROM does not take WHERE")
+
+    return {
+        "type": "COPY",
+        "table": tokens[1],
+        "direction": direction,
+        "path": tokens[3],
+        "format": fmt,
+        "where": where
+    }
+
+
+# ---------------- ARCHIVE ----------------
+def parse_archive(tokens, where=None):
+    """
+    ARCHIVE table [WHERE ...]           move matching rows (default: the policy)
+    ARCHIVE POLICY table [WHERE ...]    set the policy; without WHERE, clear it
+    """
+    if len(tokens) == 3 and tokens[1].upper() == "POLICY":
+        return {"type": "ARCHIVE_POLICY", "table": tokens[2], "where": where}
+    if len(tokens) == 2:
+        return {"type": "ARCHIVE", "table": tokens[1], "where": where}
+    raise ParseError("Usage: ARCHIVE table [WHERE ...] | ARCHIVE POLICY table [WHERE ...]")
+
+
+# ---------------- STATS ----------------
+def parse_stats(tokens):
+    """
+    STATS
+    STATS RESET
+    """
+    if tokens == ["STATS"]:
+        return {"type": "STATS", "reset": False}
+    if tokens == ["STATS", "RESET"]:
+        return {"type": "STATS", "reset": True}
+    raise ParseError("Usage: STATS [RESET]")
+
+
+def parse_show(tokens):
+    """
+    SHOW MEMORY
+    """
+    if tokens == ["SHOW", "MEMORY"]:
+        return {"type": "SHOW_MEMORY"}
+    raise ParseError("Usage: SHOW MEMORY")
+
+
 # ---------------- JOIN ----------------
 def parse_join(tokens):
     """
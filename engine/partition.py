@@ -0,0 +1,316 @@
+import bisect
+import zlib
+from engine.memory import merge
+from engine.predicate import normalize
+from engine.table import Table
+
+
+class PartitionedTable:
+    """
+    A table split into independent partitions on one column.
+
+    HASH partitioning spreads rows over a fixed number of buckets, RANGE
+    partitioning places rows between sorted boundary values. Every
+    partition is a plain Table with its own rows and indexes, so a query
+    with an equality filter on the partition column only touches one
+    partition.
+    """
+    def __init__(self, name, columns, primary_key=None, unique_keys=None,
+                 partition_by=None):
+        if not partition_by:
+            raise ValueError("partition_by is required")
+
+        kind = partition_by.get("kind", "").upper()
+        if kind not in ("HASH", "RANGE"):
+            raise ValueError(f"Unsupported partitioning: {kind}")
+
+        self.name = name
+        self.kind = kind
+        self.column = partition_by["column"]
+
+        if kind == "HASH":
+            count = int(partition_by.get("partitions", 4))
+            if count < 1:
+                raise ValueError("HASH partitioning needs at least 1 partition")
+            self.bounds = []
+        else:
+            count = len(partition_by.get("bounds", [])) + 1
+
+        self.partitions = [
+            Table(
+                name=f"{name}#p{i}",
+                columns=columns,
+                primary_key=primary_key,
+                unique_keys=unique_keys
+            )
+            for i in range(count)
+        ]
+
+        first = self.partitions[0]
+        if self.column not in first.schema:
+            raise ValueError(
+                f"Partition column '{self.column}' does not exist in table '{name}'"
+            )
+
+        if kind == "RANGE":
+            self.bounds = sorted(
+                first._cast(self.column, b) for b in partition_by["bounds"]
+            )
+
+        self.schema = first.schema
+        self.columns = first.columns
+        self.primary_key = first.primary_key
+        self.unique_keys = first.unique_keys
+
+    # ---------------- INTERNAL ----------------
+    def _cast(self, column, value):
+        return self.partitions[0]._cast(column, value)
+
+    def _position_for(self, value):
+        value = self._cast(self.column, value)
+        if self.kind == "HASH":
+            digest = zlib.crc32(repr(value).encode("utf-8"))
+            return digest % len(self.partitions)
+        if value is None:
+            return 0
+        return bisect.bisect_right(self.bounds, value)
+
+    def _partition_for(self, value):
+        return self.partitions[self._position_for(value)]
+
+    def _positions_matching(self, op, want):
+        """Positions of the partitions that may hold a row satisfying col op want."""
+        if op == "=":
+            return {self._position_for(want)}
+        if op == "IN":
+            return {self._position_for(v) for v in want}
+        if self.kind != "RANGE" or op not in ("<", "<=", ">", ">="):
+            return None
+
+        # Partition i holds bounds[i-1] <= value < bounds[i]
+        want = self._cast(self.column, want)
+        if op in (">", ">="):
+            return set(range(bisect.bisect_right(self.bounds, want), len(self.partitions)))
+        if op == "<":
+            return set(range(bisect.bisect_left(self.bounds, want) + 1))
+        return set(range(bisect.bisect_right(self.bounds, want) + 1))
+
+    def _prune(self, filters):
+        """Return only the partitions that can hold rows matching filters."""
+        positions = set(range(len(self.partitions)))
+        for cond in normalize(filters):
+            if not isinstance(cond, tuple) or cond[0] != self.column:
+                continue
+            col, op, want = cond
+            try:
+                matching = self._positions_matching(op, want)
+            except (ValueError, TypeError):
+                continue  # not comparable with the bounds: keep every partition
+            if matching is not None:
+                positions &= matching
+        return [part for i, part in enumerate(self.partitions) if i in positions]
+
+    def partition_spec(self):
+        spec = {"kind": self.kind, "column": self.column}
+        if self.kind == "HASH":
+            spec["partitions"] = len(self.partitions)
+        else:
+            spec["bounds"] = list(self.bounds)
+        return spec
+
+    @property
+    def rows(self):
+        result = []
+        for part in self.partitions:
+            result.extend(part.rows)
+        return result
+
+    @rows.setter
+    def rows(self, rows):
+        split = {id(part): [] for part in self.partitions}
+        for row in rows:
+            split[id(self._partition_for(row.get(self.column)))].append(row)
+        for part in self.partitions:
+            part.rows = split[id(part)]
+
+    def coerce_rows(self, rows):
+        return self.partitions[0].coerce_rows(rows)
+
+    def format_row(self, row):
+        return self.partitions[0].format_row(row)
+
+    @property
+    def executor(self):
+        return self.partitions[0].executor
+
+    @executor.setter
+    def executor(self, executor):
+        for part in self.partitions:
+            part.executor = executor
+
+    @property
+    def stats(self):
+        return self.partitions[0].stats
+
+    @stats.setter
+    def stats(self, stats):
+        for part in self.partitions:
+            part.stats = stats
+
+    @property
+    def indexes(self):
+        return self.partitions[0].indexes
+
+    @property
+    def dictionaries(self):
+        merged = {}
+        for part in self.partitions:
+            for col, dictionary in part.dictionaries.items():
+                merged.setdefault(col, {}).update(dictionary)
+        return merged
+
+    @property
+    def version(self):
+        return sum(part.version for part in self.partitions)
+
+    def add_observer(self, observer):
+        for part in self.partitions:
+            part.add_observer(observer)
+
+    # ---------------- INSERT ----------------
+    def insert(self, row):
+        target = self._partition_for(row.get(self.column))
+
+        # Keys other than the partition column may collide across partitions
+        for key in [self.primary_key] + list(self.unique_keys):
+            if not key or key == self.column or key not in row:
+                continue
+            for part in self.partitions:
+                if part is not target and part.select_all([(key, row[key])]):
+                    raise ValueError(
+                        f"Unique constraint violation on {key} = {row[key]}"
+                    )
+
+        return target.insert(row)
+
+    def key_values(self):
+        """Keys must be unique across partitions, so their values are merged."""
+        merged = {}
+        for part in self.partitions:
+            for col, values in part.key_values().items():
+                merged.setdefault(col, set()).update(values)
+        return merged
+
+    def insert_many(self, rows, keys=None):
+        """Batch insert (see Table.insert_many), routed to each row's partition."""
+        split = {id(part): [] for part in self.partitions}
+        for row in rows:
+            part = self._partition_for(row.get(self.column))
+            split[id(part)].append(part._prepare(row))
+        prepared = [row for part_rows in split.values() for row in part_rows]
+
+        keys = self.key_values() if keys is None else keys
+        self.partitions[0]._check_keys(prepared, keys)
+        for col, existing in keys.items():
+            existing.update(row[col] for row in prepared)
+
+        for part in self.partitions:
+            part._append(split[id(part)])
+        return prepared
+
+    # ---------------- SELECT ----------------
+    def select_all(self, filters=None):
+        result = []
+        for part in self._prune(filters):
+            result.extend(part.select_all(filters))
+        return result
+
+    # ---------------- UPDATE ----------------
+    def update(self, filters, updates):
+        count = 0
+        moving = self.column in updates
+
+        for part in self._prune(filters):
+            count += part.update(filters, updates)
+
+            if moving:
+                # Rows whose partition key changed must move to their new home
+                target = self._partition_for(updates[self.column])
+                if target is not part:
+                    for row in part.select_all([(self.column, updates[self.column])]):
+                        part._unlink(row)
+                        target._link(row)
+
+        return count
+
+    # ---------------- DELETE ----------------
+    def delete(self, filters):
+        count = 0
+        for part in self._prune(filters):
+            count += part.delete(filters)
+        return count
+
+    # ---------------- ALTER ----------------
+    @property
+    def schema_version(self):
+        return self.partitions[0].schema_version
+
+    @property
+    def defaults(self):
+        return self.partitions[0].defaults
+
+    def add_column(self, column, dtype="TEXT", default=None):
+        for part in self.partitions:
+            part.add_column(column, dtype, default)
+
+    def drop_column(self, column):
+        if column == self.column:
+            raise ValueError(f"Cannot drop partition column '{column}'")
+        for part in self.partitions:
+            part.drop_column(column)
+
+    def compact(self):
+        return sum(part.compact() for part in self.partitions)
+
+    def schema_changes(self):
+        return self.partitions[0].schema_changes()
+
+    def restore_schema_changes(self, spec):
+        for part in self.partitions:
+            part.restore_schema_changes(spec)
+
+    # ---------------- INDEX ----------------
+    @property
+    def partial_indexes(self):
+        return self.partitions[0].partial_indexes
+
+    def index_kinds(self):
+        return self.partitions[0].index_kinds()
+
+    def partial_index_specs(self):
+        return self.partitions[0].partial_index_specs()
+
+    def create_index(self, column, kind="hash", where=None):
+        for part in self.partitions:
+            part.create_index(column, kind, where)
+
+    # ---------------- BLOOM FILTERS ----------------
+    @property
+    def blooms(self):
+        return self.partitions[0].blooms
+
+    def create_bloom_filter(self, column, error_rate=0.01):
+        for part in self.partitions:
+            part.create_bloom_filter(column, error_rate)
+
+    def bloom_specs(self):
+        specs = [part.bloom_specs() for part in self.partitions]
+        return {col: [spec[col] for spec in specs] for col in self.blooms}
+
+    def restore_bloom(self, column, data):
+        for part, part_data in zip(self.partitions, data):
+            part.restore_bloom(column, part_data)
+
+    # ---------------- MEMORY ----------------
+    def memory(self):
+        return merge(part.memory() for part in self.partitions)
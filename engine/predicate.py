@@ -0,0 +1,214 @@
+"""
+WHERE conditions
+----------------
+A filter list is ANDed. Each entry is one of
+
+  (column, value)              equality, the original form
+  (column, op, value)          op in =, !=, <, >, <=, >=, IN, LIKE
+  {"and": [...]}, {"or": [...]}, {"not": condition}
+
+The dict nodes keep conditions JSON-serializable for the mutation log.
+compile_predicate() turns a list into one generated Python function, so
+rows are checked without walking the tree.
+"""
+import re
+
+OPERATORS = {"=", "!=", "<", ">", "<=", ">=", "IN", "LIKE"}
+RANGE_OPERATORS = {"<", ">", "<=", ">="}
+
+
+def normalize(filters):
+    """Return filters with comparisons as (column, op, value) triples."""
+    return [_normalize(f) for f in filters or []]
+
+
+def _normalize(cond):
+    if isinstance(cond, dict):
+        if "not" in cond:
+            return {"not": _normalize(cond["not"])}
+        (key, children), = cond.items()
+        if key not in ("and", "or"):
+            raise ValueError(f"Unsupported condition: {key}")
+        return {key: [_normalize(c) for c in children]}
+
+    if len(cond) == 2:
+        return (cond[0], "=", cond[1])
+
+    col, op, want = cond
+    op = op.upper()
+    if op == "<>":
+        op = "!="
+    if op not in OPERATORS:
+        raise ValueError(f"Unsupported operator: {op}")
+    return (col, op, want)
+
+
+def bind(conditions, cast):
+    """Cast every constant once with cast(column, value)."""
+    def bound(cond):
+        if isinstance(cond, dict):
+            if "not" in cond:
+                return {"not": bound(cond["not"])}
+            (key, children), = cond.items()
+            return {key: [bound(c) for c in children]}
+
+        col, op, want = cond
+        if op == "LIKE":
+            return cond
+        if op == "IN":
+            return (col, op, [cast(col, v) for v in want])
+        return (col, op, cast(col, want))
+
+    return [bound(c) for c in conditions]
+
+
+def from_json(conditions):
+    """Undo the JSON round trip of the mutation log (lists back to tuples)."""
+    def restore(cond):
+        if isinstance(cond, dict):
+            if "not" in cond:
+                return {"not": restore(cond["not"])}
+            (key, children), = cond.items()
+            return {key: [restore(c) for c in children]}
+        return tuple(cond)
+
+    return [restore(c) for c in conditions or []]
+
+
+# ---------------- LIKE ----------------
+def like_regex(pattern):
+    """SQL LIKE: % matches any run of characters, _ exactly one."""
+    parts = []
+    for ch in pattern:
+        if ch == "%":
+            parts.append(".*")
+        elif ch == "_":
+            parts.append(".")
+        else:
+            parts.append(re.escape(ch))
+    return re.compile("".join(parts) + r"\Z", re.DOTALL)
+
+
+def like_prefix(pattern):
+    """'abc%' -> 'abc'; None when the pattern is not a plain prefix match."""
+    head = pattern[:-1]
+    if pattern.endswith("%") and "%" not in head and "_" not in head:
+        return head
+    return None
+
+
+def like_fragment(pattern):
+    """Longest run of literal characters in a LIKE pattern."""
+    return max(re.split(r"[%_]", pattern), key=len)
+
+
+# ---------------- COMPILATION ----------------
+def compile_predicate(conditions, columns=None):
+    """
+    Compile normalized, bound conditions into a function row -> bool.
+    With columns given, row is instead a tuple of those columns' values.
+
+    Constants and LIKE matchers are passed to the generated code as
+    names, never spliced into its source. Comparing values of different
+    types (a TypeError) falls back to evaluating that row node by node,
+    where the mismatched comparison is simply false.
+    """
+    if columns is None:
+        slow = lambda row: _evaluate({"and": conditions}, row)
+    else:
+        columns = list(columns)
+        slow = lambda row: _evaluate({"and": conditions}, dict(zip(columns, row)))
+    names = {"_slow": slow}
+    source = (
+        "def match(row):\n"
+        "    try:\n"
+        f"        return {_emit({'and': conditions}, names, columns)}\n"
+        "    except TypeError:\n"
+        "        return _slow(row)\n"
+    )
+    exec(source, names)
+    return names["match"]
+
+
+def compile_scan(conditions, columns):
+    """
+    Compile normalized, bound conditions into a function
+    (values, start) -> positions of the matching rows, where values
+    holds one list per column in columns and positions count from start.
+    Unlike compile_predicate there is no per-row call, and comparing
+    values of different types raises TypeError instead of falling back.
+    """
+    names = {}
+    test = _emit({"and": conditions}, names, list(columns))
+    source = (
+        "def scan(values, start):\n"
+        f"    return [i for i, row in enumerate(zip(*values), start) if {test}]\n"
+    )
+    exec(source, names)
+    return names["scan"]
+
+
+def _constant(names, value):
+    name = f"_c{len(names)}"
+    names[name] = value
+    return name
+
+
+def _emit(cond, names, columns=None):
+    if isinstance(cond, dict):
+        if "not" in cond:
+            return f"not ({_emit(cond['not'], names, columns)})"
+        (key, children), = cond.items()
+        if not children:
+            return "True" if key == "and" else "False"
+        return f" {key} ".join(f"({_emit(c, names, columns)})" for c in children)
+
+    col, op, want = cond
+    get = f"row.get({col!r})" if columns is None else f"row[{columns.index(col)}]"
+
+    if op == "=":
+        return f"{get} == {_constant(names, want)}"
+    if op == "IN":
+        try:
+            values = frozenset(want)
+        except TypeError:
+            values = tuple(want)
+        return f"{get} in {_constant(names, values)}"
+    if op == "LIKE":
+        match = _constant(names, like_regex(want).match)
+        return f"isinstance(_v := {get}, str) and {match}(_v) is not None"
+
+    # NULL never satisfies !=, <, >, <=, >=
+    return f"(_v := {get}) is not None and _v {op} {_constant(names, want)}"
+
+
+def _evaluate(cond, row):
+    if isinstance(cond, dict):
+        if "not" in cond:
+            return not _evaluate(cond["not"], row)
+        (key, children), = cond.items()
+        results = (_evaluate(c, row) for c in children)
+        return all(results) if key == "and" else any(results)
+
+    col, op, want = cond
+    value = row.get(col)
+    try:
+        if op == "=":
+            return value == want
+        if op == "IN":
+            return value in want
+        if op == "LIKE":
+            return isinstance(value, str) and like_regex(want).match(value) is not None
+        if value is None:
+            return False
+        if op == "!=":
+            return value != want
+        if op == "<":
+            return value < want
+        if op == ">":
+            return value > want
+        if op == "<=":
+            return value <= want
+        return value >= want
+    except TypeError:
+        return False
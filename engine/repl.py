@@ -1,5 +1,9 @@
+import argparse
+import sys
+import time
 from engine.database import Database
-from engine.parser import parse, ParseError
+from engine.memory import format_bytes
+from engine.parser import parse, split_statements, ParseError
 
 
 def pretty_print(rows):
@@ -23,30 +27,275 @@ def pretty_print(rows):
         print(" | ".join(str(row.get(c, "")).ljust(widths[c]) for c in columns))
 
 
+def print_stats(report):
+    latency = [
+        {"operation": op, **{k: v for k, v in h.items() if k != "buckets"}}
+        for op, h in report["latency"].items()
+    ]
+    print("Latency")
+    pretty_print(latency)
+
+    print("\nTables")
+    pretty_print([{"table": name, **c} for name, c in report["tables"].items()])
+
+    print(f"\nSlow queries (>= {report['slow_query_ms']} ms)")
+    pretty_print(report["slow_queries"][-10:])
+
+
+def print_memory(usage):
+    rows = []
+    for kind in ("tables", "views"):
+        for name, u in usage[kind].items():
+            rows.append({
+                "table": name if kind == "tables" else f"{name} (view)",
+                "rows": format_bytes(u["rows"]),
+                "indexes": format_bytes(sum(u["indexes"].values())),
+                "dictionaries": format_bytes(u["dictionaries"]),
+                "bloom filters": format_bytes(u["bloom_filters"]),
+                "total": format_bytes(u["total"])
+            })
+    pretty_print(rows)
+
+    caches = usage["caches"]
+    print(f"\nResult cache: {format_bytes(caches['result_cache'])}")
+    print(f"Buffer pool:  {format_bytes(caches['buffer_pool'])} (counted under paged tables)")
+    print(f"Total:        {format_bytes(usage['total'])}")
+
+    budget = usage["budget"]
+    if budget["total_mb"]:
+        print(f"Budget:       {budget['total_mb']} MB")
+    for warning in usage["warnings"]:
+        print(f"⚠️ {warning}")
+
+
 def print_help():
     print("""
 Available commands:
-
-CREATE TABLE table (col TYPE, col TYPE)
+(also runs scripts: python -m engine.repl -f script.sql, or pipe statements to stdin)
+
+CREATE TABLE table (col TYPE, col TYPE)   types: INT, FLOAT, TEXT, TIMESTAMP, DATE
+CREATE TABLE table (col TYPE, col TYPE) PARTITION BY HASH(col) PARTITIONS 4
+CREATE TABLE table (col TYPE, col TYPE) PARTITION BY RANGE(col) VALUES (v1, v2)
+CREATE TABLE table (col TYPE, col TYPE) PAGED [rows per page]
+ALTER TABLE table ADD COLUMN col TYPE DEFAULT value
+ALTER TABLE table DROP COLUMN col
+ALTER TABLE table COMPACT                 rewrite stored rows in the current schema
 INSERT INTO table VALUES (v1, v2)
 
 SELECT * FROM table
 SELECT col1, col2 FROM table WHERE col=value AND col2=value
+SELECT * FROM table WHERE col LIKE 'abc%'
+SELECT * FROM table WHERE (a > 1 OR b IN (1, 2)) AND NOT c LIKE 'x%'
 
 UPDATE table SET col=value WHERE col=value
 DELETE FROM table WHERE col=value
 
 INDEX ON table column
+INDEX ON table column USING BITMAP
+INDEX ON table column USING SORTED
+INDEX ON table column USING NGRAM
+INDEX ON table column WHERE col=value
+BLOOM ON table column
+
+CREATE MATERIALIZED VIEW v AS SELECT status, COUNT(*), SUM(amount) FROM table GROUP BY status
+CREATE MATERIALIZED VIEW v AS SELECT id, name FROM table WHERE active=1
 
 JOIN table1 table2 ON table1.col=table2.col
 
+COPY table FROM 'file.csv'                CSV with a header row, or .jsonl
+COPY table TO 'file.jsonl' WHERE col=value
+COPY table TO 'export.txt' FORMAT CSV
+
+ARCHIVE POLICY table WHERE status IN ('complete', 'failed')
+ARCHIVE table                             move rows matching the policy to compressed segments
+ARCHIVE table WHERE col=value             queries still see archived rows; they are read-only
+
+STATS                                     latency, rows scanned per table, slow queries
+STATS RESET
+SHOW MEMORY                               estimated bytes per table, index and cache
+
 exit
 """)
 
 
-def main():
-    db = Database()
+def execute(db, cmd):
+    """Parse and run one statement, printing its result. Errors propagate."""
+    # Remove trailing semicolon
+    if cmd.endswith(";"):
+        cmd = cmd[:-1]
 
+    started = time.perf_counter()
+    parsed = parse(cmd)
+    db.query_stats.record("parse", None, time.perf_counter() - started, cmd)
+    if not parsed:
+        return
+
+    cmd_type = parsed["type"]
+
+    # ================= CREATE TABLE =================
+    if cmd_type == "CREATE_TABLE":
+        db.create_table(
+            parsed["table"],
+            parsed["columns"],
+            primary_key=parsed["columns"][0][0],
+            partition_by=parsed["partition_by"],
+            paged=parsed["paged"]
+        )
+        print(f"✅ Table '{parsed['table']}' created.")
+
+    # ================= ALTER =================
+    elif cmd_type == "ADD_COLUMN":
+        db.add_column(parsed["table"], parsed["column"], parsed["dtype"], parsed["default"])
+        print(f"✅ Column '{parsed['column']}' added to '{parsed['table']}'.")
+
+    elif cmd_type == "DROP_COLUMN":
+        db.drop_column(parsed["table"], parsed["column"])
+        print(f"✅ Column '{parsed['column']}' dropped from '{parsed['table']}'.")
+
+    elif cmd_type == "COMPACT":
+        count = db.compact_table(parsed["table"])
+        print(f"✅ {count} row(s) rewritten in '{parsed['table']}'.")
+
+    # ================= INSERT =================
+    elif cmd_type == "INSERT":
+        table = db.tables[parsed["table"]]
+        if len(parsed["values"]) != len(table.columns):
+            raise ValueError("Column count does not match values count")
+
+        row = dict(zip(table.columns, parsed["values"]))
+        db.insert(parsed["table"], row)
+        print(f"✅ Row inserted into '{parsed['table']}'.")
+
+    # ================= SELECT =================
+    elif cmd_type == "SELECT":
+        rows = db.select_all(
+            parsed["table"],
+            parsed["where"]
+        )
+
+        table = db.get_table(parsed["table"])
+        rows = [table.format_row(r) for r in rows]
+
+        # Column projection
+        if parsed["columns"] != ["*"]:
+            rows = [
+                {c: r.get(c) for c in parsed["columns"]}
+                for r in rows
+            ]
+
+        pretty_print(rows)
+
+    # ================= UPDATE =================
+    elif cmd_type == "UPDATE":
+        count = db.update(
+            parsed["table"],
+            parsed["where"],
+            parsed["updates"]
+        )
+        print(f"✅ {count} row(s) updated.")
+
+    # ================= DELETE =================
+    elif cmd_type == "DELETE":
+        count = db.delete(
+            parsed["table"],
+            parsed["where"]
+        )
+        print(f"✅ {count} row(s) deleted.")
+
+    # ================= INDEX =================
+    elif cmd_type == "CREATE_INDEX":
+        db.create_index(
+            parsed["table"],
+            parsed["column"],
+            parsed["kind"],
+            parsed["where"]
+        )
+        print(
+            f"✅ Index created on '{parsed['column']}' "
+            f"in '{parsed['table']}'."
+        )
+
+    # ================= BLOOM =================
+    elif cmd_type == "CREATE_BLOOM":
+        db.create_bloom_filter(parsed["table"], parsed["column"])
+        print(
+            f"✅ Bloom filter created on '{parsed['column']}' "
+            f"in '{parsed['table']}'."
+        )
+
+    # ================= VIEW =================
+    elif cmd_type == "CREATE_VIEW":
+        db.create_materialized_view(
+            parsed["view"],
+            parsed["table"],
+            parsed["columns"],
+            parsed["where"],
+            parsed["group_by"]
+        )
+        print(f"✅ Materialized view '{parsed['view']}' created.")
+
+    # ================= JOIN =================
+    elif cmd_type == "JOIN":
+        rows = db.inner_join(
+            parsed["left_table"],
+            parsed["right_table"],
+            parsed["left_key"],
+            parsed["right_key"]
+        )
+        left = db.get_table(parsed["left_table"])
+        right = db.get_table(parsed["right_table"])
+        rows = [right.format_row(left.format_row(r)) for r in rows]
+        pretty_print(rows)
+
+    # ================= COPY =================
+    elif cmd_type == "COPY":
+        if parsed["direction"] == "FROM":
+            count = db.copy_from(parsed["table"], parsed["path"], parsed["format"])
+            print(f"✅ {count} row(s) copied into '{parsed['table']}'.")
+        else:
+            count = db.copy_to(
+                parsed["table"], parsed["path"], parsed["format"], parsed["where"]
+            )
+            print(f"✅ {count} row(s) copied to '{parsed['path']}'.")
+
+    # ================= ARCHIVE =================
+    elif cmd_type == "ARCHIVE":
+        count = db.archive(parsed["table"], parsed["where"])
+        print(f"✅ {count} row(s) archived from '{parsed['table']}'.")
+
+    elif cmd_type == "ARCHIVE_POLICY":
+        db.set_archive_policy(parsed["table"], parsed["where"])
+        print(f"✅ Archive policy of '{parsed['table']}' {'set' if parsed['where'] else 'cleared'}.")
+
+    # ================= STATS =================
+    elif cmd_type == "STATS":
+        if parsed["reset"]:
+            db.reset_stats()
+            print("✅ Statistics reset.")
+        else:
+            print_stats(db.stats())
+
+    # ================= MEMORY =================
+    elif cmd_type == "SHOW_MEMORY":
+        db.check_memory()
+        print_memory(db.memory_usage())
+
+    else:
+        print("⚠️ Unsupported command.")
+
+
+def error_message(e):
+    if isinstance(e, ParseError):
+        return f"❌ Syntax Error: {e}"
+    if isinstance(e, KeyError):
+        return f"❌ Unknown table or column: {e}"
+    return f"❌ Error: {e}"
+
+
+# =========================
+# Interactive
+# =========================
+def interactive(db):
     print("🚀 Welcome to KopaDB")
     print("Type 'help' for commands, 'exit' to quit\n")
 
@@ -65,101 +314,78 @@ def main():
                 print_help()
                 continue
 
-            # Remove trailing semicolon
-            if cmd.endswith(";"):
-                cmd = cmd[:-1]
-
-            parsed = parse(cmd)
-            if not parsed:
-                continue
-
-            cmd_type = parsed["type"]
-
-            # ================= CREATE TABLE =================
-            if cmd_type == "CREATE_TABLE":
-                db.create_table(
-                    parsed["table"],
-                    parsed["columns"],
-                    primary_key=parsed["columns"][0][0]
-                )
-                print(f"✅ Table '{parsed['table']}' created.")
-
-            # ================= INSERT =================
-            elif cmd_type == "INSERT":
-                table = db.tables[parsed["table"]]
-                if len(parsed["values"]) != len(table.columns):
-                    raise ValueError("Column count does not match values count")
-
-                row = dict(zip(table.columns, parsed["values"]))
-                db.insert(parsed["table"], row)
-                print(f"✅ Row inserted into '{parsed['table']}'.")
-
-            # ================= SELECT =================
-            elif cmd_type == "SELECT":
-                rows = db.select_all(
-                    parsed["table"],
-                    parsed["where"]
-                )
-
-                # Column projection
-                if parsed["columns"] != ["*"]:
-                    rows = [
-                        {c: r.get(c) for c in parsed["columns"]}
-                        for r in rows
-                    ]
-
-                pretty_print(rows)
-
-            # ================= UPDATE =================
-            elif cmd_type == "UPDATE":
-                count = db.update(
-                    parsed["table"],
-                    parsed["where"],
-                    parsed["updates"]
-                )
-                print(f"✅ {count} row(s) updated.")
-
-            # ================= DELETE =================
-            elif cmd_type == "DELETE":
-                count = db.delete(
-                    parsed["table"],
-                    parsed["where"]
-                )
-                print(f"✅ {count} row(s) deleted.")
-
-            # ================= INDEX =================
-            elif cmd_type == "CREATE_INDEX":
-                db.create_index(
-                    parsed["table"],
-                    parsed["column"]
-                )
-                print(
-                    f"✅ Index created on '{parsed['column']}' "
-                    f"in '{parsed['table']}'."
-                )
-
-            # ================= JOIN =================
-            elif cmd_type == "JOIN":
-                rows = db.inner_join(
-                    parsed["left_table"],
-                    parsed["right_table"],
-                    parsed["left_key"],
-                    parsed["right_key"]
-                )
-                pretty_print(rows)
-
-            else:
-                print("⚠️ Unsupported command.")
-
-        except ParseError as pe:
-            print(f"❌ Syntax Error: {pe}")
-
-        except KeyError as ke:
-            print(f"❌ Unknown table or column: {ke}")
+            execute(db, cmd)
 
         except Exception as e:
-            print(f"❌ Error: {e}")
+            print(error_message(e))
+
+
+# =========================
+# Script mode
+# =========================
+def run_script(db, lines, flush_every=None, stop_on_error=True):
+    """
+    Run every statement in lines (one or more per line, ';'-separated,
+    '--' comments) with saves deferred: the database is written once at
+    the end, or after every flush_every statements. Each statement's
+    time is printed after its output. On an error the remaining
+    statements are skipped unless stop_on_error is False, and nothing
+    since the last flush is saved. Returns the number of failed statements.
+    """
+    executed = failed = flushes = 0
+    started = time.perf_counter()
+
+    try:
+        with db.deferred_saves():
+            for line_number, line in enumerate(lines, 1):
+                for statement in split_statements(line):
+                    if statement.lower() == "exit":
+                        return failed
+
+                    executed += 1
+                    begun = time.perf_counter()
+                    try:
+                        execute(db, statement)
+                        print(f"   ⏱ {(time.perf_counter() - begun) * 1000:.2f} ms")
+                    except Exception as e:
+                        failed += 1
+                        print(f"{error_message(e)} (line {line_number}: {statement})")
+                        if stop_on_error:
+                            raise
+
+                    if flush_every and executed % flush_every == 0 and db.flush():
+                        flushes += 1
+    except Exception:
+        print("⛔ Stopped; changes since the last flush were not saved.")
+        return failed
+    finally:
+        elapsed = time.perf_counter() - started
+        print(f"\n{executed} statement(s) in {elapsed:.2f} s, {failed} failed, {flushes} intermediate flush(es)")
+
+    return failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="KopaDB shell")
+    parser.add_argument("-f", "--file", help="run statements from a script file ('-' for stdin)")
+    parser.add_argument("--data", default="kopadb_data.json", help="database file")
+    parser.add_argument("--flush-every", type=int, help="in script mode, also save every N statements")
+    parser.add_argument("--continue-on-error", action="store_true", help="in script mode, keep going after errors")
+    args = parser.parse_args(argv)
+
+    db = Database(args.data)
+
+    if args.file is None and sys.stdin.isatty():
+        interactive(db)
+        return 0
+
+    if args.file in (None, "-"):
+        failed = run_script(db, sys.stdin, args.flush_every, not args.continue_on_error)
+    else:
+        with open(args.file, "r") as f:
+            failed = run_script(db, f, args.flush_every, not args.continue_on_error)
+    return 1 if failed else 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,267 @@
+import json
+import os
+import threading
+import time
+from .archive import all_rows
+from .predicate import from_json
+
+
+class MutationLog:
+    """
+    Append-only JSON-lines log of every mutation made through a primary
+    Database. Each entry carries a log sequence number (lsn) so followers
+    know how far they have applied.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.lsn = 0
+
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                for line in f:
+                    if line.endswith("\n"):
+                        self.lsn = json.loads(line)["lsn"]
+
+    def append(self, op, **payload):
+        self.lsn += 1
+        entry = {"lsn": self.lsn, "op": op, **payload}
+        with open(self.path, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+        return self.lsn
+
+    def checkpoint(self, tables, views=None):
+        """Replace the log with a single snapshot of the current state."""
+        self.lsn += 1
+        entry = {
+            "lsn": self.lsn,
+            "op": "snapshot",
+            "tables": snapshot(tables),
+            "views": {name: view.definition() for name, view in (views or {}).items()}
+        }
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            f.write(json.dumps(entry) + "\n")
+        os.replace(tmp, self.path)
+        return self.lsn
+
+
+def snapshot(tables):
+    data = {}
+    for name, table in tables.items():
+        data[name] = {
+            "schema": table.schema,
+            "rows": all_rows(table),  # archived rows are not archived on the replica
+            "primary_key": table.primary_key,
+            "unique_keys": table.unique_keys,
+            "indexes": list(table.indexes.keys()),
+            "index_kinds": table.index_kinds(),
+            "partial_indexes": table.partial_index_specs(),
+            "bloom_filters": list(table.blooms),
+            "partition_by": table.partition_spec() if hasattr(table, "partition_spec") else None,
+            "paged": table.page_spec() if hasattr(table, "page_spec") else None,
+            "schema_changes": table.schema_changes()
+        }
+    return data
+
+
+def apply_entry(db, entry):
+    """Replay one log entry against a Database."""
+    op = entry["op"]
+
+    if op == "snapshot":
+        db.tables = {}
+        db.views = {}
+        for name, t in entry["tables"].items():
+            db.create_table(
+                name,
+                list(t["schema"].items()),
+                primary_key=t.get("primary_key"),
+                unique_keys=t.get("unique_keys", []),
+                partition_by=t.get("partition_by"),
+                paged=t.get("paged")
+            )
+            db.tables[name].restore_schema_changes(t.get("schema_changes", {}))
+            db.tables[name].rows = db.tables[name].coerce_rows(t["rows"])
+            kinds = t.get("index_kinds", {})
+            for col in t.get("indexes", []):
+                db.create_index(name, col, kinds.get(col, "hash"))
+            for spec in t.get("partial_indexes", []):
+                db.create_index(name, spec["column"], spec["kind"], spec["where"])
+            for col in t.get("bloom_filters", []):
+                db.create_bloom_filter(name, col)
+        for name, definition in entry.get("views", {}).items():
+            db._build_view(name, definition)
+    elif op == "create_table":
+        db.create_table(
+            entry["table"],
+            [tuple(c) for c in entry["columns"]],
+            primary_key=entry.get("primary_key"),
+            unique_keys=entry.get("unique_keys"),
+            partition_by=entry.get("partition_by"),
+            paged=entry.get("paged")
+        )
+    elif op == "insert":
+        db.insert(entry["table"], entry["row"])
+    elif op == "insert_many":
+        db.insert_many(entry["table"], entry["rows"])
+    elif op == "update":
+        db.update(entry["table"], from_json(entry["where"]), entry["updates"])
+    elif op == "delete":
+        db.delete(entry["table"], from_json(entry["where"]))
+    elif op == "create_index":
+        db.create_index(
+            entry["table"], entry["column"], entry.get("kind", "hash"),
+            [tuple(c) for c in entry["where"]] if entry.get("where") else None
+        )
+    elif op == "add_column":
+        db.add_column(entry["table"], entry["column"], entry.get("dtype", "TEXT"), entry.get("default"))
+    elif op == "drop_column":
+        db.drop_column(entry["table"], entry["column"])
+    elif op == "archive":
+        db.archive(entry["table"], from_json(entry["where"]))
+    elif op == "archive_policy":
+        db.set_archive_policy(entry["table"], from_json(entry["where"]) or None)
+    elif op == "create_view":
+        db._build_view(entry["name"], entry["definition"])
+    elif op == "create_bloom_filter":
+        db.create_bloom_filter(entry["table"], entry["column"], entry.get("error_rate", 0.01))
+    else:
+        raise ValueError(f"Unknown log entry: {op}")
+
+
+class Replica:
+    """
+    Read-only follower that tails a primary's mutation log.
+
+    Reads catch up with the log first whenever the last poll is older than
+    `max_lag` seconds, so a query never sees data staler than that. They
+    hold the same lock as poll(), so a read never sees a half-applied
+    entry from the background thread.
+    """
+    def __init__(self, log_path, max_lag=1.0):
+        from .database import Database
+
+        self.log_path = log_path
+        self.max_lag = max_lag
+        self.db = Database(data_file=None)
+        self.lsn = 0
+        self._offset = 0
+        self._inode = None
+        self._last_poll = 0.0
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self.poll()
+
+    # =========================
+    # Log tailing
+    # =========================
+    def poll(self):
+        """Apply every complete entry appended since the last poll."""
+        with self._lock:
+            self._last_poll = time.monotonic()
+            if not os.path.exists(self.log_path):
+                return 0
+
+            # A checkpoint replaced the log: start over from its snapshot
+            stat = os.stat(self.log_path)
+            if stat.st_ino != self._inode or stat.st_size < self._offset:
+                self._inode = stat.st_ino
+                self._offset = 0
+
+            applied = 0
+            with open(self.log_path, "r") as f:
+                f.seek(self._offset)
+                while True:
+                    line = f.readline()
+                    if not line.endswith("\n"):
+                        break  # partial write, retry on next poll
+                    entry = json.loads(line)
+                    self._offset = f.tell()
+                    if entry["lsn"] <= self.lsn:
+                        continue
+                    apply_entry(self.db, entry)
+                    self.lsn = entry["lsn"]
+                    applied += 1
+            return applied
+
+    def start(self, interval=None):
+        """Poll in a background thread every `interval` seconds."""
+        if self._thread:
+            return
+        interval = interval or self.max_lag
+        self._stop.clear()
+
+        def run():
+            while not self._stop.wait(interval):
+                self.poll()
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def lag(self):
+        size = os.path.getsize(self.log_path) if os.path.exists(self.log_path) else 0
+        return {
+            "lsn": self.lsn,
+            "bytes_behind": max(0, size - self._offset),
+            "seconds_since_poll": time.monotonic() - self._last_poll
+        }
+
+    def _catch_up(self):
+        if time.monotonic() - self._last_poll >= self.max_lag:
+            self.poll()
+
+    def _read(self, query, *args):
+        self._catch_up()
+        with self._lock:
+            return query(*args)
+
+    # =========================
+    # Read-only queries
+    # =========================
+    def show_tables(self):
+        return self._read(self.db.show_tables)
+
+    def describe_table(self, table_name):
+        return self._read(self.db.describe_table, table_name)
+
+    def select_all(self, table_name, filters=None):
+        return self._read(self.db.select_all, table_name, filters)
+
+    def aggregate(self, table_name, func, column=None, filters=None):
+        return self._read(self.db.aggregate, table_name, func, column, filters)
+
+    def inner_join(self, left_table, right_table, left_key, right_key):
+        return self._read(self.db.inner_join, left_table, right_table, left_key, right_key)
+
+    def insert(self, *args, **kwargs):
+        raise ValueError("Replica is read-only")
+
+    update = delete = create_table = create_index = create_bloom_filter = insert
+    insert_many = copy_from = add_column = drop_column = compact_table = insert
+    archive = set_archive_policy = insert
+    create_materialized_view = insert
+
+    # =========================
+    # Failover
+    # =========================
+    def promote(self, data_file, log_path=None):
+        """
+        Stop following, apply the remaining log and return the state as a
+        writable primary Database persisted to `data_file`.
+        """
+        self.stop()
+        self.poll()
+
+        db = self.db
+        db.data_file = data_file
+        db._save_data()
+        if log_path:
+            db.enable_log_shipping(log_path)
+        return db
@@ -0,0 +1,200 @@
+"""
+Timers
+------
+A timer watches one table for rows that fall due: rows matching its
+WHERE conditions with a value in its due column sit in a min-heap keyed
+on their due time. The timer is a table observer (like a materialized
+view), so inserts, updates and deletes keep the heap current, and a
+sweep pops only the rows whose time has passed instead of scanning the
+table.
+
+Entries are removed lazily: `due` holds the live due time per primary
+key, and heap entries that no longer agree with it are dropped when
+they reach the top.
+"""
+import heapq
+import itertools
+import threading
+from engine.predicate import bind, compile_predicate, normalize
+from engine.temporal import now, to_days, to_epoch
+
+DAY = 86_400
+RETRY_DELAY = 60  # seconds before rows whose action failed fire again
+
+
+def due_time(value, dtype):
+    """
+    Epoch seconds after which a due value has passed. A DATE, or text
+    holding only a date, lasts until the end of that day.
+    """
+    if value is None:
+        return None
+    try:
+        if dtype == "DATE":
+            return (to_days(value) + 1) * DAY
+        if dtype == "TIMESTAMP":
+            return to_epoch(value)
+        text = str(value).strip()
+        return (to_days(text) + 1) * DAY if len(text) == 10 else to_epoch(text)
+    except (ValueError, TypeError):
+        return None
+
+
+class Timer:
+    def __init__(self, name, table, column, where, action):
+        if not table.primary_key:
+            raise ValueError(f"Timers need a primary key on '{table.name}'")
+        if column not in table.schema:
+            raise ValueError(f"Column '{column}' does not exist in table '{table.name}'")
+
+        self.name = name
+        self.table = table
+        self.column = column
+        self.where = normalize(where)
+        self.action = action  # action(rows) with the rows that fell due
+        self.key = table.primary_key
+        self.heap = []  # (due time, sequence, key)
+        self.due = {}  # key -> due time of its live heap entry
+        self.fired = 0
+        self._match = compile_predicate(bind(self.where, table._cast))
+        self._sequence = itertools.count()
+        table.add_observer(self)
+        self.rebuild()
+
+    # ---------------- HEAP ----------------
+    def track(self, row, retry_at=None):
+        """
+        (Re)schedule row, or forget it if it no longer qualifies.
+        retry_at postpones a row that is still due, so a failed action
+        is not retried in a busy loop.
+        """
+        key = row.get(self.key)
+        due = None
+        if self._match(row):
+            due = due_time(row.get(self.column), self.table.schema.get(self.column))
+        if due is not None and retry_at is not None:
+            due = max(due, retry_at)
+        if due is None:
+            self.due.pop(key, None)
+        elif self.due.get(key) != due:
+            self.due[key] = due
+            heapq.heappush(self.heap, (due, next(self._sequence), key))
+
+    def expired(self, moment):
+        """Keys of rows due at or before moment, taken off the heap."""
+        keys = []
+        while self.heap and self.heap[0][0] <= moment:
+            due, _, key = heapq.heappop(self.heap)
+            if self.due.get(key) == due:
+                del self.due[key]
+                keys.append(key)
+        return keys
+
+    def next_due(self):
+        while self.heap and self.due.get(self.heap[0][2]) != self.heap[0][0]:
+            heapq.heappop(self.heap)  # stale entry
+        return self.heap[0][0] if self.heap else None
+
+    def rebuild(self):
+        self.heap = []
+        self.due = {}
+        rows = self.table.iter_rows() if hasattr(self.table, "iter_rows") else self.table.rows
+        for row in rows:
+            key = row.get(self.key)
+            if self._match(row):
+                due = due_time(row.get(self.column), self.table.schema.get(self.column))
+                if due is not None:
+                    self.due[key] = due
+                    self.heap.append((due, next(self._sequence), key))
+        heapq.heapify(self.heap)
+
+    # ---------------- OBSERVER ----------------
+    def row_inserted(self, row):
+        self.track(row)
+
+    def row_deleted(self, row):
+        self.due.pop(row.get(self.key), None)
+
+    def row_updated(self, old, row):
+        if old is not None and old.get(self.key) != row.get(self.key):
+            self.due.pop(old.get(self.key), None)
+        self.track(row)
+
+    def rows_replaced(self):
+        self.rebuild()
+
+    def stats(self):
+        return {
+            "table": self.table.name,
+            "column": self.column,
+            "pending": len(self.due),
+            "next_due": self.next_due(),
+            "fired": self.fired
+        }
+
+
+class Scheduler:
+    """
+    Runs every timer's expired rows through its action, on demand with
+    run() or from a background thread with start(). Runs hold `lock`;
+    code sharing the database with the thread should hold it too.
+    """
+    def __init__(self):
+        self.timers = {}  # name -> Timer
+        self.lock = threading.RLock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def run(self, moment=None):
+        """Fire every timer whose rows are due. Returns {name: rows fired}."""
+        moment = now() if moment is None else moment
+        fired = {}
+        with self.lock:
+            for name, timer in self.timers.items():
+                keys = timer.expired(moment)
+                if not keys:
+                    continue
+                rows = timer.table.select_all([(timer.key, "IN", keys)])
+                try:
+                    timer.action(rows)
+                except Exception as e:
+                    print(f"[Database] ⚠️ Timer '{name}' failed: {e}")
+                    for row in rows:
+                        timer.track(row, moment + RETRY_DELAY)  # retried if still due
+                    continue
+                timer.fired += len(rows)
+                fired[name] = len(rows)
+        return fired
+
+    def next_due(self):
+        times = [t for t in (timer.next_due() for timer in self.timers.values()) if t is not None]
+        return min(times, default=None)
+
+    def start(self, interval=60, run=None):
+        """
+        Call run (default: self.run) from a background thread, waking
+        when the earliest row falls due and at least every `interval`
+        seconds to see new ones.
+        """
+        run = run or self.run
+        if self._thread:
+            return
+        self._stop.clear()
+
+        def loop():
+            while True:
+                run()
+                with self.lock:
+                    upcoming = self.next_due()
+                wait = interval if upcoming is None else min(interval, max(upcoming - now(), 0) + 1)
+                if self._stop.wait(wait):
+                    return
+
+        self._thread = threading.Thread(target=loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
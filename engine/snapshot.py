@@ -0,0 +1,212 @@
+"""
+Binary snapshot format
+----------------------
+  header     MAGIC, directory offset, directory length
+  segments   one per column: a null mask (1 byte per row) followed by
+             - int64 / float64: fixed-width values
+             - str / json: int64 offsets (rows + 1) and a UTF-8 blob
+             - dict: int32 codes and a JSON list of the distinct values,
+               for string columns whose values repeat
+  directory  JSON: table metadata, row counts and column segment offsets
+
+Only the header and directory are read when a snapshot is opened; column
+segments are decoded from the memory map when a table is first touched.
+"""
+import array
+import json
+import mmap
+import os
+import struct
+import sys
+from engine.dictionary import qualifies
+
+MAGIC = b"KOPADB01"
+HEADER = struct.Struct("<8sQQ")
+EXTENSION = ".kdb"
+
+INT64_MIN, INT64_MAX = -2 ** 63, 2 ** 63 - 1
+
+
+# ---------------- ENCODING ----------------
+def _encoding_for(values):
+    kinds = {type(v) for v in values if v is not None}
+    if kinds <= {int} and all(
+        INT64_MIN <= v <= INT64_MAX for v in values if v is not None
+    ):
+        return "int64"
+    if kinds <= {float}:
+        return "float64"
+    if kinds <= {str}:
+        distinct = len({v for v in values if v is not None})
+        return "dict" if qualifies(distinct, len(values)) else "str"
+    return "json"  # mixed types, kept exactly as the JSON format would
+
+
+def _encode_column(values, encoding):
+    nulls = bytes(1 if v is None else 0 for v in values)
+
+    if encoding == "int64":
+        return nulls + array.array("q", (v or 0 for v in values)).tobytes()
+    if encoding == "float64":
+        return nulls + array.array("d", (v or 0.0 for v in values)).tobytes()
+
+    if encoding == "dict":
+        dictionary = {}
+        codes = array.array("i", (
+            0 if v is None else dictionary.setdefault(v, len(dictionary))
+            for v in values
+        ))
+        return nulls + codes.tobytes() + json.dumps(list(dictionary)).encode("utf-8")
+
+    if encoding == "str":
+        parts = [(v or "").encode("utf-8") for v in values]
+    else:
+        parts = [json.dumps(v).encode("utf-8") for v in values]
+
+    offsets = array.array("q", [0])
+    total = 0
+    for part in parts:
+        total += len(part)
+        offsets.append(total)
+    return nulls + offsets.tobytes() + b"".join(parts)
+
+
+def _decode_column(data, encoding, count, swap):
+    nulls = data[:count]
+    body = data[count:]
+
+    if encoding in ("int64", "float64"):
+        values = array.array("q" if encoding == "int64" else "d")
+        values.frombytes(body[:8 * count])
+        if swap:
+            values.byteswap()
+        values = values.tolist()
+        return [None if nulls[i] else v for i, v in enumerate(values)]
+
+    if encoding == "dict":
+        codes = array.array("i")
+        codes.frombytes(body[:4 * count])
+        if swap:
+            codes.byteswap()
+        dictionary = json.loads(body[4 * count:])
+        return [None if nulls[i] else dictionary[c] for i, c in enumerate(codes)]
+
+    offsets = array.array("q")
+    offsets.frombytes(body[:8 * (count + 1)])
+    if swap:
+        offsets.byteswap()
+    blob = body[8 * (count + 1):]
+
+    result = []
+    for i in range(count):
+        if nulls[i]:
+            result.append(None)
+            continue
+        raw = blob[offsets[i]:offsets[i + 1]]
+        result.append(raw.decode("utf-8") if encoding == "str" else json.loads(raw))
+    return result
+
+
+# ---------------- WRITER ----------------
+def write_snapshot(path, entries):
+    """
+    Write a snapshot atomically.
+
+    entries maps table name -> {"meta": {...}, "rows": [...]} for tables in
+    memory, or {"meta": {...}, "source": (SnapshotReader, name)} to copy a
+    table that was never materialized straight from an older snapshot.
+    """
+    tmp = path + ".tmp"
+    directory = {}
+
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, 0, 0))
+
+        for name, entry in entries.items():
+            columns = []
+
+            if "source" in entry and entry["source"][0]._swap:
+                # Written on a machine with the other byte order: re-encode
+                reader, source = entry["source"]
+                entry = {"meta": entry["meta"], "rows": reader.load_rows(source)}
+
+            if "source" in entry:
+                reader, source = entry["source"]
+                row_count = reader.tables[source]["row_count"]
+                for col in reader.tables[source]["columns"]:
+                    data = reader.segment(col)
+                    columns.append({**col, "offset": f.tell(), "length": len(data)})
+                    f.write(data)
+            else:
+                rows = entry["rows"]
+                row_count = len(rows)
+
+                # Schema columns first, then any extra keys rows picked up
+                names = list(entry["meta"].get("schema", {}))
+                seen = set(names)
+                for row in rows:
+                    for key in row:
+                        if key not in seen:
+                            seen.add(key)
+                            names.append(key)
+
+                for col in names:
+                    values = [r.get(col) for r in rows]
+                    encoding = _encoding_for(values)
+                    data = _encode_column(values, encoding)
+                    columns.append({
+                        "name": col,
+                        "encoding": encoding,
+                        "offset": f.tell(),
+                        "length": len(data)
+                    })
+                    f.write(data)
+
+            directory[name] = {**entry["meta"], "row_count": row_count, "columns": columns}
+
+        blob = json.dumps({"byteorder": sys.byteorder, "tables": directory}).encode("utf-8")
+        offset = f.tell()
+        f.write(blob)
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, offset, len(blob)))
+
+    os.replace(tmp, path)
+
+
+# ---------------- READER ----------------
+class SnapshotReader:
+    """
+    Memory-maps a snapshot and decodes tables on demand.
+    """
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, offset, length = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self._mm.close()
+            raise ValueError(f"'{path}' is not a KopaDB snapshot")
+
+        directory = json.loads(self._mm[offset:offset + length])
+        self.tables = directory["tables"]
+        self._swap = directory["byteorder"] != sys.byteorder
+
+    def segment(self, col):
+        return self._mm[col["offset"]:col["offset"] + col["length"]]
+
+    def load_rows(self, name):
+        entry = self.tables[name]
+        count = entry["row_count"]
+        if not count:
+            return []
+
+        names = [col["name"] for col in entry["columns"]]
+        values = [
+            _decode_column(self.segment(col), col["encoding"], count, self._swap)
+            for col in entry["columns"]
+        ]
+        return [dict(zip(names, row)) for row in zip(*values)]
+
+    def close(self):
+        self._mm.close()
@@ -0,0 +1,124 @@
+"""
+Query instrumentation
+---------------------
+Database times every operation (select, insert, update, delete,
+aggregate, join, persist) and tables report each select's plan: whether
+an index answered it, how many rows were scanned and how many returned.
+Operations slower than the threshold go to the slow-query log.
+
+Counters are cheap enough to stay on; db.stats() reads them.
+"""
+import bisect
+import collections
+import datetime
+import json
+
+# Upper bounds of the latency buckets, in milliseconds
+BUCKETS_MS = [0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+
+def _round(ms):
+    return None if ms is None else round(ms, 3)
+
+
+class Histogram:
+    """Latency counts in fixed, roughly logarithmic buckets."""
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)  # last bucket is open-ended
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, ms):
+        self.counts[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, p):
+        """Upper bound of the bucket holding the p-th percentile."""
+        if not self.count:
+            return None
+        rank = p / 100 * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                return min(BUCKETS_MS[i], self.max_ms) if i < len(BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else None,
+            "p50_ms": _round(self.percentile(50)),
+            "p95_ms": _round(self.percentile(95)),
+            "p99_ms": _round(self.percentile(99)),
+            "max_ms": round(self.max_ms, 3),
+            "buckets": {
+                (f"<={b}" if i < len(BUCKETS_MS) else f">{BUCKETS_MS[-1]}"): n
+                for i, (b, n) in enumerate(zip(BUCKETS_MS + [None], self.counts)) if n
+            }
+        }
+
+
+class QueryStats:
+    """
+    Latency histograms per operation and phase, per-table scan counters
+    and the slow-query log (the last `slow_limit` entries in memory, and
+    every entry appended to `slow_log` as JSON lines when set).
+    """
+    def __init__(self, slow_ms=100, slow_log=None, slow_limit=100):
+        self.slow_ms = slow_ms
+        self.slow_log = slow_log
+        self.reset(slow_limit)
+
+    def reset(self, slow_limit=None):
+        self.latency = collections.defaultdict(Histogram)  # operation or phase -> Histogram
+        self.tables = collections.defaultdict(lambda: {
+            "selects": 0,
+            "index_hits": 0,
+            "full_scans": 0,
+            "rows_scanned": 0,
+            "rows_returned": 0
+        })
+        limit = slow_limit or self.slow.maxlen
+        self.slow = collections.deque(maxlen=limit)
+
+    def record(self, op, table, seconds, detail=None):
+        """One finished operation; slow ones are logged."""
+        ms = seconds * 1000
+        self.latency[op].add(ms)
+        if self.slow_ms is None or ms < self.slow_ms:
+            return
+
+        entry = {
+            "time": datetime.datetime.now().isoformat(timespec="seconds"),
+            "op": op,
+            "table": table,
+            "ms": round(ms, 3),
+            "detail": detail
+        }
+        self.slow.append(entry)
+        if self.slow_log:
+            with open(self.slow_log, "a") as f:
+                f.write(json.dumps(entry, default=str) + "\n")
+
+    def scan(self, table, indexed, scanned, returned, plan_seconds=0.0, execute_seconds=0.0):
+        """One select as a table executed it."""
+        counters = self.tables[table.split("#")[0]]  # partitions count toward their table
+        counters["selects"] += 1
+        counters["index_hits" if indexed else "full_scans"] += 1
+        counters["rows_scanned"] += scanned
+        counters["rows_returned"] += returned
+        self.latency["plan"].add(plan_seconds * 1000)
+        self.latency["execute"].add(execute_seconds * 1000)
+
+    def snapshot(self):
+        return {
+            "latency": {op: h.summary() for op, h in sorted(self.latency.items())},
+            "tables": {name: dict(c) for name, c in sorted(self.tables.items())},
+            "slow_queries": list(self.slow),
+            "slow_query_ms": self.slow_ms
+        }
@@ -1,9 +1,22 @@
 import datetime
-from engine.index import Index
+import time
+from engine.bloom import BloomFilter
+from engine.dictionary import canonicalize, qualifies
+from engine.index import Index, Bitmap, BitmapIndex, NgramIndex, RowIds, SortedIndex
+from engine.memory import table_usage
+from engine.temporal import FORMATTERS, now, to_days, to_epoch
+from engine.zonemap import ZONE_ROWS, ZoneMap
+from engine.predicate import (
+    RANGE_OPERATORS, bind, compile_predicate, like_fragment, like_prefix, normalize
+)
 
 
 class Table:
-    SUPPORTED_TYPES = {"INT", "FLOAT", "TEXT", "TIMESTAMP"}
+    SUPPORTED_TYPES = {"INT", "FLOAT", "TEXT", "TIMESTAMP", "DATE"}
+    executor = None  # optional ParallelExecutor for large scans
+    stats = None  # optional QueryStats told about every select
+    archive = None  # optional ArchiveStore of rows moved out of memory
+    archive_policy = None  # conditions archive_rows() uses by default
 
     def __init__(self, name, columns, primary_key=None, unique_keys=None):
         self.name = name
@@ -24,8 +37,96 @@ class Table:
 
         self.primary_key = primary_key
         self.unique_keys = unique_keys or []
-        self.rows = []
+        self._rows = []
+        self._loader = None  # deferred row source, see defer_rows()
+        self._restored = {}  # column -> (entries, row_count) from disk
         self.indexes = {}  # column -> Index
+        self.partial_indexes = {}  # name -> Index with a predicate
+        self.row_ids = None  # RowIds, created with the first index that needs them
+        self.blooms = {}  # column -> BloomFilter
+        self.dictionaries = {}  # TEXT column -> {value: canonical value}
+        self.version = 0  # bumped on every mutation
+        self.schema_version = 0  # bumped by add_column / drop_column
+        self.defaults = {}  # column added by ALTER -> value for rows stored before it
+        self.dropped = set()  # dropped columns that stored rows may still hold
+        self._stale = False  # rows in memory predate the last ALTER
+        self.observers = []  # e.g. materialized views, told about every change
+        self._memory = (None, None)  # (stamp, usage) cache for memory()
+        self._zones = None  # ZoneMap per ZONE_ROWS rows, built by the first scan that can use them
+        self._zone_pending = {}  # id(row) -> row updated since, not yet in its zone
+        self.zone_skips = 0  # zones scans did not have to read
+
+    # ---------------- STORAGE ----------------
+    @property
+    def rows(self):
+        if self._loader is not None:
+            loader, self._loader = self._loader, None
+            self._rows = self._apply_schema(loader())
+            self._stale = False
+            self._zones = None
+            self._build_dictionaries()
+            self._build_indexes()
+        elif self._stale:
+            self._apply_schema(self._rows)
+            self._stale = False
+        return self._rows
+
+    @rows.setter
+    def rows(self, rows):
+        self._loader = None
+        self._rows = self._apply_schema(rows)
+        self._stale = False
+        self._zones = None
+        self._build_dictionaries()
+        self._build_indexes()
+        self._build_blooms()
+        self.version += 1
+        for observer in self.observers:
+            observer.rows_replaced()
+
+    def _build_indexes(self, names=None):
+        if names is None and self.row_ids is not None:
+            self.row_ids.reset(self._rows)
+
+        all_indexes = self._named_indexes()
+        for name in names or list(all_indexes):
+            idx = all_indexes[name]
+            entries, row_count = self._restored.pop(name, (None, None))
+            if entries is not None and row_count == len(self._rows):
+                idx.load(entries, self._rows)
+            elif idx.predicate:
+                idx.rebuild([r for r in self._rows if self._covers(idx, r)])
+            else:
+                idx.rebuild(self._rows)
+
+    def _build_dictionaries(self):
+        """Share one string object per value in repetitive TEXT columns."""
+        self.dictionaries = {}
+        for col in self.columns:
+            if self.schema[col] != "TEXT":
+                continue
+            canonical = canonicalize(self._rows, col)
+            if canonical is not None and qualifies(len(canonical), len(self._rows)):
+                self.dictionaries[col] = canonical
+
+    def _build_blooms(self, columns=None):
+        for col in columns or list(self.blooms):
+            error_rate = self.blooms[col].error_rate if col in self.blooms else 0.01
+            self.blooms[col] = BloomFilter.build(
+                (r.get(col) for r in self._rows), error_rate
+            )
+
+    @property
+    def loaded(self):
+        return self._loader is None
+
+    def defer_rows(self, loader):
+        """
+        Materialize rows from loader() only when they are first touched.
+        Indexes created before then are built at that point.
+        """
+        self._loader = loader
+        self._rows = []
 
     # ---------------- INTERNAL ----------------
     def _cast(self, column, value):
@@ -42,11 +143,13 @@ class Table:
             if dtype == "FLOAT":
                 return float(value)
             if dtype == "TEXT":
-                return str(value)
+                value = str(value)
+                dictionary = self.dictionaries.get(column)
+                return value if dictionary is None else dictionary.get(value, value)
             if dtype == "TIMESTAMP":
-                if isinstance(value, datetime.datetime):
-                    return value.isoformat()
-                return str(value)
+                return to_epoch(value)
+            if dtype == "DATE":
+                return to_days(value)
         except (ValueError, TypeError):
             raise ValueError(
                 f"Cannot cast {value!r} to {dtype} for column '{column}'"
@@ -54,116 +157,839 @@ class Table:
 
         return value
 
+    def _intern(self, column, value):
+        """Canonical object for a stored value, growing the column dictionary."""
+        dictionary = self.dictionaries.get(column)
+        if dictionary is None or value is None:
+            return value
+        return dictionary.setdefault(value, value)
+
+    def _temporal_columns(self):
+        return [col for col in self.columns if self.schema[col] in FORMATTERS]
+
+    def coerce_rows(self, rows):
+        """Convert TIMESTAMP/DATE values saved as text by older versions."""
+        columns = self._temporal_columns()
+        for row in rows:
+            for col in columns:
+                value = row.get(col)
+                if value is not None and not isinstance(value, int):
+                    row[col] = self._cast(col, value)
+        return rows
+
+    def format_row(self, row):
+        """Copy of row with TIMESTAMP/DATE values rendered as ISO text."""
+        columns = self._temporal_columns()
+        if not columns:
+            return row
+        shown = dict(row)
+        for col in columns:
+            if isinstance(shown.get(col), int):
+                shown[col] = FORMATTERS[self.schema[col]](shown[col])
+        return shown
+
+    def _link(self, row):
+        """Append a prepared row and register it with every index."""
+        self.rows.append(row)
+        self._zone_extend(len(self._rows) - 1)
+        if self.row_ids is not None:
+            self.row_ids.assign(row)
+        self._index_add(row)
+        self.version += 1
+        notified = []
+        try:
+            for observer in self.observers:
+                observer.row_inserted(row)
+                notified.append(observer)
+        except Exception:
+            # Take the row back out, so a failing observer leaves no half-inserted row
+            failed = self.observers[len(notified)]
+            observers, self.observers = self.observers, notified
+            try:
+                self._unlink(row)
+            finally:
+                self.observers = observers
+            failed.rows_replaced()
+            raise
+
+    def _unlink(self, row):
+        """Remove a row from storage and from every index."""
+        self._index_remove(row)
+        if self.row_ids is not None:
+            self.row_ids.release(row)
+        position = self.rows.index(row)
+        del self._rows[position]
+        self._zone_shift(position)
+        self._zone_pending.pop(id(row), None)
+        self.version += 1
+        for observer in self.observers:
+            observer.row_deleted(row)
+
+    def add_observer(self, observer):
+        """
+        observer gets row_inserted(row), row_deleted(row),
+        row_updated(old_values, row) and rows_replaced() calls.
+        """
+        self.observers.append(observer)
+
+    def _named_indexes(self):
+        return {**self.indexes, **self.partial_indexes}
+
+    def _covers(self, idx, row):
+        """True if row belongs in idx (always, unless idx is partial)."""
+        if not idx.predicate:
+            return True
+        return all(row.get(col) == want for col, want in idx.predicate)
+
+    def _index_add(self, row):
+        for idx in self.indexes.values():
+            idx.add(row[idx.column], row)
+        for idx in self.partial_indexes.values():
+            if self._covers(idx, row):
+                idx.add(row[idx.column], row)
+        for col, bloom in self.blooms.items():
+            bloom.add(row.get(col))
+            if bloom.full:
+                self._build_blooms([col])
+
+    def _may_contain(self, column, value):
+        """False only if a Bloom filter proves no row has column == value."""
+        bloom = self.blooms.get(column)
+        return bloom is None or value in bloom
+
+    def _index_remove(self, row):
+        for idx in self.indexes.values():
+            idx.remove(row[idx.column], row)
+        for idx in self.partial_indexes.values():
+            if self._covers(idx, row):
+                idx.remove(row[idx.column], row)
+
+    def _new_index(self, column, kind):
+        if kind == "hash":
+            return Index(column)
+        kinds = {"bitmap": BitmapIndex, "sorted": SortedIndex, "ngram": NgramIndex}
+        if kind in kinds:
+            if self.row_ids is None:
+                self.row_ids = RowIds()
+                self.row_ids.reset(self._rows)
+            return kinds[kind](column, self.row_ids)
+        raise ValueError(f"Unsupported index type: {kind}")
+
     # ---------------- INSERT ----------------
-    def insert(self, row):
+    def _prepare(self, row):
+        """Stored form of an incoming row: every column, cast, missing ones defaulted."""
         new_row = {}
-
         for col in self.columns:
             if col in row:
-                new_row[col] = self._cast(col, row[col])
+                new_row[col] = self._intern(col, self._cast(col, row[col]))
+            elif self.defaults.get(col) is not None:
+                new_row[col] = self.defaults[col]
             elif self.schema[col] == "TIMESTAMP":
-                new_row[col] = datetime.datetime.now().isoformat()
+                new_row[col] = now()
             else:
                 new_row[col] = None
+        return new_row
+
+    def insert(self, row):
+        new_row = self._prepare(row)
 
-        # Primary key constraint
+        # Primary key constraint (a Bloom filter miss proves it is new)
         if self.primary_key:
             pk_val = new_row[self.primary_key]
-            for r in self.rows:
-                if r[self.primary_key] == pk_val:
-                    raise ValueError(
-                        f"Primary key violation on {self.primary_key} = {pk_val}"
-                    )
+            if self._may_contain(self.primary_key, pk_val):
+                for r in self.rows:
+                    if r[self.primary_key] == pk_val:
+                        raise ValueError(
+                            f"Primary key violation on {self.primary_key} = {pk_val}"
+                        )
 
         # Unique constraints
         for uk in self.unique_keys:
             uk_val = new_row[uk]
-            for r in self.rows:
-                if r[uk] == uk_val:
-                    raise ValueError(
-                        f"Unique constraint violation on {uk} = {uk_val}"
-                    )
-
-        self.rows.append(new_row)
-
-        # Update indexes
-        for col, idx in self.indexes.items():
-            idx.add(new_row[col], new_row)
-
+            if self._may_contain(uk, uk_val):
+                for r in self.rows:
+                    if r[uk] == uk_val:
+                        raise ValueError(
+                            f"Unique constraint violation on {uk} = {uk_val}"
+                        )
+
+        self._check_archived([new_row])
+        self._link(new_row)
         return new_row
 
+    def key_values(self):
+        """{key column: set of stored values} for bulk constraint checks."""
+        rows = self.rows
+        return {
+            col: {r[col] for r in rows}
+            for col in [self.primary_key] + self.unique_keys if col
+        }
+
+    def _check_keys(self, rows, keys):
+        """Raise if prepared rows collide with keys or with each other."""
+        for col, existing in keys.items():
+            seen = set()
+            for row in rows:
+                value = row[col]
+                if value in existing or value in seen:
+                    kind = "Primary key" if col == self.primary_key else "Unique constraint"
+                    raise ValueError(f"{kind} violation on {col} = {value}")
+                seen.add(value)
+
+    def _check_archived(self, rows):
+        """Raise if prepared rows reuse a key held by an archived row."""
+        if self.archive is None or not self.archive.segments:
+            return
+        for col in [self.primary_key] + self.unique_keys:
+            if not col:
+                continue
+            found = self.archive.existing(col, {row[col] for row in rows})
+            if found:
+                kind = "Primary key" if col == self.primary_key else "Unique constraint"
+                raise ValueError(f"{kind} violation on {col} = {min(found, key=repr)}")
+
+    def insert_many(self, rows, keys=None):
+        """
+        Insert a batch. Every row is cast and checked before any is
+        stored, so a failing batch changes nothing. keys is key_values()
+        kept by the caller across batches, so a bulk load scans the
+        existing rows once instead of once per row.
+        A batch at least as large as the table rebuilds indexes, Bloom
+        filters and dictionaries in one pass instead of row by row.
+        """
+        prepared = [self._prepare(row) for row in rows]
+        if not prepared:
+            return prepared
+
+        keys = self.key_values() if keys is None else keys
+        self._check_keys(prepared, keys)
+        self._check_archived(prepared)
+        for col, existing in keys.items():
+            existing.update(row[col] for row in prepared)
+
+        self._append(prepared)
+        return prepared
+
+    def _append(self, prepared):
+        """Store checked rows and bring indexes and observers up to date."""
+        if not prepared:
+            return
+        rebuild = len(prepared) >= len(self.rows)
+        self.rows.extend(prepared)
+        if rebuild:
+            self._zones = None
+            self._build_dictionaries()
+            self._build_indexes()
+            self._build_blooms()
+        else:
+            self._zone_extend(len(self._rows) - len(prepared))
+            for row in prepared:
+                if self.row_ids is not None:
+                    self.row_ids.assign(row)
+                self._index_add(row)
+
+        self.version += 1
+        try:
+            for observer in self.observers:
+                if rebuild:
+                    observer.rows_replaced()
+                else:
+                    for row in prepared:
+                        observer.row_inserted(row)
+        except Exception:
+            # Drop the whole batch again; observers are rebuilt from what is left
+            self.rows = self._rows[:-len(prepared)]
+            raise
+
     # ---------------- SELECT ----------------
     def select_all(self, filters=None):
+        """
+        filters is a list of ANDed conditions, see engine.predicate:
+        (column, value) pairs, (column, op, value) triples and
+        {"and"|"or"|"not": ...} groups.
+        Archived rows that match follow the rows in memory.
+        """
+        result = self._select(filters)
+        if self.archive is not None and self.archive.segments:
+            conditions = bind(normalize(filters), self._cast) if filters else []
+            result.extend(self.archive.scan(conditions, self._apply_schema, self.schema))
+        return result
+
+    def _select(self, filters):
+        """Matching rows in memory; what update and delete act on."""
         if not filters:
-            return list(self.rows)
-
-        result = self.rows
+            result = list(self.rows)
+            if self.stats:
+                self.stats.scan(self.name, False, len(result), len(result))
+            return result
+
+        started = time.perf_counter()
+        conditions = bind(normalize(filters), self._cast)
+        comparisons = [c for c in conditions if isinstance(c, tuple)]
+
+        # Checked before self.rows so a miss never loads deferred rows
+        if any(op == "=" and not self._may_contain(col, want) for col, op, want in comparisons):
+            if self.stats:
+                self.stats.scan(self.name, True, 0, 0, time.perf_counter() - started)
+            return []
+
+        self.rows  # materialize deferred rows, which also builds their indexes
+        candidates, answered = self._plan(comparisons, conditions)
+        remaining = [c for c in conditions if c not in answered]
+        indexed = candidates is not self._rows
+        ranges = None
+        if not indexed and remaining:
+            ranges = self._zone_ranges(remaining)
+            candidates = self._rows_in(ranges)
+        planned = time.perf_counter()
+
+        result = None
+        if not remaining:
+            result = list(candidates)
+        elif ranges and self.executor and len(candidates) >= self.executor.threshold:
+            result = self.executor.filter(self, remaining, ranges)
+        if result is None:
+            match = compile_predicate(remaining)
+            result = [r for r in candidates if match(r)]
+
+        if self.stats:
+            self.stats.scan(
+                self.name, indexed, len(candidates), len(result),
+                planned - started, time.perf_counter() - planned
+            )
+        return result
 
-        for col, want in filters:
-            want = self._cast(col, want)
+    def _plan(self, comparisons, conditions=()):
+        """
+        Narrow the rows to scan using indexes, given the top-level
+        (column, op, value) comparisons and all top-level conditions.
+        Returns (candidate rows, conditions every candidate already meets).
+        """
+        filters = [(col, want) for col, op, want in comparisons if op == "="]
+        indexed = [(col, want) for col, want in filters if col in self.indexes]
+        partial, covered, covered_column = self._pick_partial(filters)
+
+        bitmaps = self._plan_bitmaps(indexed, conditions)
+        if bitmaps:
+            # AND every indexed filter as a bitmap before touching rows
+            bits = None
+            for cond, b in bitmaps:
+                bits = b if bits is None else bits & b
+            return self.row_ids.rows(bits), [cond for cond, _ in bitmaps]
+
+        if partial and covered_column:
+            return partial.peek(covered_column[1]), [(col, "=", want) for col, want in covered]
+
+        if indexed:
+            col, want = indexed[0]
+            return self.indexes[col].peek(want), [(col, "=", want)]
+
+        if partial:
+            return partial.all_rows(), [(col, "=", want) for col, want in covered]
+
+        for cond in comparisons:
+            col, op, want = cond
+            idx = self.indexes.get(col)
+            if idx is None:
+                continue
+            if op == "IN" and idx.kind != "ngram":
+                candidates = []
+                for value in dict.fromkeys(want):
+                    candidates.extend(idx.peek(value))
+                return candidates, [cond]
+            if op in RANGE_OPERATORS and idx.kind == "sorted":
+                return self._plan_range(idx, comparisons)
+            if op == "LIKE" and idx.kind == "sorted" and like_prefix(want) is not None:
+                return idx.lookup_prefix(like_prefix(want)), [cond]
+            if op == "LIKE" and idx.kind == "ngram":
+                # Trigram matches are candidates; the LIKE still runs on them
+                return idx.lookup_substring(like_fragment(want)), []
+
+        return self.rows, []
+
+    def _plan_bitmaps(self, indexed, conditions):
+        """
+        [(condition, Bitmap of the rows meeting it)] for every top-level
+        condition an index answers, if a bitmap index answers one: = on
+        any index, and IN, != and NOT (= / IN) on bitmap indexes. Empty
+        when no bitmap index applies.
+        """
+        bitmaps = []
+        for cond in conditions:
+            negated = isinstance(cond, dict) and "not" in cond and isinstance(cond["not"], tuple)
+            if not (isinstance(cond, tuple) or negated):
+                continue
+            col, op, want = cond["not"] if negated else cond
+            idx = self.indexes.get(col)
+            if idx is None or idx.kind != "bitmap":
+                continue
+
+            if op == "=" and negated:
+                bits = idx.bitmap_not(want)
+            elif op == "=":
+                bits = idx.bitmap(want)
+            elif op == "IN" and negated:
+                bits = self.row_ids.live - idx.bitmap_in(want)
+            elif op == "IN":
+                bits = idx.bitmap_in(want)
+            elif op == "!=" and not negated:
+                bits = idx.bitmap_not(want) - idx.bitmap(None)  # NULL never satisfies !=
+            else:
+                continue
+            bitmaps.append((cond, bits))
+        if not bitmaps:
+            return []
+
+        # Hash-indexed equalities join the AND through the shared row ids
+        for col, want in indexed:
+            if self.indexes[col].kind != "bitmap":
+                bits = Bitmap()
+                for row in self.indexes[col].peek(want):
+                    bits.add(self.row_ids.get(row))
+                bitmaps.append(((col, "=", want), bits))
+        return bitmaps
+
+    def _plan_range(self, idx, comparisons):
+        """Combine every range condition on a sorted index's column."""
+        low = high = None  # (value, inclusive)
+        answered = []
+        for cond in comparisons:
+            col, op, want = cond
+            if col != idx.column or op not in RANGE_OPERATORS:
+                continue
+            answered.append(cond)
+            bound = (want, op in (">=", "<="))
+            if op in (">", ">="):
+                if low is None or want > low[0] or (want == low[0] and not bound[1]):
+                    low = bound
+            elif high is None or want < high[0] or (want == high[0] and not bound[1]):
+                high = bound
+
+        candidates = idx.lookup_range(low, high)
+        if candidates is None:
+            return self.rows, []  # bounds the index cannot order: scan
+        return candidates, answered
+
+    def _pick_partial(self, filters):
+        """
+        Find a partial index whose predicate the equality filters imply.
+        Returns (index, filters it answers, filter on its column or None),
+        preferring an index whose column is filtered on too.
+        """
+        pairs = set(filters)
+        best = (None, set(), None)
+        for idx in self.partial_indexes.values():
+            predicate = set(idx.predicate)
+            if not predicate <= pairs:
+                continue
+            for col, want in filters:
+                if col == idx.column:
+                    return idx, predicate | {(col, want)}, (col, want)
+            if best[0] is None:
+                best = (idx, predicate, None)
+        return best
+
+    # ---------------- ZONE MAPS ----------------
+    def _zone_ranges(self, conditions):
+        """
+        (start, end) positions of the zones whose min / max / NULL counts
+        do not rule conditions out, in table order. Tables under two
+        zones are scanned whole.
+        """
+        rows = self._rows
+        if len(rows) < 2 * ZONE_ROWS:
+            return [(0, len(rows))]
+
+        if self._zones is None:
+            self._zones = [
+                ZoneMap.build(rows[start:start + ZONE_ROWS], self.columns)
+                for start in range(0, len(rows), ZONE_ROWS)
+            ]
+            self._zone_pending = {}
+        elif self._zone_pending:
+            self._zone_sync()
+
+        kept = [k for k, zones in enumerate(self._zones) if zones.may_match(conditions)]
+        self.zone_skips += len(self._zones) - len(kept)
+        ranges = []
+        for k in kept:
+            start, end = k * ZONE_ROWS, min((k + 1) * ZONE_ROWS, len(rows))
+            if ranges and ranges[-1][1] == start:
+                ranges[-1] = (ranges[-1][0], end)
+            else:
+                ranges.append((start, end))
+        return ranges
+
+    def _rows_in(self, ranges):
+        """Rows at the (start, end) position ranges; the row list itself if that is all of it."""
+        if ranges == [(0, len(self._rows))]:
+            return self._rows
+        candidates = []
+        for start, end in ranges:
+            candidates.extend(self._rows[start:end])
+        return candidates
+
+    def scan_ranges(self, filters):
+        """
+        (conditions, position ranges) to scan in memory for filters, or
+        None when an index narrows the rows or rows are archived. Lets
+        a parallel executor aggregate without materializing the matches.
+        """
+        if self.archive is not None and self.archive.segments:
+            return None
+        self.rows
+        if not filters:
+            return [], [(0, len(self._rows))]
+
+        conditions = bind(normalize(filters), self._cast)
+        comparisons = [c for c in conditions if isinstance(c, tuple)]
+        if any(op == "=" and not self._may_contain(col, want) for col, op, want in comparisons):
+            return conditions, []
+        candidates, _ = self._plan(comparisons, conditions)
+        if candidates is not self._rows:
+            return None
+        return conditions, self._zone_ranges(conditions)
 
-            if col in self.indexes:
-                result = self.indexes[col].lookup(want)
+    def _zone_extend(self, start):
+        """Cover rows appended from position start."""
+        zones = self._zones
+        if zones is None:
+            return
+        for position in range(start, len(self._rows)):
+            k = position // ZONE_ROWS
+            if k == len(zones):
+                zones.append(ZoneMap.build([self._rows[position]], self.columns))
             else:
-                result = [r for r in result if r.get(col) == want]
+                zones[k].add(self._rows[position])
+
+    def _zone_shift(self, position):
+        """
+        A row was deleted at position: every later row moved back one, so
+        each following zone takes in the first row of the zone after it.
+        """
+        zones = self._zones
+        if zones is None:
+            return
+        for k in range(position // ZONE_ROWS, len(zones)):
+            last = (k + 1) * ZONE_ROWS - 1
+            if last < len(self._rows):
+                zones[k].add(self._rows[last])
+
+    def _zone_touch(self, row):
+        """
+        row was changed in place; its zone is widened before the next
+        scan. Rows changed without telling the table are not covered.
+        """
+        if self._zones is not None:
+            self._zone_pending[id(row)] = row
 
-        return list(result)
+    def _zone_sync(self):
+        """
+        Widen the zones of rows updated since the last scan. Recently
+        inserted rows are the ones usually updated, so search from the end.
+        """
+        pending = self._zone_pending
+        rows = self._rows
+        for position in range(len(rows) - 1, -1, -1):
+            row = rows[position]
+            if id(row) in pending:
+                self._zones[position // ZONE_ROWS].add(row)
+                del pending[id(row)]
+                if not pending:
+                    break
+        pending.clear()
+
+    def zone_specs(self):
+        return {
+            "zones": len(self._zones) if self._zones is not None else 0,
+            "rows_per_zone": ZONE_ROWS,
+            "zones_skipped": self.zone_skips
+        }
 
     # ---------------- UPDATE ----------------
     def update(self, filters, updates):
-        rows = self.select_all(filters)
+        rows = self._select(filters)
         count = len(rows)
+        stamp = "updated_at" in self.schema and "updated_at" not in updates
 
         for row in rows:
+            old = dict(row) if self.observers else None
+
             # Remove from indexes
-            for col, idx in self.indexes.items():
-                idx.remove(row[col], row)
+            self._index_remove(row)
 
             for col, val in updates.items():
                 if col in self.schema:
-                    row[col] = self._cast(col, val)
+                    row[col] = self._intern(col, self._cast(col, val))
+
+            if stamp:
+                row["updated_at"] = self._cast("updated_at", datetime.datetime.now().isoformat())
 
-            if "updated_at" in self.schema:
-                row["updated_at"] = datetime.datetime.now().isoformat()
+            # Re-add to indexes; rows may enter or leave partial indexes
+            self._index_add(row)
+            self._zone_touch(row)
 
-            # Re-add to indexes
-            for col, idx in self.indexes.items():
-                idx.add(row[col], row)
+            for observer in self.observers:
+                observer.row_updated(old, row)
 
+        if count:
+            self.version += 1
         return count
 
     # ---------------- DELETE ----------------
     def delete(self, filters):
-        to_delete = self.select_all(filters)
+        to_delete = self._select(filters)
         count = len(to_delete)
 
         for row in to_delete:
-            for col, idx in self.indexes.items():
-                idx.remove(row[col], row)
-            self.rows.remove(row)
+            self._unlink(row)
 
         return count
 
+    # ---------------- ALTER ----------------
+    def add_column(self, column, dtype="TEXT", default=None):
+        """
+        Add a column by changing the schema only. Rows stored before it
+        get default when they are next read; new rows get it when they
+        leave the column out.
+        """
+        dtype = dtype.upper()
+        if dtype not in self.SUPPORTED_TYPES:
+            raise ValueError(f"Unsupported type: {dtype}")
+        if column in self.schema:
+            raise ValueError(f"Column '{column}' already exists in table '{self.name}'")
+        if column in self.dropped:
+            raise ValueError(
+                f"Column '{column}' was dropped and old rows may still hold it; "
+                f"compact '{self.name}' before adding it again"
+            )
+
+        self.schema[column] = dtype
+        self.columns.append(column)
+        self.defaults[column] = self._cast(column, default)
+        self.schema_version += 1
+        self._stale = True
+        self._zones = None
+
+    def drop_column(self, column):
+        """
+        Remove a column from the schema along with its indexes, Bloom
+        filter and dictionary. Stored rows lose the value when next read.
+        """
+        if column not in self.schema:
+            raise ValueError(f"Column '{column}' does not exist in table '{self.name}'")
+        if column == self.primary_key or column in self.unique_keys:
+            raise ValueError(f"Cannot drop key column '{column}'")
+
+        del self.schema[column]
+        self.columns.remove(column)
+        self.indexes.pop(column, None)
+        for name, idx in list(self.partial_indexes.items()):
+            if idx.column == column or any(col == column for col, _ in idx.predicate):
+                del self.partial_indexes[name]
+        self._restored = {
+            name: entry for name, entry in self._restored.items()
+            if name in self._named_indexes()
+        }
+        self.blooms.pop(column, None)
+        self.dictionaries.pop(column, None)
+        self.defaults.pop(column, None)
+        self.dropped.add(column)
+        self.schema_version += 1
+        self._stale = True
+        self._zones = None
+
+    def _apply_schema(self, rows):
+        """Give rows the defaults of columns added since they were stored and drop removed ones."""
+        if self.defaults or self.dropped:
+            for row in rows:
+                for col, default in self.defaults.items():
+                    if col not in row:
+                        row[col] = default
+                for col in self.dropped:
+                    row.pop(col, None)
+        return rows
+
+    def compact(self):
+        """
+        Bring every row up to the current schema; once the rows are
+        written out, no stored row holds a dropped column.
+        Returns the number of rows.
+        """
+        rows = self.rows
+        if self.archive is None or not self.archive.segments:
+            self.dropped = set()  # archived rows are never rewritten
+        return len(rows)
+
+    def schema_changes(self):
+        return {
+            "schema_version": self.schema_version,
+            "defaults": self.defaults,
+            "dropped": sorted(self.dropped)
+        }
+
+    def restore_schema_changes(self, spec):
+        """Set before rows are loaded, so they are upgraded as they arrive."""
+        self.schema_version = spec.get("schema_version", 0)
+        self.defaults = dict(spec.get("defaults", {}))
+        self.dropped = set(spec.get("dropped", []))
+
+    # ---------------- ARCHIVE ----------------
+    def attach_archive(self, store, policy=None):
+        self.archive = store
+        self.archive_policy = policy
+
+    def archive_rows(self, filters):
+        """
+        Move the rows matching filters into the archive, in one pass over
+        the rows. Observers are not told: the rows are still part of the
+        table, only no longer in memory. Returns the number of rows moved.
+        """
+        moving = self._select(filters)
+        if not moving:
+            return 0
+
+        keys = [col for col in [self.primary_key] + self.unique_keys if col]
+        self.archive.append(moving, self.columns, keys)
+
+        moved = {id(row) for row in moving}
+        self._rows = [row for row in self._rows if id(row) not in moved]
+        self._zones = None
+        self._build_dictionaries()
+        self._build_indexes()
+        self._build_blooms()
+        self.version += 1
+        return len(moving)
+
+    def archive_spec(self):
+        return {
+            "segments": len(self.archive.segments),
+            "policy": self.archive_policy
+        }
+
     # ---------------- INDEX ----------------
-    def create_index(self, column):
+    def restore_index(self, column, entries, row_count, kind="hash", where=None):
+        """
+        Attach an index from persisted entries instead of rebuilding it.
+        Falls back to a rebuild if the row count no longer matches.
+        """
+        name = self._attach_index(column, kind, where)
+        self._restored[name] = (entries, row_count)
+        if self.loaded:
+            self._build_indexes([name])
+
+    def dump_indexes(self):
+        positions = {id(row): i for i, row in enumerate(self.rows)}
+        return {
+            name: idx.dump(positions)
+            for name, idx in self._named_indexes().items()
+        }
+
+    def index_kinds(self):
+        return {col: idx.kind for col, idx in self.indexes.items()}
+
+    def partial_index_specs(self):
+        return [
+            {"column": idx.column, "kind": idx.kind, "where": [list(c) for c in idx.predicate]}
+            for idx in self.partial_indexes.values()
+        ]
+
+    def index_name(self, column, where=None):
+        """Indexes are keyed by column; partial ones also by their predicate."""
+        if not where:
+            return column
+        conditions = " AND ".join(
+            f"{col}={self._cast(col, want)!r}" for col, want in where
+        )
+        return f"{column} WHERE {conditions}"
+
+    def _attach_index(self, column, kind, where):
+        """Register an empty index and return the name it is stored under."""
+        idx = self._new_index(column, kind)
+        if not where:
+            self.indexes[column] = idx
+            return column
+
+        idx.predicate = [(col, self._cast(col, want)) for col, want in where]
+        name = self.index_name(column, where)
+        self.partial_indexes[name] = idx
+        return name
+
+    def create_index(self, column, kind="hash", where=None):
         """
         Create and attach a new index on the given column.
+        kind is "hash" (default), "bitmap" for low-cardinality columns,
+        "sorted" for prefix searches (LIKE 'abc%') or "ngram" for
+        substring searches (LIKE '%abc%').
+        where is an optional list of (column, value) pairs; only rows
+        matching all of them are indexed (a partial index).
         Automatically rebuilds it using current table rows.
         """
+        for col in [column] + [col for col, _ in where or []]:
+            if col not in self.schema:
+                raise ValueError(
+                    f"Column '{col}' does not exist in table '{self.name}'"
+                )
+
+        name = self.index_name(column, where)
+        if name in self._named_indexes():
+            print(f"→ Index on '{name}' already exists (skipping)")
+            return
+
+        self._attach_index(column, kind, where)
+
+        if not self.loaded:
+            print(f"→ Index on '{name}' will be built when rows are loaded")
+            return
+
+        self._build_indexes([name])
+        print(
+            f"→ Index created on '{name}' "
+            f"({len(self.rows)} rows scanned)"
+        )
+
+    # ---------------- BLOOM FILTERS ----------------
+    def create_bloom_filter(self, column, error_rate=0.01):
+        """
+        Attach a Bloom filter on column. Equality filters and primary
+        key / unique checks for values it has never seen skip the rows.
+        """
         if column not in self.schema:
             raise ValueError(
                 f"Column '{column}' does not exist in table '{self.name}'"
             )
-
-        if column in self.indexes:
-            print(f"→ Index on '{column}' already exists (skipping)")
+        if column in self.blooms:
+            print(f"→ Bloom filter on '{column}' already exists (skipping)")
             return
 
-        idx = Index(column)
-        idx.rebuild(self.rows)
-        self.indexes[column] = idx
-
+        self.rows  # materialize deferred rows first
+        self.blooms[column] = BloomFilter(error_rate=error_rate)
+        self._build_blooms([column])
         print(
-            f"→ Index created on column '{column}' "
-            f"({len(self.rows)} rows indexed)"
+            f"→ Bloom filter created on '{column}' "
+            f"({len(self.rows)} rows scanned)"
+        )
+
+    def bloom_specs(self):
+        return {
+            col: {**bloom.dump(), "version": self.version}
+            for col, bloom in self.blooms.items()
+        }
+
+    def restore_bloom(self, column, data):
+        """Load a persisted filter, or rebuild it if the rows moved on."""
+        if data.get("version") == self.version:
+            self.blooms[column] = BloomFilter.load(data)
+        else:
+            self.create_bloom_filter(column, data.get("error_rate", 0.01))
+
+    # ---------------- MEMORY ----------------
+    def memory(self):
+        """Estimated bytes per structure (see engine.memory), cached until the table changes."""
+        stamp = (
+            self.version, self.schema_version, self.loaded,
+            tuple(self._named_indexes()), tuple(self.blooms)
         )
+        if self._memory[0] != stamp:
+            self._memory = (stamp, table_usage(self))
+        return self._memory[1]
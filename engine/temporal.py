@@ -0,0 +1,70 @@
+"""
+TIMESTAMP and DATE values are stored as integers: seconds and days since
+1970-01-01. Text is parsed once when a value is written and formatted
+only for display, so comparisons, sorting and range lookups work on
+plain ints. Naive timestamps keep their wall-clock time (no timezone
+shift); aware ones are converted to UTC.
+"""
+import calendar
+import datetime
+
+EPOCH_DATE = datetime.date(1970, 1, 1)
+
+
+def _parse(value):
+    value = value.strip()
+    if value.endswith("Z"):
+        value = value[:-1] + "+00:00"
+    return datetime.datetime.fromisoformat(value)
+
+
+def to_epoch(value):
+    """TIMESTAMP: int seconds from an int, datetime, date or ISO string."""
+    if isinstance(value, bool):
+        raise TypeError(value)
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str):
+        if value.strip().lstrip("-").isdigit():
+            return int(value)
+        value = _parse(value)
+    if isinstance(value, datetime.datetime):
+        if value.tzinfo is not None:
+            return calendar.timegm(value.utctimetuple())
+        return calendar.timegm(value.timetuple())
+    if isinstance(value, datetime.date):
+        return calendar.timegm(value.timetuple())
+    raise TypeError(value)
+
+
+def to_days(value):
+    """DATE: int days from an int, date, datetime or ISO string."""
+    if isinstance(value, bool):
+        raise TypeError(value)
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, str):
+        if value.strip().lstrip("-").isdigit():
+            return int(value)
+        value = _parse(value)
+    if isinstance(value, datetime.datetime):
+        value = value.date()
+    if isinstance(value, datetime.date):
+        return (value - EPOCH_DATE).days
+    raise TypeError(value)
+
+
+def now():
+    return to_epoch(datetime.datetime.now())
+
+
+def format_timestamp(value):
+    moment = datetime.datetime(1970, 1, 1) + datetime.timedelta(seconds=value)
+    return moment.isoformat(sep=" ")
+
+
+def format_date(value):
+    return (EPOCH_DATE + datetime.timedelta(days=value)).isoformat()
+
+
+FORMATTERS = {"TIMESTAMP": format_timestamp, "DATE": format_date}
@@ -0,0 +1,223 @@
+from engine.archive import all_rows
+from engine.predicate import bind, compile_predicate, normalize
+from engine.table import Table
+
+AGGREGATES = {"COUNT", "SUM", "AVG"}
+
+
+class MaterializedView:
+    """
+    A stored SELECT over one table, kept current by applying each
+    inserted, updated or deleted source row as a delta instead of
+    re-running the query.
+
+    Without aggregates the view holds the projected rows that match the
+    WHERE conditions. With aggregates (COUNT, SUM, AVG) it holds one row
+    per GROUP BY key; AVG is kept as a running sum and count. MIN and MAX
+    are not supported since a delete could not be applied without a
+    rescan. The result lives in a plain Table, so it can be filtered,
+    indexed and joined like one.
+    """
+    def __init__(self, name, source, columns, where=None, group_by=None):
+        self.name = name
+        self.source = source
+        self.where = where or []
+        self.group_by = list(group_by or [])
+        self.columns = [self._column_spec(c) for c in columns]
+        self.grouped = bool(self.group_by) or any(f for f, _, _ in self.columns)
+        self._validate()
+
+        # Each column is counted and summed once, however many aggregates use it
+        self._counted = list(dict.fromkeys(
+            col for func, col, _ in self.columns if func is not None and col != "*"
+        ))
+        self._summed = {col for func, col, _ in self.columns if func in ("SUM", "AVG")}
+
+        self._match = compile_predicate(bind(normalize(self.where), source._cast))
+        self.table = Table(name=name, columns=self._schema())
+        self._members = {}  # id(source row) -> view row, projections only
+        self._groups = {}  # group key -> aggregate state, grouped views only
+
+        self.rebuild()
+        source.add_observer(self)
+        for col in self.group_by[:1]:
+            self.table.create_index(col)
+
+    # ---------------- DEFINITION ----------------
+    @staticmethod
+    def _column_spec(column):
+        """"col", (func, col) or (func, col, alias) -> [func, col, alias]."""
+        if isinstance(column, str):
+            return [None, column, column]
+        func, col, *alias = column
+        func = func.upper() if func else None
+        if alias and alias[0]:
+            return [func, col, alias[0]]
+        if func is None:
+            return [None, col, col]
+        if col == "*":
+            return [func, col, func.lower()]
+        return [func, col, f"{func.lower()}_{col}"]
+
+    def _validate(self):
+        schema = self.source.schema
+        for col in self.group_by:
+            if col not in schema:
+                raise ValueError(f"Column '{col}' does not exist in table '{self.source.name}'")
+
+        for func, col, alias in self.columns:
+            if func is not None and func not in AGGREGATES:
+                raise ValueError(
+                    f"Aggregate {func} cannot be maintained incrementally "
+                    f"(use {', '.join(sorted(AGGREGATES))})"
+                )
+            if col == "*":
+                if func not in (None, "COUNT"):
+                    raise ValueError(f"{func}(*) is not supported")
+                if func is None and self.grouped:
+                    raise ValueError("SELECT * cannot be combined with aggregates")
+                continue
+            if col not in schema:
+                raise ValueError(f"Column '{col}' does not exist in table '{self.source.name}'")
+            if self.grouped and func is None and col not in self.group_by:
+                raise ValueError(f"Column '{col}' must appear in GROUP BY")
+            if func in ("SUM", "AVG") and schema[col] not in ("INT", "FLOAT"):
+                raise ValueError(f"{func}({col}) needs an INT or FLOAT column, not {schema[col]}")
+
+    def _schema(self):
+        schema = []
+        for func, col, alias in self.columns:
+            if col == "*" and func is None:
+                schema.extend(self.source.schema.items())
+            elif func == "COUNT":
+                schema.append((alias, "INT"))
+            elif func == "AVG":
+                schema.append((alias, "FLOAT"))
+            elif func == "SUM" and self.source.schema[col] == "INT":
+                schema.append((alias, "INT"))
+            elif func == "SUM":
+                schema.append((alias, "FLOAT"))
+            else:
+                schema.append((alias, self.source.schema[col]))
+        return schema
+
+    def definition(self):
+        return {
+            "source": self.source.name,
+            "columns": self.columns,
+            "where": self.where,
+            "group_by": self.group_by,
+            "indexes": list(self.table.indexes.keys()),
+            "index_kinds": self.table.index_kinds()
+        }
+
+    def uses(self, column):
+        """True if the definition reads column from the source."""
+        if column in self.group_by:
+            return True
+        if any(col == column or (col == "*" and not func) for func, col, _ in self.columns):
+            return True
+
+        pending = list(normalize(self.where))
+        while pending:
+            cond = pending.pop()
+            if isinstance(cond, tuple):
+                if cond[0] == column:
+                    return True
+            else:
+                for part in cond.values():
+                    pending.extend(part if isinstance(part, list) else [part])
+        return False
+
+    # ---------------- MAINTENANCE ----------------
+    def rebuild(self):
+        """Recompute from scratch (used on creation and bulk reloads)."""
+        self._members = {}
+        self._groups = {}
+        self.table.rows = []
+        for row in all_rows(self.source):
+            self.row_inserted(row)
+
+    def _project(self, row):
+        view_row = {}
+        for _, col, alias in self.columns:
+            if col == "*":
+                view_row.update(row)
+            else:
+                view_row[alias] = row.get(col)
+        return view_row
+
+    def _apply(self, row, sign):
+        """Add (sign=1) or remove (sign=-1) one source row's contribution."""
+        key = tuple(row.get(col) for col in self.group_by)
+        state = self._groups.get(key)
+
+        if state is None:
+            if sign < 0:
+                return
+            view_row = dict(zip(self.group_by, key))
+            state = self._groups[key] = {"row": view_row, "count": 0, "sums": {}, "counts": {}}
+            self._fill(state)
+            self.table._link(view_row)
+
+        state["count"] += sign
+        for col in self._counted:
+            value = row.get(col)
+            if value is not None:
+                state["counts"][col] = state["counts"].get(col, 0) + sign
+                if col in self._summed:
+                    state["sums"][col] = state["sums"].get(col, 0) + sign * value
+
+        if state["count"] <= 0:
+            del self._groups[key]
+            self.table._unlink(state["row"])
+            return
+
+        self.table._index_remove(state["row"])
+        self._fill(state)
+        self.table._index_add(state["row"])
+        self.table._zone_touch(state["row"])
+        self.table.version += 1
+
+    def _fill(self, state):
+        view_row = state["row"]
+        for func, col, alias in self.columns:
+            if func == "COUNT":
+                view_row[alias] = state["count"] if col == "*" else state["counts"].get(col, 0)
+            elif func == "SUM":
+                view_row[alias] = state["sums"].get(col, 0)
+            elif func == "AVG":
+                count = state["counts"].get(col, 0)
+                view_row[alias] = state["sums"].get(col, 0) / count if count else None
+
+    # ---------------- OBSERVER ----------------
+    def row_inserted(self, row):
+        if not self._match(row):
+            return
+        if self.grouped:
+            self._apply(row, 1)
+        else:
+            view_row = self._members[id(row)] = self._project(row)
+            self.table._link(view_row)
+
+    def row_deleted(self, row):
+        if self.grouped:
+            if self._match(row):
+                self._apply(row, -1)
+            return
+        view_row = self._members.pop(id(row), None)
+        if view_row is not None:
+            self.table._unlink(view_row)
+
+    def row_updated(self, old, row):
+        if self.grouped:
+            if self._match(old):
+                self._apply(old, -1)
+        else:
+            view_row = self._members.pop(id(row), None)
+            if view_row is not None:
+                self.table._unlink(view_row)
+        self.row_inserted(row)
+
+    def rows_replaced(self):
+        self.rebuild()
@@ -0,0 +1,127 @@
+"""
+Zone maps
+---------
+The smallest value, the largest value and the number of NULLs of every
+column over a block of rows. A scan skips a block whose zone map proves
+no row in it can satisfy the query's conditions.
+
+A zone map only ever widens: values removed from the block leave the
+bounds where they were, which is still correct, just less selective.
+Columns holding values that cannot be ordered against each other are
+marked mixed and never rule a block out.
+"""
+from engine.predicate import like_prefix
+
+ZONE_ROWS = 4096  # rows per zone of an in-memory table
+
+
+class ZoneMap:
+    def __init__(self):
+        self.count = 0
+        self.columns = {}  # column -> [low, high, nulls]
+        self.mixed = set()
+
+    @classmethod
+    def build(cls, rows, columns):
+        """Zone map of rows over columns, one column at a time."""
+        zones = cls()
+        zones.count = len(rows)
+        for col in columns:
+            values = [row.get(col) for row in rows]
+            present = [v for v in values if v is not None]
+            zone = zones.columns[col] = [None, None, len(values) - len(present)]
+            if present:
+                try:
+                    zone[0], zone[1] = min(present), max(present)
+                except TypeError:
+                    zones.mixed.add(col)
+        return zones
+
+    def add(self, row):
+        """Widen the bounds to cover row (new, or changed in place)."""
+        self.count += 1
+        for col, value in row.items():
+            zone = self.columns.get(col)
+            if zone is None:
+                continue
+            if value is None:
+                zone[2] += 1
+            elif col in self.mixed:
+                continue
+            elif zone[0] is None:
+                zone[0] = zone[1] = value
+            else:
+                try:
+                    if value < zone[0]:
+                        zone[0] = value
+                    elif value > zone[1]:
+                        zone[1] = value
+                except TypeError:
+                    self.mixed.add(col)
+                    zone[0] = zone[1] = None
+
+    def may_match(self, conditions, columns=None):
+        """
+        False only if no row summarized here can satisfy conditions
+        (normalized and bound, ANDed). Columns outside `columns`, when
+        given, are treated as unknown.
+        """
+        return all(self._may_match(c, columns) for c in conditions)
+
+    def _may_match(self, cond, columns):
+        if isinstance(cond, dict):
+            if "not" in cond:
+                return True
+            (key, children), = cond.items()
+            results = (self._may_match(c, columns) for c in children)
+            return all(results) if key == "and" else any(results)
+
+        col, op, want = cond
+        zone = self.columns.get(col)
+        if zone is None or col in self.mixed or (columns is not None and col not in columns):
+            return True
+        low, high, nulls = zone
+
+        try:
+            if op == "=":
+                return self._may_equal(zone, want)
+            if op == "IN":
+                return any(self._may_equal(zone, value) for value in want)
+            if low is None:
+                return False  # only NULLs, which fail every other operator
+            if op == "!=":
+                return not low == high == want
+            if op == "<":
+                return low < want
+            if op == "<=":
+                return low <= want
+            if op == ">":
+                return high > want
+            if op == ">=":
+                return high >= want
+            if op == "LIKE":
+                prefix = like_prefix(want)
+                if prefix is None or not isinstance(low, str):
+                    return True
+                return high >= prefix and low[:len(prefix)] <= prefix
+        except TypeError:
+            return True
+        return True
+
+    @staticmethod
+    def _may_equal(zone, value):
+        low, high, nulls = zone
+        if value is None:
+            return nulls > 0
+        return low is not None and low <= value <= high
+
+    def dump(self):
+        return {"count": self.count, "columns": self.columns, "mixed": sorted(self.mixed)}
+
+    @classmethod
+    def load(cls, data):
+        zones = cls()
+        zones.count = data["count"]
+        zones.columns = {col: list(zone) for col, zone in data["columns"].items()}
+        zones.mixed = set(data.get("mixed", []))
+        return zones
@@ -1,9 +1,11 @@
 from flask import Flask, render_template, request, redirect, url_for, session, flash
 from engine.database import Database
+from webapp.repository import Repository
 from datetime import datetime, timedelta
 import random
 import logging
 import hashlib
+import os
 
 app = Flask(__name__)
 app.secret_key = "super-secret-key-please-change-this-in-production-2026!!!"  # CHANGE THIS IN PROD!
@@ -47,19 +49,20 @@ for table_name, config in tables_to_create.items():
     else:
         logging.info(f"Table {table_name} already exists - skipping")
 
-# Migrate existing customers to have new fields (safe to run multiple times)
-for cust in db.tables["customers"].rows:
-    if "current_package_id" not in cust:
-        cust["current_package_id"] = None
-    if "last_good_repayment" not in cust:
-        cust["last_good_repayment"] = None
-db._save_data()
+# Columns added for the tier system; only the schema changes, existing
+# customers get NULL as they are read
+for column in ("current_package_id", "last_good_repayment"):
+    if column not in db.tables["customers"].schema:
+        db.add_column("customers", column)
+
+# Indexes on every column the routes look rows up by
+repo = Repository(db)
 
 # ---------------------------
 # Sample data
 # ---------------------------
-if not db.tables["merchants"].rows:
-    db.insert("merchants", {
+if not repo.merchants():
+    repo.add_merchant({
         "id": "1",
         "name": "Pesapal",
         "email": "pesapal@example.com",
@@ -67,10 +70,9 @@ if not db.tables["merchants"].rows:
         "balance": 1000000.0,
         "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     })
-    db._save_data()
 
-if not db.tables["customers"].rows:
-    db.insert("customers", {
+if not repo.customers():
+    repo.add_customer({
         "id": "1",
         "name": "Ivy",
         "email": "ivy@example.com",
@@ -81,41 +83,43 @@ if not db.tables["customers"].rows:
         "current_package_id": None,
         "last_good_repayment": None
     })
-    db._save_data()
 
 # ---------------------------
-# Helper: Update overdue loans
+# Overdue loans (background timer)
 # ---------------------------
-def update_overdue_loans():
-    today = datetime.now().date()
-    updated = False
-
-    for t in db.tables["transactions"].rows:
-        if t.get("status") == "accepted":
-            if "due_date" not in t or not t["due_date"]:
-                continue
-            try:
-                due = datetime.strptime(t["due_date"], "%Y-%m-%d").date()
-                if due < today:
-                    customer = next((c for c in db.tables["customers"].rows if c["id"] == t["customer_id"]), None)
-                    if customer:
-                        old_score = int(customer.get("risk_score", 0))
-                        customer["risk_score"] = min(2, old_score + 1)
-                        t["status"] = "failed"
-                        t["fraud_flag"] = "Overdue - Risk Increased"
-                        updated = True
-                        logging.info(f"Loan {t['id']} overdue → failed, risk updated")
-            except ValueError:
-                continue
-
-    if updated:
-        db._save_data()
+def mark_overdue(loans):
+    """
+    Timer action: accepted loans past their due_date fail and raise the
+    customer's risk. Loans whose customer is missing are left as they are
+    and reported by raising, so the timer retries them.
+    """
+    missing = []
+    for t in loans:
+        customer = repo.customer(t["customer_id"])
+        if not customer:
+            missing.append(t["id"])
+            continue
+        repo.update_customer(customer["id"], risk_score=min(2, customer["risk_score"] + 1))
+        repo.update_transaction(t["id"], status="failed", fraud_flag="Overdue - Risk Increased")
+        logging.info(f"Loan {t['id']} overdue → failed, risk updated")
+    if missing:
+        raise ValueError(f"Overdue loans with no customer: {', '.join(map(str, missing))}")
+
+# A loan is due once the day after its due_date starts; the timer keeps
+# accepted loans in a heap on that time, so no request ever sweeps
+db.create_timer("overdue_loans", "transactions", "due_date", [("status", "accepted")], mark_overdue)
+
+# The timer thread changes rows too; repo calls take the same lock. Run
+# as a script, app.run(debug=True) serves from a child process and the
+# parent only watches for code changes, so the parent does not sweep.
+if __name__ != "__main__" or os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+    db.start_timers(interval=60)
 
 # ---------------------------
 # Helper: Try to upgrade customer tier
 # ---------------------------
 def try_upgrade_customer(customer_id, merchant_id):
-    customer = next((c for c in db.tables["customers"].rows if c["id"] == customer_id), None)
+    customer = repo.customer(customer_id)
     if not customer:
         return False
 
@@ -123,15 +127,14 @@ def try_upgrade_customer(customer_id, merchant_id):
     current_level = 0
 
     if current_pkg_id:
-        pkg = next((p for p in db.tables["loan_packages"].rows if p["id"] == current_pkg_id), None)
+        pkg = repo.package(current_pkg_id)
         if pkg:
-            current_level = pkg.get("order_level", 1)
+            current_level = pkg["order_level"]
 
     # Find next tier
     next_pkg = next(
-        (p for p in db.tables["loan_packages"].rows
-         if p["merchant_id"] == merchant_id
-         and p.get("order_level", 999) == current_level + 1),
+        (p for p in repo.packages_for_merchant(merchant_id)
+         if p["order_level"] == current_level + 1),
         None
     )
 
@@ -139,28 +142,20 @@ def try_upgrade_customer(customer_id, merchant_id):
         return False
 
     # Count good recent loans (simple rule: ≥2 accepted & not overdue)
-    recent_loans = [
-        t for t in db.tables["transactions"].rows
-        if t["customer_id"] == customer_id
-        and t["merchant_id"] == merchant_id
-        and t["status"] in ["accepted", "complete"]  # adjust if you use "complete"
-    ]
+    recent_loans = repo.transactions_for_customer(
+        customer_id, merchant_id, ["accepted", "complete"]  # adjust if you use "complete"
+    )
     recent_loans = sorted(recent_loans, key=lambda x: x.get("timestamp", ""), reverse=True)[:5]
 
-    good_count = 0
-    for loan in recent_loans:
-        if "due_date" in loan and loan["due_date"]:
-            try:
-                due = datetime.strptime(loan["due_date"], "%Y-%m-%d")
-                if due >= datetime.now().date():
-                    good_count += 1
-            except:
-                pass
+    today = datetime.now().strftime("%Y-%m-%d")
+    good_count = sum(1 for loan in recent_loans if loan.get("due_date") and loan["due_date"] >= today)
 
     if good_count >= 2:
-        customer["current_package_id"] = next_pkg["id"]
-        customer["last_good_repayment"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        db._save_data()
+        repo.update_customer(
+            customer_id,
+            current_package_id=next_pkg["id"],
+            last_good_repayment=datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        )
         logging.info(f"Customer {customer_id} upgraded to {next_pkg.get('name', 'Unknown')}")
         return True
 
@@ -180,11 +175,11 @@ def login():
         password = request.form.get("password")
         password_hash = hashlib.sha256(password.encode()).hexdigest()
 
-        user = next((m for m in db.tables["merchants"].rows if m.get("email") == email and m.get("password_hash") == password_hash), None)
+        user = repo.merchant_by_login(email, password_hash)
         user_type = "merchant"
 
         if not user:
-            user = next((c for c in db.tables["customers"].rows if c.get("email") == email and c.get("password_hash") == password_hash), None)
+            user = repo.customer_by_login(email, password_hash)
             user_type = "customer"
 
         if user:
@@ -212,20 +207,18 @@ def user_dashboard():
         flash("Please login to access your dashboard", "error")
         return redirect(url_for("login"))
 
-    update_overdue_loans()
-
     user_id = session['user_id']
     user_type = session['user_type']
     user_name = session.get('user_name', 'User')
     current_date = datetime.now().strftime("%Y-%m-%d")
 
     if user_type == "merchant":
-        merchant = next((m for m in db.tables["merchants"].rows if m["id"] == user_id), None)
+        merchant = repo.merchant(user_id)
         if not merchant:
             session.clear()
             return redirect(url_for("login"))
 
-        transactions = [t for t in db.tables["transactions"].rows if t["merchant_id"] == user_id]
+        transactions = repo.transactions_for_merchant(user_id)
 
         return render_template(
             "dashboard_merchant.html",
@@ -238,14 +231,14 @@ def user_dashboard():
         )
 
     elif user_type == "customer":
-        customer = next((c for c in db.tables["customers"].rows if c["id"] == user_id), None)
+        customer = repo.customer(user_id)
         if not customer:
             session.clear()
             return redirect(url_for("login"))
 
-        merchants = db.tables["merchants"].rows
+        merchants = repo.merchants()
 
-        transactions = [t for t in db.tables["transactions"].rows if t["customer_id"] == user_id]
+        transactions = repo.transactions_for_customer(user_id)
         merchant_names = {m["id"]: m["name"] for m in merchants}
         for t in transactions:
             t["merchant_name"] = merchant_names.get(t["merchant_id"], "Unknown")
@@ -313,49 +306,45 @@ def merchant_packages():
                     "order_level": level,
                     "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
                 }
-                db.insert("loan_packages", new_pkg)
-                db._save_data()
+                repo.add_package(new_pkg)
                 flash(f"Package '{name}' created!", "success")
 
         elif action == "edit":
             # EDIT
-            package = next((p for p in db.tables["loan_packages"].rows if p["id"] == pkg_id), None)
+            package = repo.package(pkg_id)
             if not package:
                 flash("Package not found", "error")
             else:
                 # Update only if fields exist in form
+                changes = {}
                 name = request.form.get("name")
                 if name:
-                    package["name"] = name.strip()
+                    changes["name"] = name.strip()
                 max_amount = request.form.get("max_amount")
                 if max_amount:
-                    package["max_amount"] = float(max_amount)
+                    changes["max_amount"] = float(max_amount)
                 interest = request.form.get("interest_rate")
                 if interest:
-                    package["interest_rate"] = float(interest)
+                    changes["interest_rate"] = float(interest)
                 days = request.form.get("repayment_days")
                 if days:
-                    package["repayment_days"] = int(days)
+                    changes["repayment_days"] = int(days)
                 min_risk = request.form.get("min_risk_score")
                 if min_risk:
-                    package["min_risk_score"] = int(min_risk)
+                    changes["min_risk_score"] = int(min_risk)
                 level = request.form.get("order_level")
                 if level:
-                    package["order_level"] = int(level)
-                db._save_data()
-                flash(f"Package '{package['name']}' updated!", "success")
+                    changes["order_level"] = int(level)
+                repo.update_package(pkg_id, **changes)
+                flash(f"Package '{changes.get('name', package['name'])}' updated!", "success")
 
         elif action == "delete":
             # DELETE
-            db.tables["loan_packages"].rows = [
-                p for p in db.tables["loan_packages"].rows if p["id"] != pkg_id
-            ]
-            db._save_data()
+            repo.delete_package(pkg_id)
             flash("Package deleted successfully!", "success")
 
     # GET: fetch all packages
-    packages = [p for p in db.tables["loan_packages"].rows if p["merchant_id"] == merchant_id]
-    packages.sort(key=lambda x: x.get("order_level", 999))
+    packages = repo.packages_for_merchant(merchant_id)
 
     return render_template("merchant_packages.html", packages=packages, user_name=session.get('user_name'))
 
@@ -381,8 +370,7 @@ def register_merchant():
                 "created_at": created_at
             }
 
-            db.insert("merchants", merchant)
-            db._save_data()
+            repo.add_merchant(merchant)
 
             session.clear()
             session['user_id'] = merchant_id
@@ -429,8 +417,7 @@ def register_customer():
                 "last_good_repayment": None
             }
 
-            db.insert("customers", customer)
-            db._save_data()
+            repo.add_customer(customer)
 
             session.clear()
             session['user_id'] = customer_id
@@ -461,45 +448,16 @@ def request_loan(merchant_id):
 
     customer_id = session['user_id']
 
-    # Fetch customer and merchant
-    customer = next((c for c in db.tables["customers"].rows if c["id"] == customer_id), None)
-    merchant = next((m for m in db.tables["merchants"].rows if m["id"] == merchant_id), None)
+    # Fetch customer and merchant (numeric fields come back converted)
+    customer = repo.customer(customer_id)
+    merchant = repo.merchant(merchant_id)
 
     if not customer or not merchant:
         flash("Invalid request", "error")
         return redirect(url_for("user_dashboard"))
 
-    # Ensure numeric fields for customer
-    try:
-        customer["risk_score"] = int(customer.get("risk_score", 0))
-    except (ValueError, TypeError):
-        customer["risk_score"] = 0
-
-    # Ensure merchant balance is float
-    try:
-        merchant["balance"] = float(merchant.get("balance", 0))
-    except (ValueError, TypeError):
-        merchant["balance"] = 0.0
-
-    # Get merchant packages
-    packages = [p for p in db.tables["loan_packages"].rows if p["merchant_id"] == merchant_id]
-
-    # Sort and ensure numeric fields for packages
-    for pkg in packages:
-        try:
-            pkg["max_amount"] = float(pkg.get("max_amount", 0))
-            pkg["interest_rate"] = float(pkg.get("interest_rate", 0))
-            pkg["repayment_days"] = int(pkg.get("repayment_days", 0))
-            pkg["min_risk_score"] = int(pkg.get("min_risk_score", 0))
-            pkg["order_level"] = int(pkg.get("order_level", 1))
-        except (ValueError, TypeError):
-            pkg["max_amount"] = 0.0
-            pkg["interest_rate"] = 0.0
-            pkg["repayment_days"] = 0
-            pkg["min_risk_score"] = 0
-            pkg["order_level"] = 1
-
-    packages.sort(key=lambda x: x.get("order_level", 999))
+    # Get merchant packages, lowest tier first
+    packages = repo.packages_for_merchant(merchant_id)
 
     if request.method == "POST":
         try:
@@ -551,8 +509,7 @@ def request_loan(merchant_id):
                 "due_date": due_date
             }
 
-            db.insert("transactions", transaction)
-            db._save_data()
+            repo.add_transaction(transaction)
 
             flash(f"Loan request of KES {amount:,.2f} sent using package '{pkg['name']}'!", "success")
             return redirect(url_for("user_dashboard"))
@@ -577,14 +534,13 @@ def merchant_loans():
         return redirect(url_for("login"))
 
     merchant_id = session['user_id']
-    pending_loans = [
-        t for t in db.tables["transactions"].rows 
-        if t["merchant_id"] == merchant_id and t["status"] == "pending"
-    ]
+    pending_loans = repo.transactions_for_merchant(merchant_id, status="pending")
 
-    customers = {c["id"]: c for c in db.tables["customers"].rows}
+    customers = {}
     for loan in pending_loans:
-        c = customers.get(loan["customer_id"])
+        if loan["customer_id"] not in customers:
+            customers[loan["customer_id"]] = repo.customer(loan["customer_id"])
+        c = customers[loan["customer_id"]]
         loan["customer_name"] = c["name"] if c else "Unknown"
         loan["risk_score"] = c.get("risk_score", "N/A") if c else "N/A"
 
@@ -597,35 +553,35 @@ def loan_action(loan_id, action):
         return redirect(url_for("login"))
 
     merchant_id = session['user_id']
-    loan = next((t for t in db.tables["transactions"].rows if t["id"] == loan_id), None)
 
-    if not loan or loan["merchant_id"] != merchant_id or loan["status"] != "pending":
-        flash("Invalid loan", "error")
-        return redirect(url_for("merchant_loans"))
+    # Check and change the loan in one step, so two clicks cannot both
+    # approve it; the whole transfer is saved once
+    with repo.atomic():
+        loan = repo.transaction(loan_id)
 
-    amount = float(loan["amount"])
-
-    if action == "approve":
-        merchant = next((m for m in db.tables["merchants"].rows if m["id"] == merchant_id), None)
-        if not merchant or merchant["balance"] < amount:
-            flash("Insufficient balance", "error")
+        if not loan or loan["merchant_id"] != merchant_id or loan["status"] != "pending":
+            flash("Invalid loan", "error")
             return redirect(url_for("merchant_loans"))
 
-        merchant["balance"] -= amount
-        customer = next((c for c in db.tables["customers"].rows if c["id"] == loan["customer_id"]), None)
-        if customer:
-            customer["wallet_balance"] = float(customer.get("wallet_balance", 0)) + amount
+        amount = loan["amount"]
+
+        if action == "approve":
+            merchant = repo.merchant(merchant_id)
+            if not merchant or merchant["balance"] < amount:
+                flash("Insufficient balance", "error")
+                return redirect(url_for("merchant_loans"))
 
-        loan["status"] = "accepted"
-        loan["fraud_flag"] = "Approved"
-        flash("Loan approved & funds transferred!", "success")
+            repo.update_merchant(merchant_id, balance=merchant["balance"] - amount)
+            customer = repo.customer(loan["customer_id"])
+            if customer:
+                repo.update_customer(customer["id"], wallet_balance=customer["wallet_balance"] + amount)
+            repo.update_transaction(loan_id, status="accepted", fraud_flag="Approved")
+            flash("Loan approved & funds transferred!", "success")
 
-    elif action == "reject":
-        loan["status"] = "failed"
-        loan["fraud_flag"] = "Rejected"
-        flash("Loan rejected.", "info")
+        elif action == "reject":
+            repo.update_transaction(loan_id, status="failed", fraud_flag="Rejected")
+            flash("Loan rejected.", "info")
 
-    db._save_data()
     return redirect(url_for("merchant_loans"))
 
 @app.route("/add_transaction_page")
@@ -634,8 +590,8 @@ def add_transaction_page():
         flash("Please login first", "error")
         return redirect(url_for("login"))
 
-    merchants = db.tables["merchants"].rows
-    customers = db.tables["customers"].rows
+    merchants = repo.merchants()
+    customers = repo.customers()
     return render_template("add_transaction.html", merchants=merchants, customers=customers)
 
 @app.route("/add_transaction", methods=["POST"])
@@ -676,8 +632,7 @@ def add_transaction():
     }
 
     try:
-        db.insert("transactions", transaction)
-        db._save_data()
+        repo.add_transaction(transaction)
         flash("Transaction added successfully!", "success")
     except ValueError as e:
         flash(f"Error: {str(e)}", "error")
@@ -0,0 +1,184 @@
+"""
+Data access for the web app.
+
+Routes find rows through indexed lookups (Database.select_all with an
+equality filter on an indexed column) and change them only through
+Database.insert / update / delete, so request time stays flat as the
+tables grow and the engine sees every change (indexes, timers, saves).
+
+The demo tables store every column as TEXT: rows come back as copies
+with their numeric fields converted, and changing a copy changes
+nothing stored.
+
+Every call holds the database lock the timer thread runs under, only
+for as long as it touches the engine; atomic() holds it across a
+read-check-write sequence.
+"""
+import contextlib
+import logging
+
+# table -> [(column, index kind)], created at startup when missing
+INDEXES = {
+    "merchants": [("id", "hash"), ("email", "hash")],
+    "customers": [("id", "hash"), ("email", "hash")],
+    "transactions": [
+        ("id", "hash"), ("merchant_id", "hash"), ("customer_id", "hash"), ("status", "bitmap")
+    ],
+    "loan_packages": [("id", "hash"), ("merchant_id", "hash")]
+}
+
+# table -> {column: (type, value when missing or not a number)}
+FIELDS = {
+    "merchants": {"balance": (float, 0.0)},
+    "customers": {"risk_score": (int, 0), "wallet_balance": (float, 0.0)},
+    "transactions": {
+        "amount": (float, 0.0), "interest_rate": (float, None), "repayment_days": (int, None)
+    },
+    "loan_packages": {
+        "max_amount": (float, 0.0), "interest_rate": (float, 0.0), "repayment_days": (int, 0),
+        "min_risk_score": (int, 0), "order_level": (int, 1)
+    }
+}
+
+
+def _convert(value, kind, default):
+    if value is None:
+        return default
+    try:
+        return kind(float(value)) if kind is int else kind(value)
+    except (ValueError, TypeError):
+        return default
+
+
+class Repository:
+    def __init__(self, db):
+        self.db = db
+        self.lock = db.scheduler.lock
+        self._create_indexes()
+
+    def _create_indexes(self):
+        for table_name, specs in INDEXES.items():
+            table = self.db.get_table(table_name)
+            for column, kind in specs:
+                if column not in table.indexes:
+                    self.db.create_index(table_name, column, kind)
+                    logging.info(f"Created {kind} index on {table_name}.{column}")
+
+    # ---------------------------
+    # Rows
+    # ---------------------------
+    def _typed(self, table_name, row):
+        typed = dict(row)
+        for column, (kind, default) in FIELDS[table_name].items():
+            typed[column] = _convert(row.get(column), kind, default)
+        return typed
+
+    def _find(self, table_name, *filters):
+        with self.lock:
+            return [self._typed(table_name, r) for r in self.db.select_all(table_name, list(filters))]
+
+    def _one(self, table_name, *filters):
+        rows = self._find(table_name, *filters)
+        return rows[0] if rows else None
+
+    def _insert(self, table_name, row):
+        with self.lock:
+            self.db.insert(table_name, row)
+
+    def _update(self, table_name, row_id, changes):
+        with self.lock:
+            self.db.update(table_name, [("id", row_id)], changes)
+
+    @contextlib.contextmanager
+    def atomic(self):
+        """
+        Hold the lock across several reads and changes, so no other
+        request or the timer changes rows in between, and save the data
+        file once at the end.
+        """
+        with self.lock, self.db.deferred_saves():
+            yield
+
+    # ---------------------------
+    # Merchants
+    # ---------------------------
+    def merchant(self, merchant_id):
+        return self._one("merchants", ("id", merchant_id))
+
+    def merchant_by_login(self, email, password_hash):
+        return self._one("merchants", ("email", email), ("password_hash", password_hash))
+
+    def merchants(self):
+        return self._find("merchants")
+
+    def add_merchant(self, merchant):
+        self._insert("merchants", merchant)
+
+    def update_merchant(self, merchant_id, **changes):
+        self._update("merchants", merchant_id, changes)
+
+    # ---------------------------
+    # Customers
+    # ---------------------------
+    def customer(self, customer_id):
+        return self._one("customers", ("id", customer_id))
+
+    def customer_by_login(self, email, password_hash):
+        return self._one("customers", ("email", email), ("password_hash", password_hash))
+
+    def customers(self):
+        return self._find("customers")
+
+    def add_customer(self, customer):
+        self._insert("customers", customer)
+
+    def update_customer(self, customer_id, **changes):
+        self._update("customers", customer_id, changes)
+
+    # ---------------------------
+    # Transactions (loans)
+    # ---------------------------
+    def transaction(self, transaction_id):
+        return self._one("transactions", ("id", transaction_id))
+
+    def transactions_for_merchant(self, merchant_id, status=None):
+        filters = [("merchant_id", merchant_id)]
+        if status:
+            filters.append(("status", status))
+        return self._find("transactions", *filters)
+
+    def transactions_for_customer(self, customer_id, merchant_id=None, statuses=None):
+        filters = [("customer_id", customer_id)]
+        if merchant_id:
+            filters.append(("merchant_id", merchant_id))
+        if statuses:
+            filters.append(("status", "IN", list(statuses)))
+        return self._find("transactions", *filters)
+
+    def add_transaction(self, transaction):
+        self._insert("transactions", transaction)
+
+    def update_transaction(self, transaction_id, **changes):
+        self._update("transactions", transaction_id, changes)
+
+    # ---------------------------
+    # Loan packages
+    # ---------------------------
+    def package(self, package_id):
+        return self._one("loan_packages", ("id", package_id))
+
+    def packages_for_merchant(self, merchant_id):
+        """A merchant's packages, lowest tier first."""
+        packages = self._find("loan_packages", ("merchant_id", merchant_id))
+        packages.sort(key=lambda p: p["order_level"])
+        return packages
+
+    def add_package(self, package):
+        self._insert("loan_packages", package)
+
+    def update_package(self, package_id, **changes):
+        self._update("loan_packages", package_id, changes)
+
+    def delete_package(self, package_id):
+        with self.lock:
+            self.db.delete("loan_packages", [("id", package_id)])